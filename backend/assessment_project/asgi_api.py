@@ -0,0 +1,13 @@
+"""
+ASGI config of the API-only profile (assessment_project.settings_api).
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'assessment_project.settings_api')
+
+application = get_asgi_application()
@@ -43,10 +43,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so the latency covers the rest of the middleware too
+    'loan.middleware.MetricsMiddleware',
+    # ahead of admission control and the fast path, so their responses (429s included) carry CORS headers
+    # and browsers on another origin can read them
     'corsheaders.middleware.CorsMiddleware',
+    # ahead of the fast path, so the calculator is throttled too
+    'loan.middleware.AdmissionControlMiddleware',
+    'loan.middleware.CalculatorFastPathMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # ETag and 304 for every GET without validators of its own
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -89,6 +98,45 @@ DATABASES = {
     }
 }
 
+# PRAGMAs run on every new SQLite connection (see loan.signals), tuned in settings_production
+SQLITE_PRAGMAS = {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # token buckets of LOAN_THROTTLING, swap the backend for redis/memcached to share them between servers
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+    # bounded LRU cache in front of the loan calculator, swap the backend for redis/memcached to share it
+    'loan-calculator': {
+        'BACKEND': 'loan.cache.CountingLocMemCache',
+        'LOCATION': 'loan-calculator',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # customer detail payloads of LOAN_CUSTOMER_DETAIL_CACHE. Invalidation only reaches caches shared by every
+    # worker, so it's kept in files shared by the processes of this machine rather than in a per-process LocMemCache
+    'customer-detail': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'customer-detail',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -130,3 +178,134 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Loan application settings
+
+# Maximum number of scenarios accepted by POST /api/v1/loan-calculator/batch
+LOAN_CALCULATOR_BATCH_MAX_SIZE = 10000
+
+# Longest loan term (in months) accepted by the calculator endpoints, longer terms overflow the payment formula
+LOAN_CALCULATOR_MAX_TERM = 1200
+
+# Maximum number of interest rate x loan term cells of POST /api/v1/loan-calculator/grid
+LOAN_CALCULATOR_GRID_MAX_CELLS = 100000
+
+# Cache-Control max-age (seconds) of GET /api/v1/loan-calculator and /api/v1/loan-calculator/schedule,
+# whose results only depend on the query string
+LOAN_CALCULATOR_HTTP_MAX_AGE = 86400
+
+# Longest loan term (in months) accepted by GET /api/v1/loan-calculator/schedule
+LOAN_SCHEDULE_MAX_TERM = 1200
+
+# Payment cache used by POST /api/v1/loan-calculator, set ENABLED to False to bypass it (e.g. in tests)
+LOAN_CALCULATOR_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'loan-calculator',
+}
+
+# Longest loan term (in months) of a loan offer. With the amount and rate limits of the LoanOffer columns it keeps
+# the stored monthly payment and totals within their columns
+LOAN_OFFER_MAX_TERM = 1200
+
+# Rows per bulk_create (and per transaction) of the bulk ingestion endpoints
+LOAN_BULK_CHUNK_SIZE = 1000
+
+# Cache of GET /api/v1/customers/<id> payloads, invalidated on Customer / LoanOffer changes. A write only
+# invalidates the cache it can reach, so ALIAS must be a cache shared by all the workers (database, redis,
+# memcached): the app refuses to start with a process-local one. Set ENABLED to False to read from the database
+LOAN_CUSTOMER_DETAIL_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'customer-detail',
+    'TIMEOUT': 300,
+}
+
+# Request metrics served on GET /metrics. Requests slower than SLOW_REQUEST_SECONDS are logged with
+# the SQL they issued to the "loan.slow_requests" logger, None turns that log off
+LOAN_METRICS = {
+    'ENABLED': True,
+    'SLOW_REQUEST_SECONDS': None,
+}
+
+# Serve POST /api/v1/loan-calculator/fast ahead of the rest of the middleware stack,
+# with False the route still works but goes through every middleware
+LOAN_CALCULATOR_FAST_PATH = True
+
+# Upper bounds (in months, inclusive) of the loan term buckets of the portfolio endpoints, anything longer
+# falls in a last open ended bucket. Run "manage.py rebuild_portfolio_summary" after changing them
+LOAN_PORTFOLIO_TERM_BUCKETS = [12, 36, 60, 120, 240, 360]
+
+# Background jobs of POST /api/v1/jobs, executed by "manage.py run_jobs". Result files are written to RESULT_DIR,
+# work is split into chunks of SCENARIO_CHUNK_SIZE scenarios / OFFER_CHUNK_SIZE offer schedules, and running
+# jobs whose worker stopped refreshing their heartbeat for STALE_SECONDS are queued again
+LOAN_JOBS = {
+    'RESULT_DIR': BASE_DIR / 'job_results',
+    'SCENARIO_CHUNK_SIZE': 50000,
+    'OFFER_CHUNK_SIZE': 500,
+    'MAX_SCENARIOS': 10000000,
+    'STALE_SECONDS': 600,
+}
+
+# Rows per database fetch and per written chunk (Parquet row group / Arrow record batch) of the exports
+LOAN_EXPORT_CHUNK_SIZE = 2000
+
+# Admission control (loan.middleware.AdmissionControlMiddleware). Requests of a scope's ROUTES (URL names) and
+# METHODS (None for all) take a token from a bucket per client and route: CAPACITY tokens, refilled at RATE per
+# second, kept in the CACHE_ALIAS cache. At most CONCURRENCY of them run at once per process. Anything over
+# is answered with a 429 and a Retry-After. Clients are told apart by CLIENT_HEADER when set, else by address
+LOAN_THROTTLING = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'throttle',
+    'CLIENT_HEADER': None,
+    'SHED_RETRY_AFTER': 1,
+    'SCOPES': {
+        'writes': {
+            'ROUTES': ['customer-create', 'customer-bulk-create', 'loanoffer-create', 'loanoffer-bulk-create', 'job-create'],
+            'METHODS': ['POST', 'PUT', 'PATCH', 'DELETE'],
+            'CAPACITY': 60,
+            'RATE': 20,
+            'CONCURRENCY': 4,
+        },
+        'calculator': {
+            'ROUTES': [
+                'loan-calculator', 'loan-calculator-fast', 'loan-calculator-batch', 'loan-calculator-solve',
+                'loan-calculator-grid', 'loan-calculator-schedule', 'loanoffer-simulate',
+            ],
+            'METHODS': None,
+            'CAPACITY': 300,
+            'RATE': 100,
+            'CONCURRENCY': None,
+        },
+    },
+}
+
+# Customer search (GET /api/v1/customers/search, loan.search). Results per request unless ?limit= asks for fewer
+# or more (up to MAX_LIMIT), words of the query that are used, and the SQLite index matches ranked per request,
+# which bounds the work of very broad queries: a query with more matches only ranks the first MAX_CANDIDATES of
+# them in id order, not the best of all of them
+LOAN_CUSTOMER_SEARCH = {
+    'DEFAULT_LIMIT': 20,
+    'MAX_LIMIT': 100,
+    'MAX_TERMS': 5,
+    'MAX_CANDIDATES': 1000,
+}
+
+# Group commit of single loan offer creates (loan.group_commit). Creates arriving within WINDOW_MS of the first
+# one of a batch, at most MAX_BATCH_SIZE, are written by one bulk_create in one transaction (one fsync on SQLite).
+# Only concurrent requests of the same process share a batch: use threaded workers (gunicorn --threads), and
+# raise the CONCURRENCY of the writes scope in LOAN_THROTTLING, which caps the batch size as well
+LOAN_OFFER_GROUP_COMMIT = {
+    'ENABLED': False,
+    'WINDOW_MS': 2,
+    'MAX_BATCH_SIZE': 100,
+}
+
+# Monte Carlo rate simulations (loan.simulation). Paths are simulated in shards of PATHS_PER_SHARD (the unit of
+# work of a process pool worker) and OFFER_CHUNK_SIZE offers at a time. POST /api/v1/loanoffers/simulate runs
+# at most MAX_PATHS paths and MAX_REQUEST_STEPS offer x path x month steps, the simulate_rates command has no limit
+LOAN_SIMULATION = {
+    'PATHS_PER_SHARD': 2000,
+    'OFFER_CHUNK_SIZE': 256,
+    'MAX_PATHS': 100000,
+    'MAX_REQUEST_STEPS': 200000000,
+}
@@ -0,0 +1,90 @@
+"""
+Production settings for assessment_project project.
+
+Use with DJANGO_SETTINGS_MODULE=assessment_project.settings_production.
+The database is chosen with environment variables, so switching from SQLite to PostgreSQL
+is a configuration change:
+
+    DJANGO_DB_ENGINE=sqlite (default) | postgresql
+    DJANGO_DB_NAME, DJANGO_DB_USER, DJANGO_DB_PASSWORD, DJANGO_DB_HOST, DJANGO_DB_PORT
+    DJANGO_DB_CONN_MAX_AGE (seconds a connection is kept open, default 600)
+    DJANGO_REDIS_URL (redis server of the customer detail cache, a database table otherwise)
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, CACHES, SECRET_KEY
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+DEBUG = False
+
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+
+
+# Database
+# https://docs.djangoproject.com/en/5.0/ref/databases/
+
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+# persistent connections, reused across requests by each worker
+DB_CONN_MAX_AGE = int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 600))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'loans'),
+            'USER': os.environ.get('DJANGO_DB_USER', ''),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            # point HOST/PORT at PgBouncer to pool connections across workers
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # server-side cursors don't survive PgBouncer's transaction pooling
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DJANGO_DB_PGBOUNCER', '') == '1',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # seconds a writer waits for the lock instead of failing with "database is locked"
+                'timeout': 20,
+            },
+        }
+    }
+
+    # WAL lets readers run concurrently with the single writer, NORMAL only fsyncs at checkpoints in WAL mode
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# the customer detail cache must be shared by every worker of every server (see LOAN_CUSTOMER_DETAIL_CACHE):
+# redis when configured (needs the redis package), else a table of the database ("manage.py createcachetable")
+if os.environ.get('DJANGO_REDIS_URL'):
+    CUSTOMER_DETAIL_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['DJANGO_REDIS_URL'],
+        'KEY_PREFIX': 'loan',
+    }
+else:
+    CUSTOMER_DETAIL_CACHE = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'loan_customer_detail_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+CACHES = {**CACHES, 'customer-detail': CUSTOMER_DETAIL_CACHE}
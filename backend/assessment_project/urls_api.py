@@ -0,0 +1,8 @@
+from django.urls import path, include
+from loan.views import metrics
+
+urlpatterns = [
+    path('metrics', metrics, name='metrics'),
+    path('api/v1/async/', include('loan.async_urls')),
+    path('api/v1/', include('loan.urls')),
+]
@@ -0,0 +1,177 @@
+"""
+Locust-style load test of a running loan API (``manage.py runserver``, gunicorn, uvicorn, ...).
+
+Simulated users pick weighted tasks in a loop for a fixed duration, then requests/sec and latency
+percentiles are printed per task. Only the standard library is used, so it runs anywhere:
+
+    python benchmarks/loadtest.py --host http://127.0.0.1:8000 --users 20 --duration 30
+
+``--profile reads`` sends only the calculator and read requests that have native async versions, and
+``--profile async-reads`` sends the same requests to those versions under /api/v1/async/, to compare a WSGI
+and an ASGI server on the same load.
+
+The target database gets customers and loan offers created by the write tasks,
+so point it at a scratch database. Exits with status 1 when more than --max-error-rate of requests fail.
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+API = '/api/v1'
+ASYNC_API = '/api/v1/async'
+
+# the requests that have an async version, with their weights in the mixed profile
+READ_TASKS = {'calculate': 10, 'calculate_batch': 1, 'customer_detail': 5, 'list_offers': 3}
+
+# --profile: (API prefix, task method -> weight)
+PROFILES = {
+    'mixed': (API, {**READ_TASKS, 'calculator_schedule': 2, 'create_offer': 2, 'create_customer': 1}),
+    'reads': (API, READ_TASKS),
+    'async-reads': (ASYNC_API, READ_TASKS),
+}
+
+
+class LoanApiUser:
+    """
+    One simulated user, picking the tasks of its profile by weight.
+    """
+    unique = itertools.count()
+
+    def __init__(self, host, stats, customer_id, profile='mixed'):
+        self.host = host.rstrip('/')
+        self.stats = stats
+        self.customer_id = customer_id
+        self.api, tasks = PROFILES[profile]
+        self.names = list(tasks)
+        self.weights = list(tasks.values())
+
+    def request(self, name, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        if self.api != API:
+            # report the async routes under their own names
+            name = name.replace(' /', f' {self.api[len(API):]}/', 1)
+        request = urllib.request.Request(f'{self.host}{self.api}{path}', data=body, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            failed = False
+        except (urllib.error.URLError, OSError):
+            failed = True
+        self.stats.record(name, time.perf_counter() - started, failed)
+
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            getattr(self, random.choices(self.names, self.weights)[0])()
+
+    def calculate(self):
+        self.request('POST /loan-calculator', 'POST', '/loan-calculator', {
+            'loan_amount': random.randint(1000, 500000),
+            'interest_rate': random.choice([0, 2.5, 3.75, 5.5, 7.25]),
+            'loan_term': random.choice([12, 24, 36, 60, 120, 360]),
+        })
+
+    def calculate_batch(self):
+        scenarios = [
+            {'loan_amount': random.randint(1000, 500000), 'interest_rate': random.uniform(0, 10), 'loan_term': random.randint(1, 360)}
+            for _ in range(1000)
+        ]
+        self.request('POST /loan-calculator/batch', 'POST', '/loan-calculator/batch', {'scenarios': scenarios})
+
+    def calculator_schedule(self):
+        self.request('GET /loan-calculator/schedule', 'GET',
+                     '/loan-calculator/schedule?loan_amount=250000&interest_rate=3.75&loan_term=360')
+
+    def customer_detail(self):
+        self.request('GET /customers/<id>', 'GET', f'/customers/{self.customer_id}?expand=offers')
+
+    def list_offers(self):
+        self.request('GET /loanoffers', 'GET', f'/loanoffers?customer={self.customer_id}')
+
+    def create_offer(self):
+        self.request('POST /loanoffers', 'POST', '/loanoffers', {
+            'customer': self.customer_id,
+            'loan_amount': random.randint(1000, 500000),
+            'interest_rate': 5.5,
+            'loan_term': 36,
+        })
+
+    def create_customer(self):
+        number = next(self.unique)
+        self.request('POST /customers', 'POST', '/customers', {
+            'first_name': 'Load', 'last_name': 'Test', 'email': f'load-{time.time_ns()}-{number}@example.com',
+        })
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    def record(self, name, seconds, failed):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            if failed:
+                self.failures[name] += 1
+
+    def report(self, elapsed):
+        print(f'{"task":<32} {"requests":>9} {"fails":>6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+        rows = sorted(self.latencies.items())
+        rows.append(('total', [seconds for _, latencies in rows for seconds in latencies]))
+        for name, latencies in rows:
+            failures = sum(self.failures.values()) if name == 'total' else self.failures[name]
+            percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            print(f'{name:<32} {len(latencies):>9} {failures:>6} {len(latencies) / elapsed:>8.1f} '
+                  f'{percentiles[49] * 1000:>8.1f} {percentiles[94] * 1000:>8.1f} {percentiles[98] * 1000:>8.1f}')
+
+
+def create_customer(host):
+    # the customer whose detail and offers the read tasks hit
+    request = urllib.request.Request(
+        f'{host.rstrip("/")}{API}/customers', method='POST', headers={'Content-Type': 'application/json'},
+        data=json.dumps({'first_name': 'Load', 'last_name': 'Test', 'email': f'load-{time.time_ns()}@example.com'}).encode(),
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.load(response)['id']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='http://127.0.0.1:8000', help='Base URL of the running server.')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent simulated users.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run.')
+    parser.add_argument('--profile', choices=list(PROFILES), default='mixed',
+                        help='Request mix: every kind of request, or only the reads with an async version, '
+                             'sent to the sync or the async routes.')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Allowed fraction of failed requests.')
+    options = parser.parse_args(argv)
+
+    customer_id = create_customer(options.host)
+    stats = Stats()
+    deadline = time.monotonic() + options.duration
+    users = [threading.Thread(target=LoanApiUser(options.host, stats, customer_id, options.profile).run, args=(deadline,))
+             for _ in range(options.users)]
+    started = time.monotonic()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+
+    stats.report(time.monotonic() - started)
+    requests = sum(len(latencies) for latencies in stats.latencies.values())
+    failures = sum(stats.failures.values())
+    return 1 if not requests or failures / requests > options.max_error_rate else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class LoanConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'loan'
+
+    def ready(self):
+        # connect signal receivers, including the one installing the query recorder of MetricsMiddleware on every
+        # database connection
+        from . import middleware, signals  # noqa: F401
+        from .cache import check_customer_detail_cache
+
+        check_customer_detail_cache()
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('customers/<int:pk>', async_views.customer_detail, name='async-customer-detail'),
+    path('loanoffers', async_views.loan_offer_list, name='async-loanoffer-list'),
+    path('loan-calculator', async_views.loan_calculator, name='async-loan-calculator'),
+    path('loan-calculator/batch', async_views.loan_calculator_batch, name='async-loan-calculator-batch'),
+]
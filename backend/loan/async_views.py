@@ -0,0 +1,120 @@
+"""
+Native ``async def`` versions of the calculator and read endpoints, for serving under ASGI (e.g. uvicorn).
+Under WSGI they still work, Django runs them in an event loop per request.
+
+DRF views are sync only, so these are plain Django views that reuse the validation, serializers,
+caches and filters of ``loan.views`` and ``loan.validation``.
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import serializers
+from .cache import acached_monthly_payment, customer_detail_cache, customer_detail_cache_key, customer_detail_entry
+from .filters import filter_by_query_params
+from .models import Customer, LoanOffer
+from .serializers import CustomerSerializer, LoanOfferSerializer
+from .validation import PAYMENT_OVERFLOW_ERRORS, parse_calculator_input, rounded_payment
+from .views import LoanOfferListCreateView, calculate_batch, conditional_response
+
+
+def parse_json_body(request):
+    # returns (data, error response)
+    try:
+        return json.loads(request.body or b'null'), None
+    except ValueError as exc:
+        return None, JsonResponse({'detail': f'JSON parse error - {exc}'}, status=400)
+
+
+@csrf_exempt
+@require_POST
+async def loan_calculator(request):
+    """
+    Async version of ``POST /api/v1/loan-calculator``, same payload, responses and payment cache.
+    A single payment is a few floating point operations, so it's computed inline on the event loop.
+    """
+    data, error_response = parse_json_body(request)
+    if error_response:
+        return error_response
+
+    values, errors = parse_calculator_input(data)
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    payment = rounded_payment(await acached_monthly_payment(*values))
+    if payment is None:
+        return JsonResponse(PAYMENT_OVERFLOW_ERRORS, status=400)
+    return JsonResponse({'monthly_payment': payment}, status=200)
+
+
+@csrf_exempt
+@require_POST
+async def loan_calculator_batch(request):
+    """
+    Async version of ``POST /api/v1/loan-calculator/batch``.
+    Validating and pricing thousands of scenarios is CPU-bound, so it runs in a worker thread
+    (NumPy releases the GIL for the array pass) and the event loop keeps serving other requests.
+    """
+    data, error_response = parse_json_body(request)
+    if error_response:
+        return error_response
+
+    body, status_code = await sync_to_async(calculate_batch, thread_sensitive=False)(data)
+    return JsonResponse(body, status=status_code)
+
+
+@require_GET
+async def customer_detail(request, pk):
+    """
+    Async version of ``GET /api/v1/customers/<id>`` (including ``?expand=offers``), sharing its cache
+    and conditional GET handling.
+    """
+    expand = 'offers' in request.GET.get('expand', '').split(',')
+    cache = customer_detail_cache()
+    key = customer_detail_cache_key(pk, expand)
+    entry = await cache.aget(key) if cache is not None else None
+    if entry is None:
+        try:
+            customer = await Customer.objects.aget(pk=pk)
+        except Customer.DoesNotExist:
+            raise Http404('No Customer matches the given query.')
+        data = dict(CustomerSerializer(customer).data)
+        if expand:
+            offers = [offer async for offer in LoanOffer.objects.filter(customer_id=pk).order_by('id')]
+            data['offers'] = LoanOfferSerializer(offers, many=True).data
+        entry = customer_detail_entry(data, None if expand else customer.updated_at.timestamp())
+        if cache is not None:
+            await cache.aset(key, entry, settings.LOAN_CUSTOMER_DETAIL_CACHE['TIMEOUT'])
+    return conditional_response(request, JsonResponse(entry['data']), entry['etag'], entry['last_modified'])
+
+
+@require_GET
+async def loan_offer_list(request):
+    """
+    Async version of ``GET /api/v1/loanoffers`` with the same filters.
+    Keyset paginated on id with ``?after=<last id>&page_size=<n>``, ``next`` links to the following page.
+    """
+    try:
+        page_size = min(int(request.GET.get('page_size', 50)), 500)
+        after = int(request.GET.get('after', 0))
+        if page_size <= 0:
+            raise ValueError
+        offers = filter_by_query_params(LoanOffer.objects.all(), request.GET, LoanOfferListCreateView.query_filters)
+    except ValueError:
+        return JsonResponse({'detail': 'after and page_size must be positive integers.'}, status=400)
+    except serializers.ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+
+    # fetch one extra row to know whether there is a next page
+    page = [offer async for offer in offers.filter(id__gt=after).order_by('id')[:page_size + 1]]
+    next_url = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        params = request.GET.copy()
+        params['after'] = page[-1].id
+        next_url = request.build_absolute_uri(f"{reverse('async-loanoffer-list')}?{params.urlencode()}")
+
+    return JsonResponse({'next': next_url, 'results': LoanOfferSerializer(page, many=True).data})
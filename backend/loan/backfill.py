@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import PAYMENT_FIELDS, storable_payment
+from .portfolio import apply_summary_deltas, merge_deltas, offer_deltas
+
+
+def backfill_offer_payments(offer_model, batch_size=1000, recompute=False, progress=None, adjust_summary=False):
+    """
+    Fill the stored payment columns of loan offers in batches of ``batch_size``, walking the table by primary key.
+    Only offers without a monthly payment are touched unless ``recompute`` is set. Offers whose payment is too large
+    for the columns (accepted before the loan term was bounded) are left without one.
+    Takes the model as an argument so data migrations can pass their historical model. With ``adjust_summary`` the
+    portfolio summary rows follow the changed ``total_interest`` in the transaction of each batch (migrations
+    older than the summary table leave it out).
+    Returns the number of offers updated.
+    """
+    queryset = offer_model.objects.order_by('pk').only('pk', 'loan_amount', 'interest_rate', 'loan_term', 'total_interest')
+    if not recompute:
+        queryset = queryset.filter(monthly_payment__isnull=True)
+
+    # bulk_update() doesn't touch auto_now fields, bump updated_at so HTTP caches see the change
+    # (historical models of migrations older than the field don't have it)
+    fields = [*PAYMENT_FIELDS, *(field.name for field in offer_model._meta.concrete_fields if field.name == 'updated_at')]
+
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return updated
+        previous = [
+            {field: getattr(offer, field) for field in ('loan_amount', 'interest_rate', 'loan_term', 'total_interest')}
+            for offer in batch
+        ]
+        for offer in batch:
+            result = storable_payment(offer_model, offer.loan_amount, offer.interest_rate, offer.loan_term)
+            for field in PAYMENT_FIELDS:
+                setattr(offer, field, getattr(result, field) if result else None)
+            offer.updated_at = timezone.now()
+        with transaction.atomic():
+            offer_model.objects.bulk_update(batch, fields)
+            if adjust_summary:
+                # bulk_update doesn't send model signals, swap the old interest of the offers for the new one
+                apply_summary_deltas(merge_deltas(offer_deltas(batch), offer_deltas(previous, sign=-1)))
+        updated += len(batch)
+        last_pk = batch[-1].pk
+        if progress:
+            progress(updated)
@@ -0,0 +1,278 @@
+"""
+Benchmark cases run by ``python manage.py benchmark``.
+
+Micro-benchmarks time the amortization math directly, request-level benchmarks go through Django's test client
+(full URL resolution, middleware, DRF and serialization) against a seeded test database.
+Every case returns the time of one operation in seconds.
+"""
+import itertools
+import json
+import os
+import statistics
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from .calculator import amortization_schedule, calculate_exact, monthly_payment, monthly_payments, solve_interest_rates
+from .simulation import simulate
+from .throttling import take_token
+
+# size of the micro-benchmark inputs and of the bulk/batch request payloads
+MICRO_SIZE = 1000
+BATCH_SIZE = 1000
+BULK_SIZE = 100
+# customers, and offers of each, of the fixed book the book-wide read cases (exports, portfolio) run against
+BOOK_CUSTOMERS = 1000
+BOOK_OFFERS_PER_CUSTOMER = 5
+
+
+def time_per_operation(operation, number, repeat):
+    """
+    timeit style: run ``operation`` ``number`` times, ``repeat`` times over, and return the fastest
+    average time per call. The minimum is the least noisy estimate of the cost of the code itself.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        timings.append((time.perf_counter() - started) / number)
+    return min(timings), statistics.median(timings)
+
+
+# a 30 year loan with monthly payment resets under 10000 mean-reverting rate paths
+SIMULATION_OPTIONS = {
+    'model': 'vasicek', 'volatility': 1.0, 'initial_rate': 4.0, 'mean_rate': 5.0, 'reversion': 0.2,
+    'paths': 10000, 'seed': 1, 'reset_months': 1, 'percentiles': [5, 50, 95, 99],
+}
+
+
+def micro_benchmarks():
+    """
+    ``{name: operation}`` of the amortization math, scalar vs vectorized vs Decimal over the same scenarios.
+    """
+    amounts = [1000 + index * 37.5 for index in range(MICRO_SIZE)]
+    rates = [(index % 20) * 0.5 for index in range(MICRO_SIZE)]
+    terms = [12 + index % 349 for index in range(MICRO_SIZE)]
+    scenarios = list(zip(amounts, rates, terms))
+    payments = monthly_payments(amounts, rates, terms)
+    decimal_scenarios = [(Decimal(str(amount)), Decimal(str(rate)), term) for amount, rate, term in scenarios]
+    throttle_cache = caches[settings.LOAN_THROTTLING['CACHE_ALIAS']]
+
+    return {
+        f'calculator.scalar[{MICRO_SIZE}]': lambda: [monthly_payment(*scenario) for scenario in scenarios],
+        f'calculator.vectorized[{MICRO_SIZE}]': lambda: monthly_payments(amounts, rates, terms),
+        f'calculator.decimal[{MICRO_SIZE}]': lambda: [calculate_exact(*scenario) for scenario in decimal_scenarios],
+        f'calculator.solve-rate[{MICRO_SIZE}]': lambda: solve_interest_rates(amounts, terms, payments),
+        'calculator.schedule[360]': lambda: amortization_schedule(250000.0, 3.75, 360),
+        'simulation.vasicek[10000x360]': lambda: simulate([(250000.0, 3.75, 360)], SIMULATION_OPTIONS),
+        'throttle.take-token': lambda: take_token(throttle_cache, 'throttle:benchmark', 10 ** 9, 10 ** 9),
+    }
+
+
+def unlimited_throttling():
+    # LOAN_THROTTLING with buckets no benchmark can empty, the repeated requests would be rate limited otherwise
+    config = settings.LOAN_THROTTLING
+    return {**config, 'SCOPES': {
+        name: {**scope, 'CAPACITY': 10 ** 9, 'RATE': 10 ** 9} for name, scope in config['SCOPES'].items()
+    }}
+
+
+def seed_data():
+    # a customer with a handful of offers for the read endpoints, and one that receives the offers the write
+    # endpoints create, so the read benchmarks don't slow down as the writes pile up
+    from .models import Customer, LoanOffer
+
+    customer = Customer.objects.create(first_name='Bench', last_name='Mark', email='benchmark@example.com')
+    offers = [
+        LoanOffer.objects.create(customer=customer, loan_amount=10000 + index * 1000, interest_rate=5.5, loan_term=24 + index * 12)
+        for index in range(10)
+    ]
+    writer = Customer.objects.create(first_name='Bench', last_name='Writer', email='benchmark-writer@example.com')
+    return customer, offers, writer
+
+
+def seed_book():
+    """
+    Add the fixed book of the book-wide read cases and return a function that deletes whatever was written after
+    it, so those cases measure the same rows whatever ran before them (or was left out with ``-k``).
+    """
+    from .models import Customer, LoanOffer, PortfolioSummary
+    from .portfolio import rebuild_portfolio_summary
+
+    customers = Customer.objects.bulk_create([
+        Customer(first_name='Book', last_name=f'Customer {index}', email=f'book{index}@example.org')
+        for index in range(BOOK_CUSTOMERS)
+    ])
+    offers = [
+        LoanOffer(customer=customer, loan_amount=5000 + index * 2500, interest_rate=2 + index * 0.75, loan_term=12 + index * 60)
+        for customer in customers for index in range(BOOK_OFFERS_PER_CUSTOMER)
+    ]
+    for offer in offers:
+        offer.compute_payments()
+    LoanOffer.objects.bulk_create(offers)
+    rebuild_portfolio_summary(LoanOffer, PortfolioSummary)
+    last_customer = Customer.objects.order_by('-pk').values_list('pk', flat=True)[0]
+    last_offer = LoanOffer.objects.order_by('-pk').values_list('pk', flat=True)[0]
+
+    def reset():
+        LoanOffer.objects.filter(pk__gt=last_offer)._raw_delete(LoanOffer.objects.db)
+        Customer.objects.filter(pk__gt=last_customer).delete()
+        rebuild_portfolio_summary(LoanOffer, PortfolioSummary)
+    return reset
+
+
+def request_benchmarks(client=None):
+    """
+    ``{name: (url name, operation)}`` covering every endpoint of ``loan.urls`` and ``loan.async_urls``.
+    Each operation sends one request and fails loudly on a non-2xx response. The ``async.*`` cases go through
+    Django's ASGI handler, so they compare with their sync counterparts on the cost of the async stack.
+    """
+    from .jobs import run_job
+    from .models import Job
+
+    client = client or Client()
+    async_client = AsyncClient()
+    customer, offers, writer = seed_data()
+    reset_book = seed_book()
+    # a finished export whose status and result file are read back
+    job = Job.objects.create(kind=Job.Kind.EXPORT_OFFER_SCHEDULES, params={'customer': customer.id, 'format': 'csv'})
+    run_job(job)
+    unique = itertools.count()
+
+    def request(method, url, data=None, **extra):
+        def operation():
+            payload = data() if callable(data) else data
+            if method == 'get':
+                response = client.get(url, payload, **extra)
+            else:
+                response = getattr(client, method)(url, payload, content_type='application/json', **extra)
+            if response.status_code >= 300:
+                raise AssertionError(f'{method.upper()} {url} returned {response.status_code}')
+            if response.streaming:
+                # a streaming response only does its work while it's consumed
+                b''.join(response.streaming_content)
+        return operation
+
+    def async_request(method, url, data=None):
+        async def send():
+            if method == 'get':
+                return await async_client.get(url, data)
+            return await async_client.post(url, data, content_type='application/json')
+
+        def operation():
+            response = async_to_sync(send)()
+            if response.status_code >= 300:
+                raise AssertionError(f'{method.upper()} {url} returned {response.status_code}')
+        return operation
+
+    def book_read(operation):
+        # the first (warm-up) call drops the rows of the write cases, the book stays the same while it's timed
+        reset = [reset_book]
+
+        def on_book():
+            if reset:
+                reset.pop()()
+            operation()
+        return on_book
+
+    def new_customer():
+        number = next(unique)
+        return {'first_name': 'Bench', 'last_name': 'Mark', 'email': f'bench{number}@example.com'}
+
+    offer = {'customer': writer.id, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+    calculation = {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+    scenarios = {'scenarios': [
+        {'loan_amount': 1000 + index, 'interest_rate': index % 20 * 0.5, 'loan_term': 12 + index % 349}
+        for index in range(BATCH_SIZE)
+    ]}
+
+    return {
+        'customers.list': ('customer-create', request('get', reverse('customer-create'))),
+        'customers.create': ('customer-create', request('post', reverse('customer-create'), new_customer)),
+        f'customers.bulk[{BULK_SIZE}]': ('customer-bulk-create', request(
+            'post', reverse('customer-bulk-create'), lambda: [new_customer() for _ in range(BULK_SIZE)])),
+        f'customers.upsert[{BULK_SIZE}]': ('customer-bulk-create', request(
+            'put', reverse('customer-bulk-create'), [
+                {'first_name': 'Bench', 'last_name': f'Upsert {index}', 'email': f'upsert{index}@example.com'}
+                for index in range(BULK_SIZE)
+            ])),
+        'customers.detail': ('customer-detail', request('get', reverse('customer-detail', args=[customer.id]))),
+        'customers.detail.expanded': ('customer-detail', request(
+            'get', reverse('customer-detail', args=[customer.id]), {'expand': 'offers'})),
+        'customers.search': ('customer-search', request(
+            'get', reverse('customer-search'), {'q': customer.email.split('.')[0]})),
+        'loanoffers.list': ('loanoffer-create', request('get', reverse('loanoffer-create'))),
+        'loanoffers.create': ('loanoffer-create', request('post', reverse('loanoffer-create'), offer)),
+        f'loanoffers.bulk[{BULK_SIZE}]': ('loanoffer-bulk-create', request(
+            'post', reverse('loanoffer-bulk-create'), [offer] * BULK_SIZE)),
+        'loanoffers.schedules': ('loanoffer-schedules', request(
+            'get', reverse('loanoffer-schedules'), {'customer': customer.id})),
+        'loanoffers.schedule': ('loanoffer-schedule', request('get', reverse('loanoffer-schedule', args=[offers[-1].id]))),
+        'loanoffers.simulate[10000]': ('loanoffer-simulate', request(
+            'post', reverse('loanoffer-simulate'), {'offer': offers[-1].id, 'paths': 10000, 'seed': 1})),
+        'portfolio': ('portfolio', book_read(request('get', reverse('portfolio')))),
+        'portfolio.live': ('portfolio', book_read(request('get', reverse('portfolio'), {'source': 'live'}))),
+        'portfolio.customers': ('portfolio-customers', book_read(request('get', reverse('portfolio-customers')))),
+        'exports.customers': ('export-customers', book_read(request('get', reverse('export-customers')))),
+        'exports.loanoffers': ('export-loanoffers', book_read(request('get', reverse('export-loanoffers'), {'payments': 'true'}))),
+        'jobs.create': ('job-create', request('post', reverse('job-create'), {'kind': 'price_scenarios', 'params': {
+            'loan_amounts': [10000, 20000], 'interest_rates': [2.5, 5], 'loan_terms': [12, 24]}})),
+        'jobs.detail': ('job-detail', request('get', reverse('job-detail', args=[job.id]))),
+        'jobs.result': ('job-result', request('get', reverse('job-result', args=[job.id]))),
+        'loan-calculator': ('loan-calculator', request('post', reverse('loan-calculator'), calculation)),
+        'loan-calculator.fast': ('loan-calculator-fast', request('post', reverse('loan-calculator-fast'), calculation)),
+        f'loan-calculator.batch[{BATCH_SIZE}]': ('loan-calculator-batch', request(
+            'post', reverse('loan-calculator-batch'), scenarios)),
+        'loan-calculator.solve-rate': ('loan-calculator-solve', request(
+            'post', reverse('loan-calculator-solve'), {'loan_amount': 10000.00, 'loan_term': 24, 'monthly_payment': 440.96})),
+        'loan-calculator.grid[40x30]': ('loan-calculator-grid', request('post', reverse('loan-calculator-grid'), {
+            'loan_amount': 250000, 'interest_rates': {'start': 0.25, 'stop': 10, 'step': 0.25},
+            'loan_terms': {'start': 12, 'stop': 360, 'step': 12}})),
+        'loan-calculator.cache-stats': ('loan-calculator-cache-stats', request('get', reverse('loan-calculator-cache-stats'))),
+        'loan-calculator.schedule[360]': ('loan-calculator-schedule', request(
+            'get', reverse('loan-calculator-schedule'), {'loan_amount': 250000, 'interest_rate': 3.75, 'loan_term': 360})),
+        'async.customers.detail.expanded': ('async-customer-detail', async_request(
+            'get', reverse('async-customer-detail', args=[customer.id]), {'expand': 'offers'})),
+        'async.loanoffers.list': ('async-loanoffer-list', async_request('get', reverse('async-loanoffer-list'))),
+        'async.loan-calculator': ('async-loan-calculator', async_request('post', reverse('async-loan-calculator'), calculation)),
+        f'async.loan-calculator.batch[{BATCH_SIZE}]': ('async-loan-calculator-batch', async_request(
+            'post', reverse('async-loan-calculator-batch'), scenarios)),
+    }
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Return ``{name: ratio}`` of the cases that got slower than ``baseline`` by more than ``threshold``
+    (0.25 = 25% slower). Cases missing from the baseline are ignored.
+    """
+    regressions = {}
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference and seconds / reference > 1 + threshold:
+            regressions[name] = seconds / reference
+    return regressions
+
+
+def load_baseline(path):
+    # ``{name: seconds}`` of the baseline file, empty when there is none yet
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def save_baseline(path, results):
+    """
+    Store ``results`` in the baseline file. Cases that weren't measured (a filtered run, or the startup
+    measurements of the other command) keep their stored value.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {**load_baseline(path), **results}
+    with open(path, 'w') as file:
+        json.dump({'unit': 'seconds per operation', 'results': baseline}, file, indent=2, sort_keys=True)
+        file.write('\n')
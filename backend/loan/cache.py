@@ -0,0 +1,183 @@
+import hashlib
+import json
+import threading
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import quote_etag
+from django.utils.module_loading import import_string
+from .calculator import monthly_payment
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss/eviction counters of a cache.
+    ``evictions`` stays ``None`` for backends that can't report them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            # keep reporting evictions once a backend has started counting them
+            self.evictions = None if getattr(self, 'evictions', None) is None else 0
+
+    def record(self, counter, count=1):
+        with self._lock:
+            setattr(self, counter, (getattr(self, counter) or 0) + count)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def cache_stats(name):
+    """
+    Return the process-wide ``CacheStats`` registered under ``name``.
+    """
+    with _stats_lock:
+        return _stats.setdefault(name, CacheStats())
+
+
+class CountingLocMemCache(LocMemCache):
+    """
+    Local memory cache that counts the entries it culls once ``MAX_ENTRIES`` is reached.
+    Counters are shared by every instance with the same ``LOCATION``.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.stats = cache_stats(name)
+        self.stats.record('evictions', 0)
+
+    def _cull(self):
+        size = len(self._cache)
+        super()._cull()
+        self.stats.record('evictions', size - len(self._cache))
+
+
+def payment_cache():
+    """
+    Return ``(cache, stats)`` of the configured payment cache.
+    """
+    alias = settings.LOAN_CALCULATOR_CACHE['ALIAS']
+    cache = caches[alias]
+    return cache, getattr(cache, 'stats', None) or cache_stats(alias)
+
+
+def payment_cache_key(loan_amount, interest_rate, loan_term):
+    # normalize through Decimal so 10000, 10000.0 and "10000.00" share the same entry
+    amount = Decimal(str(loan_amount)).normalize()
+    rate = Decimal(str(interest_rate)).normalize()
+    return f'loan-calculator:payment:{amount}:{rate}:{int(loan_term)}'
+
+
+def cached_monthly_payment(loan_amount, interest_rate, loan_term):
+    """
+    ``monthly_payment`` behind the payment cache.
+    The cache is skipped entirely when ``LOAN_CALCULATOR_CACHE['ENABLED']`` is false.
+    """
+    if not settings.LOAN_CALCULATOR_CACHE['ENABLED']:
+        return monthly_payment(loan_amount, interest_rate, loan_term)
+
+    cache, stats = payment_cache()
+    key = payment_cache_key(loan_amount, interest_rate, loan_term)
+    payment = cache.get(key)
+    if payment is not None:
+        stats.record('hits')
+        return payment
+
+    stats.record('misses')
+    payment = monthly_payment(loan_amount, interest_rate, loan_term)
+    cache.set(key, payment)
+    return payment
+
+
+async def acached_monthly_payment(loan_amount, interest_rate, loan_term):
+    """
+    Async ``cached_monthly_payment`` for async views, using the cache's async API.
+    """
+    if not settings.LOAN_CALCULATOR_CACHE['ENABLED']:
+        return monthly_payment(loan_amount, interest_rate, loan_term)
+
+    cache, stats = payment_cache()
+    key = payment_cache_key(loan_amount, interest_rate, loan_term)
+    payment = await cache.aget(key)
+    if payment is not None:
+        stats.record('hits')
+        return payment
+
+    stats.record('misses')
+    payment = monthly_payment(loan_amount, interest_rate, loan_term)
+    await cache.aset(key, payment)
+    return payment
+
+
+def customer_detail_cache_key(pk, expand):
+    return f'customer-detail:{pk}:{"offers" if expand else "plain"}'
+
+
+def customer_detail_cache():
+    # None when the customer detail cache is disabled
+    config = settings.LOAN_CUSTOMER_DETAIL_CACHE
+    return caches[config['ALIAS']] if config['ENABLED'] else None
+
+
+def check_customer_detail_cache():
+    """
+    Refuse a process-local backend for the customer detail cache: a write only invalidates the copy of the
+    process it ran in, so other workers would keep serving the old payload until it expires.
+    """
+    config = settings.LOAN_CUSTOMER_DETAIL_CACHE
+    if config['ENABLED'] and issubclass(import_string(settings.CACHES[config['ALIAS']]['BACKEND']), LocMemCache):
+        raise ImproperlyConfigured(
+            f'LOAN_CUSTOMER_DETAIL_CACHE needs a cache shared by all the workers, the "{config["ALIAS"]}" cache '
+            'is local to each process. Use a database, redis or memcached cache, or set ENABLED to False.'
+        )
+
+
+def payload_etag(data):
+    # strong ETag of a JSON payload, stable across key order
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return quote_etag(hashlib.md5(payload, usedforsecurity=False).hexdigest())
+
+
+def customer_detail_entry(data, last_modified=None):
+    """
+    Cache entry of a customer detail payload together with its HTTP validators,
+    so conditional GETs are answered from the cache without touching the database.
+    ``last_modified`` is a timestamp.
+    """
+    return {'data': data, 'etag': payload_etag(data), 'last_modified': last_modified}
+
+
+def invalidate_customer_details(customer_ids):
+    """
+    Drop the cached detail payloads (plain and expanded) of the given customers.
+    Called from model signals, and by bulk writers that bypass them.
+    The keys are deleted right away and again once the current transaction commits,
+    in case a concurrent request cached the old state in between.
+    """
+    cache = customer_detail_cache()
+    keys = [customer_detail_cache_key(pk, expand) for pk in set(customer_ids) for expand in (False, True)]
+    if cache is not None and keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,244 @@
+import math
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
+
+# NumPy is imported inside the vectorized functions, so processes that only use the scalar paths
+# don't pay for it at startup
+
+# defaults of the exact (Decimal) path
+DECIMAL_PLACES = 2
+DECIMAL_PRECISION = 28
+
+
+class PaymentResult:
+    """
+    Monthly payment and totals of a loan, as floats (fast path) or Decimals (exact path).
+    """
+    __slots__ = ('monthly_payment', 'total_payable', 'total_interest')
+
+    def __init__(self, monthly_payment, total_payable, total_interest):
+        self.monthly_payment = monthly_payment
+        self.total_payable = total_payable
+        self.total_interest = total_interest
+
+    def __repr__(self):
+        return (f'PaymentResult(monthly_payment={self.monthly_payment!r}, '
+                f'total_payable={self.total_payable!r}, total_interest={self.total_interest!r})')
+
+    def __eq__(self, other):
+        if not isinstance(other, PaymentResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def monthly_payment(loan_amount, interest_rate, loan_term):
+    """
+    Calculate the monthly payment for a single loan using the standard loan amortization formula.
+    The interest rate is the annual rate in percent and the loan term is in months.
+    """
+    # Convert annual interest rate to a monthly rate
+    monthly_rate = interest_rate / 100 / 12
+    if monthly_rate == 0:  # handle the case of zero interest rate
+        return loan_amount / loan_term
+
+    try:
+        growth = math.pow(1 + monthly_rate, loan_term)
+    except OverflowError:
+        # like monthly_payments, a payment beyond the float range is non-finite rather than an exception
+        return math.inf
+    return loan_amount * (monthly_rate * growth) / (growth - 1)
+
+
+def calculate(loan_amount, interest_rate, loan_term):
+    """
+    Fast float path: monthly payment and totals of a loan, unrounded.
+    """
+    payment = monthly_payment(loan_amount, interest_rate, loan_term)
+    total_payable = payment * loan_term
+    return PaymentResult(payment, total_payable, total_payable - loan_amount)
+
+
+def to_decimal(value):
+    # go through str() so floats keep their shortest repr instead of their binary expansion
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def calculate_exact(loan_amount, interest_rate, loan_term, places=DECIMAL_PLACES, precision=DECIMAL_PRECISION):
+    """
+    Exact path: monthly payment and totals computed with ``decimal.Decimal`` at ``precision`` significant digits.
+    The monthly payment is rounded to ``places`` decimal places with banker's rounding (ROUND_HALF_EVEN)
+    and the totals are derived from the rounded payment, so they match what a borrower actually pays.
+    Accepts Decimals (e.g. ``LoanOffer`` fields) without converting them to float.
+    """
+    quantum = Decimal(1).scaleb(-places)
+    with localcontext() as context:
+        context.prec = precision
+        context.rounding = ROUND_HALF_EVEN
+
+        amount = to_decimal(loan_amount)
+        loan_term = int(loan_term)
+        # Convert annual interest rate to a monthly rate
+        monthly_rate = to_decimal(interest_rate) / 1200
+        if monthly_rate == 0:  # handle the case of zero interest rate
+            payment = amount / loan_term
+        else:
+            growth = (1 + monthly_rate) ** loan_term
+            payment = amount * (monthly_rate * growth) / (growth - 1)
+
+        payment = payment.quantize(quantum)
+        total_payable = (payment * loan_term).quantize(quantum)
+        return PaymentResult(payment, total_payable, (total_payable - amount).quantize(quantum))
+
+
+def monthly_payments(loan_amounts, interest_rates, loan_terms):
+    """
+    Vectorized version of ``monthly_payment``.
+    Takes equally sized sequences (or NumPy arrays) and returns a float64 array of monthly payments,
+    computed in a single pass over the arrays.
+    """
+    import numpy as np
+    amounts = np.asarray(loan_amounts, dtype=np.float64)
+    monthly_rates = np.asarray(interest_rates, dtype=np.float64) / 100 / 12
+    terms = np.asarray(loan_terms, dtype=np.float64)
+
+    zero_rate = monthly_rates == 0
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        growth = np.power(1 + monthly_rates, terms)
+        # zero rate rows take the amount / term branch, give them a harmless denominator
+        denominator = np.where(zero_rate, 1.0, growth - 1)
+        amortized = amounts * (monthly_rates * growth) / denominator
+        return np.where(zero_rate, amounts / terms, amortized)
+
+
+def amortization_schedule(loan_amount, interest_rate, loan_term):
+    """
+    Build the full amortization schedule of a loan.
+    Every period is computed in closed form from the period number, so the whole schedule is a handful
+    of array operations instead of a cumulative Python loop.
+    Returns ``(periods, payments, principals, interests, balances)`` as NumPy arrays of length ``loan_term``.
+    """
+    import numpy as np
+    loan_term = int(loan_term)
+    payment = monthly_payment(loan_amount, interest_rate, loan_term)
+    monthly_rate = interest_rate / 100 / 12
+    periods = np.arange(1, loan_term + 1)
+
+    if monthly_rate == 0:
+        balances = loan_amount - payment * periods
+    else:
+        # balance after k payments: P * (1 + r)^k - M * ((1 + r)^k - 1) / r
+        growth = np.power(1 + monthly_rate, periods)
+        balances = loan_amount * growth - payment * (growth - 1) / monthly_rate
+    # the final payment settles the loan, drop the floating point residue
+    balances[-1] = 0.0
+
+    opening_balances = np.concatenate(([loan_amount], balances[:-1]))
+    interests = opening_balances * monthly_rate
+    principals = payment - interests
+    payments = np.full(loan_term, payment)
+    return periods, payments, principals, interests, balances
+
+
+# columns of the rows of schedule_rows
+SCHEDULE_COLUMNS = ('period', 'payment', 'principal', 'interest', 'balance')
+
+
+def schedule_rows(loan_amount, interest_rate, loan_term, *prefix):
+    """
+    Return the amortization schedule as a list of rounded row tuples, each starting with ``prefix``.
+    """
+    import numpy as np
+    columns = (np.round(column, 2).tolist() for column in amortization_schedule(loan_amount, interest_rate, loan_term))
+    return [prefix + row for row in zip(*columns)]
+
+
+def solve_loan_amounts(payments, interest_rates, loan_terms):
+    """
+    Vectorized inverse of ``monthly_payments`` for the amount: the loan a monthly payment repays
+    at an interest rate over a term, ``A = M * (1 - (1 + r)^-n) / r`` (``M * n`` at a zero rate).
+    """
+    import numpy as np
+    payments = np.asarray(payments, dtype=np.float64)
+    monthly_rates = np.asarray(interest_rates, dtype=np.float64) / 100 / 12
+    terms = np.asarray(loan_terms, dtype=np.float64)
+
+    zero_rate = monthly_rates == 0
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        discounted = payments * (1 - np.power(1 + monthly_rates, -terms)) / np.where(zero_rate, 1.0, monthly_rates)
+        return np.where(zero_rate, payments * terms, discounted)
+
+
+def solve_loan_terms(loan_amounts, interest_rates, payments):
+    """
+    Vectorized inverse of ``monthly_payments`` for the term: the (fractional) number of months a monthly payment
+    takes to repay a loan, ``n = -ln(1 - r * A / M) / ln(1 + r)`` (``A / M`` at a zero rate).
+    NaN where the payment doesn't even cover the first month's interest.
+    """
+    import numpy as np
+    amounts = np.asarray(loan_amounts, dtype=np.float64)
+    monthly_rates = np.asarray(interest_rates, dtype=np.float64) / 100 / 12
+    payments = np.asarray(payments, dtype=np.float64)
+
+    zero_rate = monthly_rates == 0
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        remaining = 1 - monthly_rates * amounts / payments
+        terms = -np.log(np.where(remaining > 0, remaining, np.nan)) / np.log1p(np.where(zero_rate, 1.0, monthly_rates))
+        return np.where(zero_rate, amounts / payments, terms)
+
+
+def solve_interest_rates(loan_amounts, loan_terms, payments, tolerance=1e-10, max_iterations=100):
+    """
+    Vectorized solver of the annual interest rate (in percent) at which a monthly payment repays a loan over a term.
+    There is no closed form, so every row runs a safeguarded Newton iteration at the same time: a Newton step
+    on the payment formula, falling back to bisection of the bracketing interval whenever the step leaves it.
+    The payment grows with the rate, so the monthly rate lies between 0 (``M * n == A``) and ``M / A``
+    (the payment only covers interest). NaN where ``M * n < A``, which would need a negative rate.
+    """
+    import numpy as np
+    amounts, terms, payments = np.broadcast_arrays(
+        np.asarray(loan_amounts, dtype=np.float64),
+        np.asarray(loan_terms, dtype=np.float64),
+        np.asarray(payments, dtype=np.float64),
+    )
+    feasible = payments * terms >= amounts
+    # M * n == A is exactly the zero rate, which the payment formula can't evaluate
+    zero_rate = payments * terms == amounts
+    low = np.zeros(amounts.shape)
+    high = np.where(feasible, payments / amounts, 0.0)
+    rates = (low + high) / 2
+    done = ~feasible | zero_rate
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(max_iterations):
+            # (1 + r)^n - 1 through expm1/log1p, which keeps its precision for small rates
+            growth_minus_one = np.expm1(terms * np.log1p(rates))
+            growth = growth_minus_one + 1
+            # payment at the current rate minus the target payment, and its derivative
+            error = amounts * rates * growth / growth_minus_one - payments
+            derivative = amounts * (growth * growth_minus_one - rates * terms * growth / (1 + rates)) / growth_minus_one ** 2
+
+            done |= np.abs(error) <= tolerance * payments
+            if np.all(done):
+                break
+            # the payment is increasing in the rate, so the sign of the error tells which side the root is on
+            low = np.where(error < 0, rates, low)
+            high = np.where(error > 0, rates, high)
+            newton = rates - error / derivative
+            inside = np.isfinite(newton) & (newton > low) & (newton < high)
+            rates = np.where(done, rates, np.where(inside, newton, (low + high) / 2))
+
+    rates = np.where(zero_rate, 0.0, rates)
+    return np.where(feasible, rates * 1200, np.nan)
+
+
+def payment_grid(loan_amount, interest_rates, loan_terms):
+    """
+    Monthly payments of one loan amount over every interest rate x loan term combination,
+    as a ``len(interest_rates)`` x ``len(loan_terms)`` array computed in a single broadcast pass.
+    """
+    import numpy as np
+    rates = np.asarray(interest_rates, dtype=np.float64)
+    terms = np.asarray(loan_terms, dtype=np.float64)
+    return monthly_payments(loan_amount, rates[:, np.newaxis], terms[np.newaxis, :])
@@ -0,0 +1,142 @@
+"""
+Bulk exports of customers and loan offers, shared by the export endpoints and the ``export_data`` command.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)``, never as model instances, and written one chunk
+at a time, so memory stays flat whatever the table size. CSV is always available. Parquet and Arrow are written
+in columnar batches (one row group / record batch per chunk) and need ``pyarrow``, an optional dependency.
+"""
+import itertools
+from django.conf import settings
+from django.db import models
+from .models import PAYMENT_FIELDS, Customer, LoanOffer
+from .streaming import csv_lines
+
+# export name -> (model, columns, optional computed columns)
+EXPORTS = {
+    'customers': (Customer, ('id', 'first_name', 'last_name', 'email', 'updated_at'), ()),
+    'loanoffers': (
+        LoanOffer,
+        ('id', 'customer_id', 'external_id', 'loan_amount', 'interest_rate', 'loan_term', 'created_at', 'updated_at'),
+        PAYMENT_FIELDS,
+    ),
+}
+# format -> (file extension, content type)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrows', 'application/vnd.apache.arrow.stream'),
+}
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+def export_columns(name, payments=False):
+    _, columns, payment_columns = EXPORTS[name]
+    return columns + payment_columns if payments else columns
+
+
+def row_chunks(queryset, columns, chunk_size=None):
+    """
+    Yield lists of up to ``chunk_size`` row tuples of ``columns``, read in chunks from the database.
+    """
+    chunk_size = chunk_size or settings.LOAN_EXPORT_CHUNK_SIZE
+    rows = queryset.order_by('id').values_list(*columns).iterator(chunk_size=chunk_size)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        yield chunk
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportUnavailable('Parquet and Arrow exports require pyarrow, which is not installed.')
+    return pyarrow
+
+
+def arrow_schema(model, columns):
+    # Arrow types of the model fields behind ``columns``, decimals keep their precision and scale
+    pa = import_pyarrow()
+    fields = []
+    for column in columns:
+        # get_field() also resolves attnames such as customer_id
+        field = model._meta.get_field(column)
+        if isinstance(field, models.DecimalField):
+            arrow_type = pa.decimal128(field.max_digits, field.decimal_places)
+        elif isinstance(field, models.DateTimeField):
+            arrow_type = pa.timestamp('us', tz='UTC')
+        elif isinstance(field, (models.AutoField, models.IntegerField, models.ForeignKey)):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type, nullable=field.null))
+    return pa.schema(fields)
+
+
+class ChunkSink:
+    """
+    Writable file-like object that keeps what is written until ``drain()`` hands it back,
+    so Arrow writers can feed a streaming response.
+    """
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_lines(model, columns, chunks, output_format):
+    """
+    Yield the bytes of a Parquet file (one row group per chunk) or an Arrow IPC stream (one record batch per chunk).
+    """
+    pa = import_pyarrow()
+    schema = arrow_schema(model, columns)
+    sink = ChunkSink()
+    if output_format == 'parquet':
+        writer = pa.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for rows in chunks:
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(zip(*rows), schema)], schema=schema,
+        )
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_stream(name, queryset, output_format, payments=False, chunk_size=None):
+    """
+    Iterable of the text (CSV) or bytes (Parquet, Arrow) of an export.
+    Raises ``ExportUnavailable`` before anything is read when the format's dependency is missing.
+    """
+    model = EXPORTS[name][0]
+    columns = export_columns(name, payments)
+    chunks = row_chunks(queryset, columns, chunk_size)
+    if output_format == 'csv':
+        return csv_lines(columns, chunks)
+    import_pyarrow()
+    return arrow_lines(model, columns, chunks, output_format)
@@ -0,0 +1,48 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+def filter_by_query_params(queryset, params, query_filters):
+    """
+    Filter ``queryset`` with the ``params`` mapping (e.g. ``request.GET``) according to
+    ``query_filters = {parameter: (lookup, field)}``.
+    Each parameter value is validated with its serializer ``field``, invalid values raise a ``ValidationError``
+    with an error per parameter.
+    """
+    lookups = {}
+    errors = {}
+    for parameter, (lookup, field) in query_filters.items():
+        value = params.get(parameter)
+        if value is None:
+            continue
+        try:
+            lookups[lookup] = field.run_validation(value)
+        except serializers.ValidationError as exc:
+            errors[parameter] = exc.detail
+    if errors:
+        raise serializers.ValidationError(errors)
+    return queryset.filter(**lookups)
+
+
+class QueryParameterFilterBackend(BaseFilterBackend):
+    """
+    Filters a queryset with the query parameters declared on the view as
+    ``query_filters = {parameter: (lookup, field)}``, invalid values are rejected with a 400.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_by_query_params(queryset, request.query_params, getattr(view, 'query_filters', {}))
+
+
+def decimal_filter():
+    return serializers.DecimalField(max_digits=None, decimal_places=None)
+
+
+def integer_filter():
+    return serializers.IntegerField()
+
+
+class LowercaseEmailField(serializers.EmailField):
+    # pairs with the ``email__lower`` lookup for case-insensitive, index backed email filters
+    def to_internal_value(self, data):
+        return super().to_internal_value(data).lower()
@@ -0,0 +1,111 @@
+"""
+Group commit of single loan offer creates, enabled by ``LOAN_OFFER_GROUP_COMMIT``.
+
+On SQLite every commit waits for an fsync, so one transaction per ``POST /api/v1/loanoffers`` caps the create
+rate. With group commit the first create that finds no open batch becomes its leader: it waits up to
+``WINDOW_MS`` for the creates of other request threads to join (or until ``MAX_BATCH_SIZE`` have), closes the
+batch and writes it with one ``bulk_create`` in one transaction. The followers block until their row is written.
+
+Requests are validated, and their payment columns computed, in their own thread before they join, so a batch
+only contains offers that can be written. Should the batch still fail to insert (e.g. a duplicate
+``external_id`` written concurrently), its offers are saved one by one and only the conflicting ones get their
+error. Only a failure of the batch transaction itself (e.g. a lost connection) is raised to all of its offers.
+"""
+import threading
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from .cache import invalidate_customer_details
+from .metrics import GROUP_COMMIT_BATCH_SIZE
+from .models import LoanOffer
+from .portfolio import apply_summary_deltas, offer_deltas
+
+
+class PendingOffer:
+    # an offer waiting in a batch, ``done`` is set once it was written or failed with ``error``
+    def __init__(self, offer):
+        self.offer = offer
+        self.error = None
+        self.done = threading.Event()
+
+
+class Batch:
+    def __init__(self):
+        self.pending = []
+        self.full = threading.Event()
+
+
+class GroupCommit:
+    """
+    Collects the offers submitted by concurrent threads of the process into batches written by their leader.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.batch = None
+
+    def submit(self, offer):
+        """
+        Write the unsaved ``offer`` as part of a batch and return it with its id and stored payment columns.
+        Raises the error of its insert.
+        """
+        config = settings.LOAN_OFFER_GROUP_COMMIT
+        # bulk_create skips save(), fill the payment columns here so an offer that can't be stored fails alone
+        offer.compute_payments()
+        pending = PendingOffer(offer)
+        with self.lock:
+            batch = self.batch
+            leader = batch is None
+            if leader:
+                batch = self.batch = Batch()
+            batch.pending.append(pending)
+            if len(batch.pending) >= config['MAX_BATCH_SIZE']:
+                # creates from now on open the next batch
+                self.batch = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(config['WINDOW_MS'] / 1000)
+            with self.lock:
+                if self.batch is batch:
+                    self.batch = None
+            self.write(batch.pending)
+        else:
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return offer
+
+    def write(self, batch):
+        GROUP_COMMIT_BATCH_SIZE.observe(len(batch))
+        offers = [pending.offer for pending in batch]
+        try:
+            # bulk_create skips the model signals, so summary and cache are handled here
+            with transaction.atomic():
+                LoanOffer.objects.bulk_create(offers)
+                apply_summary_deltas(offer_deltas(offers))
+        except IntegrityError:
+            self.write_one_by_one(batch)
+        except Exception as exc:
+            # the shared transaction failed, none of the offers was written
+            for pending in batch:
+                pending.offer.pk = None
+                pending.error = exc
+        else:
+            invalidate_customer_details({offer.customer_id for offer in offers})
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+    def write_one_by_one(self, batch):
+        for pending in batch:
+            pending.offer.pk = None
+            try:
+                with transaction.atomic():
+                    pending.offer.save(force_insert=True)
+            except Exception as exc:
+                pending.offer.pk = None
+                pending.error = exc
+
+
+# shared by the request threads of the process
+offer_group_commit = GroupCommit()
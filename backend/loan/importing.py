@@ -0,0 +1,79 @@
+"""
+Helpers of the ``import_offers`` management command.
+Nothing Django-specific is imported at module level, so process pool workers can import this module
+before ``django.setup()`` has run.
+"""
+import csv
+import json
+
+# columns of an offer record in an import file
+OFFER_COLUMNS = ('external_id', 'customer_email', 'loan_amount', 'interest_rate', 'loan_term')
+TERM_FIELDS = ('loan_amount', 'interest_rate', 'loan_term')
+
+
+def _lines(file, offset):
+    # yield (line, end offset) pairs of a binary file, starting at byte ``offset``
+    file.seek(offset)
+    for line in file:
+        offset += len(line)
+        yield line.decode('utf-8'), offset
+
+
+def iter_records(path, file_format, offset=0):
+    """
+    Stream ``(record, end_offset)`` from a CSV (with a header row) or NDJSON file.
+    ``end_offset`` is the byte offset right after the record, which is where a resumed import starts.
+    Only one line is held in memory at a time.
+    """
+    with open(path, 'rb') as file:
+        if file_format == 'csv':
+            header = next(csv.reader([file.readline().decode('utf-8-sig')]))
+            position = {'offset': max(offset, file.tell())}
+            lines = _lines(file, position['offset'])
+
+            def text():
+                for line, end in lines:
+                    position['offset'] = end
+                    yield line
+
+            for row in csv.reader(text()):
+                if row:
+                    yield dict(zip(header, row)), position['offset']
+        else:
+            for line, end in _lines(file, offset):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    record = {'__error__': f'Invalid JSON - {exc}'}
+                yield record, end
+
+
+def init_worker():
+    # process pool workers are started with ``spawn``, so Django has to be set up in each of them
+    import django
+    django.setup()
+
+
+def validate_terms(records):
+    """
+    Validate the loan amount, interest rate and loan term of each record with the ``LoanOfferSerializer`` rules.
+    Runs in a process pool worker and never touches the database.
+    Returns one ``(validated_terms, None)`` or ``(None, errors)`` pair per record.
+    """
+    from .serializers import LoanOfferTermsSerializer
+
+    results = []
+    for record in records:
+        if not isinstance(record, dict) or '__error__' in record:
+            error = record.get('__error__') if isinstance(record, dict) else 'Expected a JSON object.'
+            results.append((None, {'non_field_errors': [error]}))
+            continue
+        serializer = LoanOfferTermsSerializer(data={field: record.get(field) for field in TERM_FIELDS})
+        if serializer.is_valid():
+            results.append((tuple(serializer.validated_data[field] for field in TERM_FIELDS), None))
+        else:
+            results.append((None, {field: [str(error) for error in errors] for field, errors in serializer.errors.items()}))
+    return results
@@ -0,0 +1,186 @@
+"""
+Background jobs: calculations and exports too large for a request/response cycle.
+
+Jobs are rows of the ``Job`` table, so no broker is needed. ``manage.py run_jobs`` claims queued jobs one at a time,
+has their chunks computed (and formatted) by a process pool, and appends every chunk to the result file in order,
+recording the progress and a heartbeat after each one.
+Chunk functions only do arithmetic and formatting, so they never touch the database from a pool worker.
+"""
+import itertools
+import logging
+import os
+from collections import deque
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .calculator import SCHEDULE_COLUMNS, monthly_payments, schedule_rows
+from .models import Job, LoanOffer
+from .streaming import csv_text, ndjson_text
+
+logger = logging.getLogger('loan.jobs')
+
+SCENARIO_COLUMNS = ('loan_amount', 'interest_rate', 'loan_term', 'monthly_payment', 'total_payable', 'total_interest')
+# format -> (file extension, content type)
+RESULT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+}
+
+
+def format_rows(output_format, header, rows):
+    return csv_text(rows) if output_format == 'csv' else ndjson_text(header, rows)
+
+
+def price_chunk(output_format, amounts, rates, terms):
+    """
+    Price one chunk of scenarios in a single vectorized pass, returns the formatted result rows.
+    """
+    import numpy as np
+    amounts = np.asarray(amounts, dtype=np.float64)
+    terms = np.asarray(terms, dtype=np.int64)
+    payments = monthly_payments(amounts, rates, terms)
+    total_payable = payments * terms
+    columns = [amounts, np.asarray(rates, dtype=np.float64), terms]
+    columns += [np.round(column, 2) for column in (payments, total_payable, total_payable - amounts)]
+    return format_rows(output_format, SCENARIO_COLUMNS, zip(*(column.tolist() for column in columns)))
+
+
+def price_grid_chunk(output_format, amounts, rates, terms, start, stop):
+    import numpy as np
+    # scenarios start..stop of the loan amount x interest rate x loan term product, in row-major order
+    indexes = np.unravel_index(np.arange(start, stop), (len(amounts), len(rates), len(terms)))
+    return price_chunk(output_format, *(np.asarray(axis)[index] for axis, index in zip((amounts, rates, terms), indexes)))
+
+
+def schedule_chunk(output_format, offers):
+    """
+    Amortization schedules of a chunk of ``(id, loan_amount, interest_rate, loan_term)`` offers, formatted.
+    """
+    rows = itertools.chain.from_iterable(
+        schedule_rows(loan_amount, interest_rate, loan_term, offer_id) for offer_id, loan_amount, interest_rate, loan_term in offers
+    )
+    return format_rows(output_format, ('offer',) + SCHEDULE_COLUMNS, rows)
+
+
+def price_scenarios_tasks(params):
+    """
+    ``(total, header, tasks)`` of a pricing job, every task is a ``(size, function, args)`` chunk.
+    Scenarios are an explicit list (``scenarios`` as amount, rate and term columns)
+    or the product of ``loan_amounts``, ``interest_rates`` and ``loan_terms``.
+    """
+    output_format = params['format']
+    chunk_size = settings.LOAN_JOBS['SCENARIO_CHUNK_SIZE']
+    if 'scenarios' in params:
+        amounts, rates, terms = params['scenarios']
+        total = len(amounts)
+        tasks = (
+            (len(amounts[start:start + chunk_size]), price_chunk,
+             (output_format, amounts[start:start + chunk_size], rates[start:start + chunk_size], terms[start:start + chunk_size]))
+            for start in range(0, total, chunk_size)
+        )
+    else:
+        axes = (params['loan_amounts'], params['interest_rates'], params['loan_terms'])
+        total = len(axes[0]) * len(axes[1]) * len(axes[2])
+        tasks = (
+            (min(start + chunk_size, total) - start, price_grid_chunk, (output_format, *axes, start, min(start + chunk_size, total)))
+            for start in range(0, total, chunk_size)
+        )
+    return total, SCENARIO_COLUMNS, tasks
+
+
+def export_offer_schedules_tasks(params):
+    """
+    ``(total, header, tasks)`` of a schedule export, offers are read in chunks while the job runs.
+    """
+    offers = LoanOffer.objects.order_by('id')
+    if params.get('customer') is not None:
+        offers = offers.filter(customer_id=params['customer'])
+    chunk_size = settings.LOAN_JOBS['OFFER_CHUNK_SIZE']
+    rows = offers.values_list('id', 'loan_amount', 'interest_rate', 'loan_term').iterator(chunk_size=chunk_size)
+
+    def tasks():
+        while chunk := [(pk, float(amount), float(rate), term) for pk, amount, rate, term in itertools.islice(rows, chunk_size)]:
+            yield len(chunk), schedule_chunk, (params['format'], chunk)
+
+    return offers.count(), ('offer',) + SCHEDULE_COLUMNS, tasks()
+
+
+JOB_KINDS = {
+    Job.Kind.PRICE_SCENARIOS: price_scenarios_tasks,
+    Job.Kind.EXPORT_OFFER_SCHEDULES: export_offer_schedules_tasks,
+}
+
+
+def result_path(job):
+    return os.path.join(settings.LOAN_JOBS['RESULT_DIR'], job.result_file)
+
+
+def requeue_stale_jobs():
+    """
+    Queue again the running jobs whose worker stopped sending heartbeats, they restart from scratch.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.LOAN_JOBS['STALE_SECONDS'])
+    return Job.objects.filter(status=Job.Status.RUNNING, heartbeat_at__lt=stale).update(
+        status=Job.Status.QUEUED, progress=0, started_at=None, heartbeat_at=None,
+    )
+
+
+def claim_job():
+    """
+    Mark the oldest queued job as running and return it, ``None`` when the queue is empty.
+    The conditional UPDATE makes sure concurrent workers never claim the same job.
+    """
+    for pk in Job.objects.filter(status=Job.Status.QUEUED).order_by('id').values_list('id', flat=True)[:10]:
+        now = timezone.now()
+        if Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(status=Job.Status.RUNNING, started_at=now, heartbeat_at=now):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def computed_chunks(tasks, executor=None, workers=1):
+    # ``(size, text)`` of every task in order, with a bounded number of chunks in flight on the pool
+    if executor is None:
+        for size, function, args in tasks:
+            yield size, function(*args)
+        return
+    pending = deque()
+    for size, function, args in tasks:
+        pending.append((size, executor.submit(function, *args)))
+        if len(pending) >= workers * 2:
+            size, future = pending.popleft()
+            yield size, future.result()
+    while pending:
+        size, future = pending.popleft()
+        yield size, future.result()
+
+
+def run_job(job, executor=None, workers=1):
+    """
+    Execute a claimed job, writing its result file chunk by chunk. Failures are recorded on the job.
+    """
+    output_format = job.params.get('format', 'csv')
+    extension, _ = RESULT_FORMATS[output_format]
+    job.result_file = f'job-{job.pk}.{extension}'
+    path = result_path(job)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        total, header, tasks = JOB_KINDS[job.kind](job.params)
+        Job.objects.filter(pk=job.pk).update(total=total)
+        progress = 0
+        # written next to the result and renamed once complete, so a download never sees a partial file
+        with open(f'{path}.part', 'w', newline='') as file:
+            if output_format == 'csv':
+                file.write(csv_text([header]))
+            for size, text in computed_chunks(tasks, executor, workers):
+                file.write(text)
+                progress += size
+                Job.objects.filter(pk=job.pk).update(progress=progress, heartbeat_at=timezone.now())
+        os.replace(f'{path}.part', path)
+    except Exception as exc:
+        logger.exception('Job %s failed', job.pk)
+        if os.path.exists(f'{path}.part'):
+            os.remove(f'{path}.part')
+        Job.objects.filter(pk=job.pk).update(status=Job.Status.FAILED, error=str(exc) or type(exc).__name__, finished_at=timezone.now())
+        return False
+    Job.objects.filter(pk=job.pk).update(status=Job.Status.SUCCEEDED, result_file=job.result_file, finished_at=timezone.now())
+    return True
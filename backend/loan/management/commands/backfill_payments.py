@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from loan.backfill import backfill_offer_payments
+from loan.models import LoanOffer
+
+
+class Command(BaseCommand):
+    help = 'Fill the stored monthly_payment, total_interest and total_payable columns of loan offers in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Offers per query and transaction.')
+        parser.add_argument('--all', action='store_true', help='Recompute every offer, not only those without a payment.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number.')
+
+        updated = backfill_offer_payments(
+            LoanOffer, batch_size=options['batch_size'], recompute=options['all'], adjust_summary=True,
+            progress=lambda count: self.stdout.write(f'{count} offers updated'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Backfilled payments of {updated} offers.'))
@@ -0,0 +1,87 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from loan.benchmarks import (
+    compare_to_baseline, load_baseline, micro_benchmarks, request_benchmarks, save_baseline, time_per_operation,
+    unlimited_throttling,
+)
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the micro-benchmarks of the amortization math and request-level benchmarks of every loan endpoint '
+        '(through the Django test client, against a throwaway test database). '
+        'With --compare, exits with an error when a case is slower than the stored baseline by more than --threshold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suite', choices=['all', 'micro', 'requests'], default='all', help='Benchmarks to run.')
+        parser.add_argument('-k', '--filter', default='', help='Only run cases whose name contains this text.')
+        parser.add_argument('--number', type=int, default=20, help='Calls per timing round.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing rounds, the fastest one is reported.')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file.')
+        parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline.')
+        parser.add_argument('--compare', action='store_true', help='Fail on regressions against the baseline.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed slowdown against the baseline before --compare fails, 0.25 = 25%%.')
+
+    def handle(self, *args, **options):
+        if options['number'] <= 0 or options['repeat'] <= 0:
+            raise CommandError('--number and --repeat must be positive numbers.')
+
+        baseline = load_baseline(options['baseline'])
+        if not baseline and options['compare']:
+            raise CommandError(f'Baseline "{options["baseline"]}" does not exist, create it with --save-baseline.')
+
+        results = {}
+        if options['suite'] in ('all', 'micro'):
+            results.update(self.run(micro_benchmarks(), options, baseline))
+        if options['suite'] in ('all', 'requests'):
+            results.update(self.run_requests(options, baseline))
+
+        if options['save_baseline']:
+            save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f'Saved {len(results)} result(s) to {options["baseline"]}.'))
+
+        if options['compare']:
+            regressions = compare_to_baseline(results, baseline, options['threshold'])
+            if regressions:
+                cases = ', '.join(f'{name} ({ratio:.2f}x)' for name, ratio in regressions.items())
+                raise CommandError(f'{len(regressions)} benchmark(s) regressed by more than {options["threshold"]:.0%}: {cases}')
+            self.stdout.write(self.style.SUCCESS(f'No regressions beyond {options["threshold"]:.0%}.'))
+
+    def run_requests(self, options, baseline):
+        # the write benchmarks insert rows, so they run against a test database that is destroyed afterwards
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # keep the admission checks in the measured path, but with buckets that never run dry
+            with override_settings(LOAN_THROTTLING=unlimited_throttling()):
+                cases = {name: operation for name, (_, operation) in request_benchmarks().items()}
+                return self.run(cases, options, baseline)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, cases, options, baseline):
+        results = {}
+        for name, operation in cases.items():
+            if options['filter'] not in name:
+                continue
+            # warm up caches, lazy imports and the first-request setup before timing
+            operation()
+            best, median = time_per_operation(operation, options['number'], options['repeat'])
+            results[name] = best
+            self.stdout.write(self.format_result(name, best, median, baseline.get(name)))
+        return results
+
+    def format_result(self, name, best, median, reference):
+        line = f'{name:<36} {best * 1e6:>12.1f} us/op  (median {median * 1e6:.1f})  {1 / best:>10.0f} ops/sec'
+        if reference:
+            line += f'  {best / reference - 1:+.1%} vs baseline'
+        return line
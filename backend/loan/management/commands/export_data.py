@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from loan.exports import EXPORT_FORMATS, EXPORTS, ExportUnavailable, export_stream
+
+
+class Command(BaseCommand):
+    help = (
+        'Export every customer or loan offer as CSV, Parquet or an Arrow stream. Rows are read and written in chunks, '
+        'so memory stays flat whatever the table size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(EXPORTS), help='What to export.')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help='Output format.')
+        parser.add_argument('--output', '-o', default='-', help='Output file, "-" writes CSV to stdout.')
+        parser.add_argument('--payments', action='store_true', help='Add the stored payment columns of loan offers.')
+        parser.add_argument('--customer', type=int, help='Only export the loan offers of this customer.')
+        parser.add_argument('--chunk-size', type=int, help='Rows per fetch and per written chunk.')
+
+    def handle(self, *args, **options):
+        name, output_format, output = options['name'], options['format'], options['output']
+        if options['chunk_size'] is not None and options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size must be a positive number.')
+        if output == '-' and output_format != 'csv':
+            raise CommandError(f'{output_format} exports need an --output file.')
+
+        queryset = EXPORTS[name][0].objects.all()
+        if options['customer'] is not None:
+            if name != 'loanoffers':
+                raise CommandError('--customer only applies to loan offer exports.')
+            queryset = queryset.filter(customer_id=options['customer'])
+        try:
+            stream = export_stream(name, queryset, output_format, options['payments'], options['chunk_size'])
+        except ExportUnavailable as exc:
+            raise CommandError(str(exc))
+
+        if output == '-':
+            for chunk in stream:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(output, 'w', newline='') if output_format == 'csv' else open(output, 'wb') as file:
+            for chunk in stream:
+                file.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f'Exported {name} to {output}.'))
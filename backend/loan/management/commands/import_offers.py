@@ -0,0 +1,177 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from loan.cache import invalidate_customer_details
+from loan.importing import OFFER_COLUMNS, init_worker, iter_records, validate_terms
+from loan.models import PAYMENT_FIELDS, Customer, LoanOffer
+from loan.portfolio import apply_summary_deltas, merge_deltas, offer_deltas
+
+# fields written when an offer with the same external_id already exists, bulk_update() doesn't set auto_now fields
+UPDATE_FIELDS = ['customer', 'loan_amount', 'interest_rate', 'loan_term', *PAYMENT_FIELDS, 'updated_at']
+
+
+class Command(BaseCommand):
+    help = (
+        'Import loan offers from a CSV or NDJSON file, streaming it line by line. '
+        f'Records have the columns {", ".join(OFFER_COLUMNS)}. Offers are matched on external_id, '
+        'so re-running an import updates rows instead of duplicating them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or NDJSON file to import.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='File format, guessed from the extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Records per validation batch and transaction.')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Validation processes, 0 validates in the command process.')
+        parser.add_argument('--checkpoint', help='Checkpoint file, defaults to <path>.checkpoint.')
+        parser.add_argument('--resume', action='store_true', help='Continue from the offset stored in the checkpoint.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File "{path}" does not exist.')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number.')
+
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        self.customer_ids = {}
+        self.stats = {'rows': 0, 'created': 0, 'updated': 0, 'errors': 0}
+
+        offset = 0
+        if options['resume'] and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as file:
+                checkpoint = json.load(file)
+            offset = checkpoint['offset']
+            self.stats.update(checkpoint['stats'])
+            self.stdout.write(f'Resuming at byte {offset} after {self.stats["rows"]} rows.')
+
+        self.started = time.perf_counter()
+        self.rows_at_start = self.stats['rows']
+        batches = self.iter_batches(iter_records(path, file_format, offset), options['batch_size'])
+
+        workers = options['workers']
+        if workers > 0:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker) as executor:
+                self.run_pipelined(executor, batches, workers)
+        else:
+            for records, end_offset in batches:
+                self.write_batch(records, validate_terms(records), end_offset)
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.stats["rows"]} rows: {self.stats["created"]} created, '
+            f'{self.stats["updated"]} updated, {self.stats["errors"]} errors ({self.throughput():.0f} rows/sec).'
+        ))
+
+    def iter_batches(self, records, batch_size):
+        batch = []
+        for record, end_offset in records:
+            batch.append(record)
+            if len(batch) == batch_size:
+                yield batch, end_offset
+                batch = []
+        if batch:
+            yield batch, end_offset
+
+    def run_pipelined(self, executor, batches, workers):
+        # keep a bounded number of batches in flight so memory stays constant, and write them back in file order
+        pending = deque()
+        for records, end_offset in batches:
+            pending.append((records, executor.submit(validate_terms, records), end_offset))
+            if len(pending) >= workers * 2:
+                records, future, end_offset = pending.popleft()
+                self.write_batch(records, future.result(), end_offset)
+        while pending:
+            records, future, end_offset = pending.popleft()
+            self.write_batch(records, future.result(), end_offset)
+
+    def resolve_customers(self, records):
+        # look up only emails not seen yet, everything else comes from the in-memory email -> id cache
+        # a missing or non-string email matches no customer, write_batch reports it
+        emails = {
+            record.get('customer_email') for record in records
+            if isinstance(record, dict) and isinstance(record.get('customer_email'), str)
+        }
+        missing = [email for email in emails if email not in self.customer_ids]
+        if missing:
+            self.customer_ids.update(dict.fromkeys(missing))
+            self.customer_ids.update(Customer.objects.filter(email__in=missing).values_list('email', 'id'))
+
+    def write_batch(self, records, validated, end_offset):
+        self.resolve_customers(records)
+        offers = {}
+        first_row = self.stats['rows'] + 1
+        for row, (record, (terms, errors)) in enumerate(zip(records, validated), first_row):
+            if errors is None:
+                errors = {}
+                email = record.get('customer_email')
+                customer_id = self.customer_ids.get(email) if isinstance(email, str) else None
+                external_id = record.get('external_id')
+                if customer_id is None:
+                    errors['customer_email'] = ['No customer with this email.']
+                if not external_id:
+                    errors['external_id'] = ['This field is required.']
+            if errors:
+                self.report_error(row, errors)
+                continue
+            offer = LoanOffer(customer_id=customer_id, external_id=str(external_id),
+                              **dict(zip(('loan_amount', 'interest_rate', 'loan_term'), terms)))
+            # bulk writes skip save(), fill the stored payment columns here
+            offer.compute_payments()
+            # the last occurrence of an external_id within a batch wins
+            offers[str(external_id)] = offer
+
+        with transaction.atomic():
+            existing = LoanOffer.objects.filter(external_id__in=list(offers)).values(
+                'external_id', 'id', 'customer_id', 'loan_amount', 'interest_rate', 'loan_term', 'total_interest',
+            )
+            updates = []
+            replaced = []
+            # customers whose cached details change, including the previous owner of a reassigned offer
+            customer_ids = {offer.customer_id for offer in offers.values()}
+            now = timezone.now()
+            for previous in existing:
+                offer = offers.pop(previous['external_id'])
+                offer.pk = previous['id']
+                offer.updated_at = now
+                updates.append(offer)
+                replaced.append(previous)
+                customer_ids.add(previous['customer_id'])
+            LoanOffer.objects.bulk_update(updates, UPDATE_FIELDS)
+            LoanOffer.objects.bulk_create(list(offers.values()))
+            # bulk writes don't send model signals, updated offers swap their old contribution for the new one
+            apply_summary_deltas(merge_deltas(
+                offer_deltas([*updates, *offers.values()]), offer_deltas(replaced, sign=-1),
+            ))
+        invalidate_customer_details(customer_ids)
+
+        self.stats['rows'] += len(records)
+        self.stats['created'] += len(offers)
+        self.stats['updated'] += len(updates)
+        # a crash before this point only means the batch is imported again, which is idempotent
+        self.save_checkpoint(end_offset)
+        self.stdout.write(f'{self.stats["rows"]} rows ({self.throughput():.0f} rows/sec)')
+
+    def report_error(self, row, errors):
+        self.stats['errors'] += 1
+        self.stderr.write(f'Row {row}: {json.dumps(errors)}')
+
+    def save_checkpoint(self, offset):
+        # written atomically after every committed batch, so a crashed import can resume from it
+        temporary_path = f'{self.checkpoint_path}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump({'offset': offset, 'stats': self.stats}, file)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def throughput(self):
+        elapsed = time.perf_counter() - self.started
+        return (self.stats['rows'] - self.rows_at_start) / elapsed if elapsed else 0.0
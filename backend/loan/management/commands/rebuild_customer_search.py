@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from loan.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the customer search index and its triggers where they are missing, and reindex every customer. '
+        'Run it after a migration rebuilt the customer table on SQLite.'
+    )
+
+    def handle(self, *args, **options):
+        install_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the customer search index ({connection.vendor}).'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from loan.models import LoanOffer, PortfolioSummary
+from loan.portfolio import rebuild_portfolio_summary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the portfolio summary rows from the loan offer table, e.g. after changing the term buckets.'
+
+    def handle(self, *args, **options):
+        buckets = rebuild_portfolio_summary(LoanOffer, PortfolioSummary)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the portfolio summary of {buckets} term buckets.'))
@@ -0,0 +1,50 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from loan.importing import init_worker
+from loan.jobs import claim_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Execute queued background jobs (POST /api/v1/jobs). Chunks are computed by a process pool, '
+        'several run_jobs processes may share the queue.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Processes computing chunks, 0 computes them in the command process.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty instead of polling it.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 0:
+            raise CommandError('--workers must not be negative.')
+
+        if workers == 0:
+            self.work(None, 1, options)
+            return
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker) as executor:
+            self.work(executor, workers, options)
+
+    def work(self, executor, workers, options):
+        while True:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stderr.write(f'Requeued {requeued} stale jobs.')
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            succeeded = run_job(job, executor, workers)
+            job.refresh_from_db()
+            message = f'Job {job.pk} ({job.kind}) {job.status}: {job.progress} items in {time.perf_counter() - started:.1f}s'
+            self.stdout.write(self.style.SUCCESS(message) if succeeded else self.style.ERROR(f'{message} - {job.error}'))
@@ -0,0 +1,59 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from loan.importing import init_worker
+from loan.models import LoanOffer
+from loan.serializers import RateSimulationSerializer
+from loan.simulation import RATE_MODELS, simulate
+
+
+class Command(BaseCommand):
+    help = (
+        'Monte Carlo simulation of loan offers under a variable-rate model: an offer, a customer\'s offers or the '
+        'whole book. Shards of paths are computed by a process pool, the percentiles are printed as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offer', type=int, help='Simulate this offer.')
+        parser.add_argument('--customer', type=int, help='Simulate the offers of this customer, default is every offer.')
+        parser.add_argument('--model', choices=list(RATE_MODELS), default='random_walk', help='Rate model of the index.')
+        parser.add_argument('--volatility', type=float, help='Annual volatility of the index, in percentage points.')
+        parser.add_argument('--drift', type=float, help='Annual drift of the random walk, in percentage points.')
+        parser.add_argument('--initial-rate', type=float, help='Index rate today (vasicek).')
+        parser.add_argument('--mean-rate', type=float, help='Long-term mean rate (vasicek).')
+        parser.add_argument('--reversion', type=float, help='Speed of mean reversion per year (vasicek).')
+        parser.add_argument('--paths', type=int, help='Simulated rate paths.')
+        parser.add_argument('--seed', type=int, help='Seed of the rate paths, drawn and reported when left out.')
+        parser.add_argument('--reset-months', type=int, help='Months between payment resets.')
+        parser.add_argument('--percentiles', type=float, nargs='+', help='Percentiles to report.')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Processes computing shards of paths, 0 computes them in the command process.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 0:
+            raise CommandError('--workers must not be negative.')
+        names = ('model', 'volatility', 'drift', 'initial_rate', 'mean_rate', 'reversion', 'paths', 'seed',
+                 'reset_months', 'percentiles')
+        # the same rules as the endpoint, without its size limit
+        serializer = RateSimulationSerializer(data={name: options[name] for name in names if options[name] is not None})
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors))
+
+        offers = LoanOffer.objects.all()
+        if options['offer'] is not None:
+            offers = offers.filter(pk=options['offer'])
+        if options['customer'] is not None:
+            offers = offers.filter(customer_id=options['customer'])
+        offers = list(offers.values_list('loan_amount', 'interest_rate', 'loan_term').iterator())
+        if not offers:
+            raise CommandError('No loan offers to simulate.')
+
+        if options['workers'] == 0:
+            result = simulate(offers, serializer.validated_data)
+        else:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(options['workers'], mp_context=context, initializer=init_worker) as executor:
+                result = simulate(offers, serializer.validated_data, executor)
+        self.stdout.write(json.dumps(result, indent=2))
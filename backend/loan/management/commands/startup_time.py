@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from loan.benchmarks import compare_to_baseline, load_baseline, save_baseline
+from loan.startup import DEFAULT_PATH, measure_startup
+from .benchmark import DEFAULT_BASELINE
+
+# profile name -> (WSGI entry point, settings module)
+PROFILES = {
+    'api': ('assessment_project.wsgi_api', 'assessment_project.settings_api'),
+    'full': ('assessment_project.wsgi', 'assessment_project.settings'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the cold start of a worker: import time of the WSGI entry point and latency of the first request, '
+        'in fresh interpreters. With --compare, exits with an error when the median of the runs is slower than '
+        'the stored baseline by more than --threshold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=list(PROFILES), action='append',
+                            help='Settings profile to start, repeat for several (default: api and full).')
+        parser.add_argument('--path', default=DEFAULT_PATH, help='GET request sent twice after the import.')
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts per profile, the median is reported.')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file.')
+        parser.add_argument('--save-baseline', action='store_true', help='Store the results in the baseline.')
+        parser.add_argument('--compare', action='store_true', help='Fail on regressions against the baseline.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed slowdown against the baseline before --compare fails, 0.25 = 25%%.')
+
+    def handle(self, *args, **options):
+        if options['runs'] <= 0:
+            raise CommandError('--runs must be a positive number.')
+        baseline = load_baseline(options['baseline'])
+
+        results = {}
+        for profile in options['profile'] or list(PROFILES):
+            try:
+                startup = measure_startup(*PROFILES[profile], path=options['path'], runs=options['runs'])
+            except RuntimeError as exc:
+                raise CommandError(f'The {profile} profile failed to start: {exc}')
+            if any(status >= 400 for status in startup['statuses']):
+                raise CommandError(f'The {profile} profile answered {options["path"]} with {startup["statuses"]}.')
+
+            self.stdout.write(f'{profile} ({PROFILES[profile][1]}), median of {options["runs"]} run(s):')
+            for measure in ('import', 'first_request', 'second_request', 'cold_start'):
+                name = f'startup.{measure.replace("_", "-")}[{profile}]'
+                results[name] = startup[measure]
+                self.stdout.write(self.format_result(measure, startup[measure], baseline.get(name)))
+            self.stdout.write(f'  {"modules":<16} {startup["modules"]:>8.0f} loaded at startup')
+            for module, when in startup['watched'].items():
+                self.stdout.write(f'  {module:<16} {"imported at " + when if when else "not imported"}')
+
+        if options['save_baseline']:
+            save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f'Saved {len(results)} result(s) to {options["baseline"]}.'))
+
+        if options['compare']:
+            regressions = compare_to_baseline(results, baseline, options['threshold'])
+            if regressions:
+                cases = ', '.join(f'{name} ({ratio:.2f}x)' for name, ratio in regressions.items())
+                raise CommandError(f'{len(regressions)} startup measurement(s) regressed by more than {options["threshold"]:.0%}: {cases}')
+            self.stdout.write(self.style.SUCCESS(f'No regressions beyond {options["threshold"]:.0%}.'))
+
+    def format_result(self, measure, seconds, reference):
+        line = f'  {measure:<16} {seconds * 1000:>8.1f} ms'
+        if reference:
+            line += f'  {seconds / reference - 1:+.1%} vs baseline'
+        return line
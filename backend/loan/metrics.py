@@ -0,0 +1,202 @@
+"""
+In-process metrics in the Prometheus text exposition format, served by ``GET /metrics``.
+
+Each process keeps its own registry, so with several gunicorn/uvicorn workers every worker is scraped
+(or reports) separately, like the payment cache statistics.
+"""
+import threading
+
+# default Prometheus latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# queries per request, a request in the upper buckets usually has an N+1
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+# offers per group commit
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Base class of the metrics, one value per combination of ``labelnames`` values.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects the labels {", ".join(self.labelnames)}.')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def samples(self):
+        # (suffix, label pairs, value) triples
+        raise NotImplementedError
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, pairs, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_labels(pairs)} {_number(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', list(zip(self.labelnames, key)), value) for key, value in values]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """
+    Cumulative histogram, ``value()`` returns ``{'buckets': [...], 'sum': ..., 'count': ...}``.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def value(self, **labels):
+        state = super().value(**labels)
+        return None if state is None else {**state, 'buckets': list(state['buckets'])}
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, {**state, 'buckets': list(state['buckets'])}) for key, state in self._values.items())
+        samples = []
+        for key, state in values:
+            pairs = list(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, state['buckets']):
+                samples.append(('_bucket', pairs + [('le', _number(bound))], count))
+            samples.append(('_sum', pairs, state['sum']))
+            samples.append(('_count', pairs, state['count']))
+        return samples
+
+
+class Registry:
+    """
+    Metrics of the process. Collectors are called before every exposition,
+    to copy values that are kept elsewhere (e.g. the cache statistics) into gauges.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered.')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def exposition(self):
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.exposition())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'loan_http_request_duration_seconds', 'Time to produce the complete response, per route.', ['route', 'method'],
+))
+REQUESTS = REGISTRY.register(Counter(
+    'loan_http_requests_total', 'Responses per route and status code.', ['route', 'method', 'status'],
+))
+DB_QUERIES = REGISTRY.register(Histogram(
+    'loan_db_queries_per_request', 'Database queries issued per request.', ['route'], buckets=QUERY_COUNT_BUCKETS,
+))
+DB_QUERY_DURATION = REGISTRY.register(Counter(
+    'loan_db_query_seconds_total', 'Time spent executing database queries, per route.', ['route'],
+))
+SERIALIZER_VALIDATION = REGISTRY.register(Histogram(
+    'loan_serializer_validation_seconds', 'Time spent in serializer is_valid(), per serializer.', ['serializer'],
+))
+PAYMENT_CACHE = REGISTRY.register(Gauge(
+    'loan_calculator_cache', 'Payment cache counters of POST /api/v1/loan-calculator.', ['counter'],
+))
+
+THROTTLE_DECISIONS = REGISTRY.register(Counter(
+    'loan_throttle_decisions_total', 'Requests of throttled scopes that were admitted, rate limited or shed.',
+    ['scope', 'decision'],
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    'loan_in_flight_requests', 'Requests of concurrency limited scopes being served by this process.', ['scope'],
+))
+
+GROUP_COMMIT_BATCH_SIZE = REGISTRY.register(Histogram(
+    'loan_group_commit_batch_size', 'Loan offers written per group commit transaction.', buckets=BATCH_SIZE_BUCKETS,
+))
+
+
+@REGISTRY.add_collector
+def collect_payment_cache():
+    from .cache import payment_cache
+
+    _, stats = payment_cache()
+    for counter, value in stats.snapshot().items():
+        if counter != 'hit_ratio' and value is not None:
+            PAYMENT_CACHE.set(value, counter=counter)
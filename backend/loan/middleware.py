@@ -0,0 +1,294 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.core.cache import caches
+from django.urls import get_resolver, resolve, reverse
+from .metrics import DB_QUERIES, DB_QUERY_DURATION, IN_FLIGHT, REQUEST_DURATION, REQUESTS, THROTTLE_DECISIONS
+from .throttling import cached_resolve, client_ident, request_scope, take_token, too_many_requests
+
+slow_request_logger = logging.getLogger('loan.slow_requests')
+
+# recorder of the request being served. A context variable rather than a wrapper per request and thread: async
+# views run their queries in sync_to_async threads, which copy the context but have connections of their own
+current_recorder = contextvars.ContextVar('loan_query_recorder', default=None)
+
+
+class AsyncCapableMiddleware:
+    """
+    Base of the middleware below, which serve both WSGI and ASGI stacks without Django adapting them.
+    Under ASGI ``__call__`` returns the coroutine of ``__acall__``, so requests to async views stay on the event
+    loop instead of hopping to a thread for this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+def record_query(execute, sql, params, many, context):
+    # installed once on every connection, reports to the recorder of the current request if there is one
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    # first in the list, so execute_wrapper() blocks of the request still pop their own wrapper
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+# connected when the app is ready (see LoanConfig), before any connection is opened
+connection_created.connect(install_query_recorder, dispatch_uid='loan.middleware.install_query_recorder')
+
+
+class QueryRecorder:
+    """
+    ``connection.execute_wrapper`` that counts and times the queries of a request.
+    With ``capture_sql`` the statements are kept too, for the slow-request log.
+    """
+
+    def __init__(self, capture_sql=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = [] if capture_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.seconds += duration
+            if self.statements is not None:
+                self.statements.append((duration, sql))
+
+    @contextmanager
+    def recording(self):
+        # connections opened before the connection_created receiver was connected don't have the wrapper yet
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        token = current_recorder.set(self)
+        try:
+            yield
+        finally:
+            current_recorder.reset(token)
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """
+    Records the latency, status code and database queries of every request in ``loan.metrics``,
+    and logs requests slower than ``LOAN_METRICS['SLOW_REQUEST_SECONDS']`` with the SQL they issued.
+
+    Streaming responses are measured until their last chunk is sent, since that's where their work happens.
+    """
+
+    def handle(self, request):
+        config = settings.LOAN_METRICS
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        recorder = QueryRecorder(capture_sql=config['SLOW_REQUEST_SECONDS'] is not None)
+        with recorder.recording():
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        config = settings.LOAN_METRICS
+        if not config['ENABLED']:
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        recorder = QueryRecorder(capture_sql=config['SLOW_REQUEST_SECONDS'] is not None)
+        with recorder.recording():
+            response = await self.get_response(request)
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.stream(response.streaming_content, request, response, recorder, started)
+        else:
+            self.record(request, response, recorder, started)
+        return response
+
+    def stream(self, content, request, response, recorder, started):
+        try:
+            with recorder.recording():
+                yield from content
+        finally:
+            self.record(request, response, recorder, started)
+
+    def record(self, request, response, recorder, started):
+        duration = time.perf_counter() - started
+        # the route pattern rather than the path, so ids don't create a new series per object
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else '<unmatched>'
+
+        REQUEST_DURATION.observe(duration, route=route, method=request.method)
+        REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        DB_QUERIES.observe(recorder.count, route=route)
+        DB_QUERY_DURATION.inc(recorder.seconds, route=route)
+
+        threshold = settings.LOAN_METRICS['SLOW_REQUEST_SECONDS']
+        if threshold is not None and duration >= threshold:
+            statements = '\n'.join(f'  {seconds * 1000:.2f}ms {sql}' for seconds, sql in recorder.statements)
+            slow_request_logger.warning(
+                'Slow request %s %s -> %s in %.3fs, %d queries in %.3fs\n%s',
+                request.method, request.get_full_path(), response.status_code, duration,
+                recorder.count, recorder.seconds, statements,
+            )
+
+
+class AdmissionControlMiddleware(AsyncCapableMiddleware):
+    """
+    Applies ``LOAN_THROTTLING``: a token bucket per client and route in the ``CACHE_ALIAS`` cache,
+    and at most ``CONCURRENCY`` requests of a scope in flight per process.
+    Place it after ``MetricsMiddleware`` (so rejections are recorded) and ``CorsMiddleware`` (so they carry CORS
+    headers), and before ``CalculatorFastPathMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def semaphore(self, name, limit):
+        with self.lock:
+            if (name, limit) not in self.semaphores:
+                self.semaphores[name, limit] = threading.BoundedSemaphore(limit)
+            return self.semaphores[name, limit]
+
+    def admit(self, request):
+        """
+        Admission decision for a request: ``(None, None)`` to serve it without limits, ``(rejection, None)`` to
+        answer with a 429, or ``(None, (scope name, semaphore))`` to serve it within the scope's concurrency limit.
+        Doesn't block: the bucket update is a single cache round trip and the semaphore is tried without waiting,
+        so the async path runs it inline on the event loop.
+        """
+        config = settings.LOAN_THROTTLING
+        if not config['ENABLED']:
+            return None, None
+        # a middleware earlier in the stack may have picked another URLconf, like Django's handler honours
+        match = cached_resolve(get_resolver(getattr(request, 'urlconf', None)), request.path_info)
+        if match is None:
+            return None, None
+        name, scope = request_scope(match, request.method, config)
+        if scope is None:
+            return None, None
+        # known before the view runs, so rejected requests are still recorded under their route
+        request.resolver_match = match
+
+        if scope.get('RATE'):
+            key = f'throttle:{name}:{match.url_name}:{client_ident(request, config)}'
+            wait = take_token(caches[config['CACHE_ALIAS']], key, scope['CAPACITY'], scope['RATE'])
+            if wait:
+                THROTTLE_DECISIONS.inc(scope=name, decision='rate_limited')
+                return too_many_requests('Request was throttled. Expected available in {wait} seconds.', wait), None
+
+        if not scope.get('CONCURRENCY'):
+            THROTTLE_DECISIONS.inc(scope=name, decision='admitted')
+            return None, None
+
+        semaphore = self.semaphore(name, scope['CONCURRENCY'])
+        if not semaphore.acquire(blocking=False):
+            THROTTLE_DECISIONS.inc(scope=name, decision='shed')
+            wait = config['SHED_RETRY_AFTER']
+            return too_many_requests('Too many concurrent requests. Retry in {wait} seconds.', wait), None
+        THROTTLE_DECISIONS.inc(scope=name, decision='admitted')
+        IN_FLIGHT.inc(scope=name)
+        return None, (name, semaphore)
+
+    def release(self, slot):
+        name, semaphore = slot
+        IN_FLIGHT.inc(-1, scope=name)
+        semaphore.release()
+
+    def handle(self, request):
+        rejection, slot = self.admit(request)
+        if rejection:
+            return rejection
+        if slot is None:
+            return self.get_response(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self.release(slot)
+
+    async def __acall__(self, request):
+        rejection, slot = self.admit(request)
+        if rejection:
+            return rejection
+        if slot is None:
+            return await self.get_response(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release(slot)
+
+
+class CalculatorFastPathMiddleware(AsyncCapableMiddleware):
+    """
+    Serves ``GET|POST /api/v1/loan-calculator/fast`` straight from the top of the middleware stack when
+    ``LOAN_CALCULATOR_FAST_PATH`` is enabled, skipping URL resolution and the security, session, CSRF, auth,
+    message and clickjacking middleware that a JSON calculator call doesn't need.
+    The host is still checked against ``ALLOWED_HOSTS``, and other methods go through the full stack.
+    Place it after ``MetricsMiddleware``, which still records the route, and ``CorsMiddleware``, which answers
+    CORS preflights and adds CORS headers to cross-origin responses.
+    """
+    methods = ('GET', 'POST')
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.match = None
+
+    def fast_match(self, request):
+        # the route's match when the request takes the fast path, else None
+        if not settings.LOAN_CALCULATOR_FAST_PATH:
+            return None
+        if self.match is None:
+            # resolved on the first request, the URLconf can't be imported while the middleware is loaded
+            self.match = resolve(reverse('loan-calculator-fast'))
+        if request.path_info != f'/{self.match.route}' or request.method not in self.methods:
+            return None
+        # raises DisallowedHost (a 400) for hosts outside ALLOWED_HOSTS, as CommonMiddleware would
+        request.get_host()
+        request.resolver_match = self.match
+        return self.match
+
+    def handle(self, request):
+        match = self.fast_match(request)
+        if match:
+            return match.func(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        match = self.fast_match(request)
+        if match:
+            # the view only parses and computes (the payment cache is local memory by default), so it runs
+            # inline on the event loop rather than in a thread
+            return match.func(request)
+        return await self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loan', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanoffer',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
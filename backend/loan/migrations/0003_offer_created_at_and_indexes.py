@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:15
+
+import django.db.models.functions.text
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loan', '0002_loanoffer_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanoffer',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='customer_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanoffer',
+            index=models.Index(fields=['customer', 'created_at'], name='loanoffer_customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanoffer',
+            index=models.Index(fields=['interest_rate', 'loan_term'], name='loanoffer_rate_term_idx'),
+        ),
+    ]
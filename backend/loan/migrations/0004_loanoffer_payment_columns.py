@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loan', '0003_offer_created_at_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanoffer',
+            name='monthly_payment',
+            field=models.DecimalField(db_index=True, decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='loanoffer',
+            name='total_interest',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='loanoffer',
+            name='total_payable',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+    ]
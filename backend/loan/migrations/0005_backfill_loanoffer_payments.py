@@ -0,0 +1,76 @@
+from decimal import Decimal, InvalidOperation, Overflow, ROUND_HALF_EVEN, localcontext
+
+from django.db import migrations, transaction
+
+# A frozen copy of the payment math and of loan.backfill as they were when this migration was written, so later
+# changes to them (or to the current models) don't change what it does to a database that migrates through it
+
+PAYMENT_FIELDS = ('monthly_payment', 'total_payable', 'total_interest')
+BATCH_SIZE = 1000
+
+
+def exact_payment(loan_amount, interest_rate, loan_term):
+    # loan.calculator.calculate_exact: 28 significant digits, payment rounded half even to cents and
+    # the totals derived from the rounded payment
+    quantum = Decimal('0.01')
+    with localcontext() as context:
+        context.prec = 28
+        context.rounding = ROUND_HALF_EVEN
+        amount = Decimal(str(loan_amount))
+        loan_term = int(loan_term)
+        monthly_rate = Decimal(str(interest_rate)) / 1200
+        if monthly_rate == 0:
+            payment = amount / loan_term
+        else:
+            growth = (1 + monthly_rate) ** loan_term
+            payment = amount * (monthly_rate * growth) / (growth - 1)
+        payment = payment.quantize(quantum)
+        total_payable = (payment * loan_term).quantize(quantum)
+        return {
+            'monthly_payment': payment,
+            'total_payable': total_payable,
+            'total_interest': (total_payable - amount).quantize(quantum),
+        }
+
+
+def storable_payment(offer_model, loan_amount, interest_rate, loan_term):
+    # None when the payment overflows, or doesn't fit the columns (offers accepted before the term was bounded)
+    try:
+        result = exact_payment(loan_amount, interest_rate, loan_term)
+    except (InvalidOperation, Overflow):
+        return None
+    for name in PAYMENT_FIELDS:
+        field = offer_model._meta.get_field(name)
+        if result[name].adjusted() >= field.max_digits - field.decimal_places:
+            return None
+    return result
+
+
+def backfill_payments(apps, schema_editor):
+    LoanOffer = apps.get_model('loan', 'LoanOffer')
+    queryset = LoanOffer.objects.filter(monthly_payment__isnull=True).order_by('pk').only(
+        'pk', 'loan_amount', 'interest_rate', 'loan_term',
+    )
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            return
+        for offer in batch:
+            result = storable_payment(LoanOffer, offer.loan_amount, offer.interest_rate, offer.loan_term)
+            for field in PAYMENT_FIELDS:
+                setattr(offer, field, result[field] if result else None)
+        with transaction.atomic():
+            LoanOffer.objects.bulk_update(batch, PAYMENT_FIELDS)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loan', '0004_loanoffer_payment_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_payments, migrations.RunPython.noop),
+    ]
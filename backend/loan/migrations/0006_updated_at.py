@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loan', '0005_backfill_loanoffer_payments'),
+    ]
+
+    # existing rows get the time of the migration, auto_now only applies to later save() calls, so the
+    # bulk_update() writers (import_offers, backfill_payments) set updated_at themselves
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='loanoffer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
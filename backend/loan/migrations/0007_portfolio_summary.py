@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:38
+
+from django.db import migrations, models, transaction
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+
+# Frozen copies of the term buckets (LOAN_PORTFOLIO_TERM_BUCKETS) and of loan.portfolio.rebuild_portfolio_summary
+# as they were when this migration was written, so changing either later doesn't change what it does. Run
+# "manage.py rebuild_portfolio_summary" after changing the buckets
+TERM_BUCKETS = [12, 36, 60, 120, 240, 360]
+SUMMARY_FIELDS = ('offer_count', 'total_exposure', 'rate_weighted_exposure', 'expected_total_interest')
+
+
+def term_bucket_expression():
+    # SQL CASE assigning every offer its term bucket label: 1-12, 13-36, ... 361+
+    cases = []
+    lower = 1
+    for upper in TERM_BUCKETS:
+        cases.append(When(loan_term__lte=upper, then=Value(f'{lower}-{upper}')))
+        lower = upper + 1
+    return Case(*cases, default=Value(f'{lower}+'))
+
+
+def build_summary(apps, schema_editor):
+    LoanOffer = apps.get_model('loan', 'LoanOffer')
+    PortfolioSummary = apps.get_model('loan', 'PortfolioSummary')
+    aggregates = LoanOffer.objects.order_by().annotate(term_bucket=term_bucket_expression()).values('term_bucket').annotate(
+        offer_count=Count('id'),
+        total_exposure=Sum('loan_amount'),
+        rate_weighted_exposure=Sum(F('loan_amount') * F('interest_rate'), output_field=DecimalField(max_digits=30, decimal_places=4)),
+        expected_total_interest=Sum('total_interest'),
+    )
+    rows = [
+        PortfolioSummary(term_bucket=row['term_bucket'], **{field: row[field] or 0 for field in SUMMARY_FIELDS})
+        for row in aggregates
+    ]
+    with transaction.atomic():
+        PortfolioSummary.objects.all().delete()
+        PortfolioSummary.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loan', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term_bucket', models.CharField(max_length=20, unique=True)),
+                ('offer_count', models.BigIntegerField(default=0)),
+                ('total_exposure', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('rate_weighted_exposure', models.DecimalField(decimal_places=4, default=0, max_digits=30)),
+                ('expected_total_interest', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
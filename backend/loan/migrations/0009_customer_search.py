@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# A frozen copy of the search index DDL of loan.search as it was when this migration was written, so later changes
+# to that module don't change what this migration creates. "manage.py rebuild_customer_search" installs the
+# current version
+
+SQLITE_INDEX_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS loan_customer_search USING fts5(
+        first_name, last_name, email, content='loan_customer', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS loan_customer_search_insert AFTER INSERT ON loan_customer BEGIN
+        INSERT INTO loan_customer_search(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS loan_customer_search_delete AFTER DELETE ON loan_customer BEGIN
+        INSERT INTO loan_customer_search(loan_customer_search, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS loan_customer_search_update AFTER UPDATE OF first_name, last_name, email ON loan_customer BEGIN
+        INSERT INTO loan_customer_search(loan_customer_search, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO loan_customer_search(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END""",
+    # index the customers that existed before the table
+    "INSERT INTO loan_customer_search(loan_customer_search) VALUES ('rebuild')",
+]
+SQLITE_DROP_SQL = [
+    'DROP TRIGGER IF EXISTS loan_customer_search_insert',
+    'DROP TRIGGER IF EXISTS loan_customer_search_delete',
+    'DROP TRIGGER IF EXISTS loan_customer_search_update',
+    'DROP TABLE IF EXISTS loan_customer_search',
+]
+POSTGRES_INDEX_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    "CREATE INDEX IF NOT EXISTS customer_search_trgm_idx ON loan_customer "
+    "USING gin ((lower(first_name || ' ' || last_name || ' ' || email)) gin_trgm_ops)",
+]
+POSTGRES_DROP_SQL = ['DROP INDEX IF EXISTS customer_search_trgm_idx']
+
+
+def execute_for_vendor(schema_editor, statements):
+    # the statements of the database's vendor, a no-op on other databases
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def install(apps, schema_editor):
+    execute_for_vendor(schema_editor, {'sqlite': SQLITE_INDEX_SQL, 'postgresql': POSTGRES_INDEX_SQL})
+
+
+def drop(apps, schema_editor):
+    execute_for_vendor(schema_editor, {'sqlite': SQLITE_DROP_SQL, 'postgresql': POSTGRES_DROP_SQL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loan', '0008_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, drop),
+    ]
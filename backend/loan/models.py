@@ -1,22 +1,144 @@
+from decimal import InvalidOperation, Overflow
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Lower
 import math 
+from .calculator import PaymentResult, calculate_exact
 
 # Customer model
 class Customer(models.Model):
     first_name = models.CharField(max_length=100) # required
     last_name = models.CharField(max_length=100) # required
     email = models.EmailField(unique=True) # required & unique
+    updated_at = models.DateTimeField(auto_now=True) # Last-Modified of the customer's reads
+
+    class Meta:
+        indexes = [
+            # case-insensitive email lookups (email__lower=...)
+            models.Index(Lower('email'), name='customer_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 
+# allows email__lower lookups, which match the case-insensitive email index. Registered on this field only,
+# not on every EmailField of the process
+Customer._meta.get_field('email').register_lookup(Lower)
+
+
+# fields a loan offer's stored payment columns are computed from, and those columns
+PAYMENT_INPUT_FIELDS = ('loan_amount', 'interest_rate', 'loan_term')
+PAYMENT_FIELDS = PaymentResult.__slots__
+PAYMENT_OVERFLOW_ERROR = 'The monthly payment and totals of this offer are too large to be stored.'
+
+
+def storable_payment(offer_model, loan_amount, interest_rate, loan_term):
+    """
+    The exact payment result of the terms, or None when it doesn't fit the stored payment columns of
+    ``offer_model`` (a migration may pass its historical model).
+    """
+    try:
+        result = calculate_exact(loan_amount, interest_rate, loan_term)
+    except (InvalidOperation, Overflow):
+        return None
+    for name in PAYMENT_FIELDS:
+        field = offer_model._meta.get_field(name)
+        if getattr(result, name).adjusted() >= field.max_digits - field.decimal_places:
+            return None
+    return result
+
+
 # Loan offers model
 class LoanOffer(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE) # required
     loan_amount = models.DecimalField(max_digits=10, decimal_places=2) # required
     interest_rate = models.DecimalField(max_digits=5, decimal_places=2) # required
     loan_term = models.IntegerField()  # in months # required
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True) # optional, partner feed key
+    created_at = models.DateTimeField(auto_now_add=True)
+    # set by save() and bulk_create(), bulk_update() writers have to set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
+    # derived from amount, rate and term on save (see compute_payments), stored so they can be filtered and sorted in SQL
+    monthly_payment = models.DecimalField(max_digits=12, decimal_places=2, null=True, editable=False, db_index=True)
+    total_interest = models.DecimalField(max_digits=14, decimal_places=2, null=True, editable=False)
+    total_payable = models.DecimalField(max_digits=14, decimal_places=2, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # a customer's offers, newest first
+            models.Index(fields=['customer', 'created_at'], name='loanoffer_customer_created_idx'),
+            # rate / term range filters of the offer list
+            models.Index(fields=['interest_rate', 'loan_term'], name='loanoffer_rate_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"Loan for {self.customer} - Amount: {self.loan_amount}"
+
+    # monthly payment and totals computed with the exact Decimal path of the calculator
+    def payment(self):
+        return calculate_exact(self.loan_amount, self.interest_rate, self.loan_term)
+
+    # fill the stored payment columns, bulk writers call this themselves since bulk_create skips save()
+    def compute_payments(self):
+        result = storable_payment(type(self), self.loan_amount, self.interest_rate, self.loan_term)
+        if result is None:
+            raise ValidationError(PAYMENT_OVERFLOW_ERROR, code='overflow')
+        for field in PAYMENT_FIELDS:
+            setattr(self, field, getattr(result, field))
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.compute_payments()
+        if update_fields is not None and set(update_fields) & set(PAYMENT_INPUT_FIELDS):
+            update_fields = {*update_fields, *PAYMENT_FIELDS}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+# Book-wide loan offer totals per term bucket
+class PortfolioSummary(models.Model):
+    # adjusted by every offer write (see loan.portfolio), so book-wide figures never rescan the offer table
+    term_bucket = models.CharField(max_length=20, unique=True)
+    offer_count = models.BigIntegerField(default=0)
+    total_exposure = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    # sum(loan_amount * interest_rate), divided by total_exposure for the weighted average rate
+    rate_weighted_exposure = models.DecimalField(max_digits=30, decimal_places=4, default=0)
+    expected_total_interest = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Portfolio {self.term_bucket} months - {self.offer_count} offers"
+
+
+
+# Background job (see loan.jobs), queued in the database and executed by "manage.py run_jobs"
+class Job(models.Model):
+    class Kind(models.TextChoices):
+        PRICE_SCENARIOS = 'price_scenarios'
+        EXPORT_OFFER_SCHEDULES = 'export_offer_schedules'
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued'
+        RUNNING = 'running'
+        SUCCEEDED = 'succeeded'
+        FAILED = 'failed'
+
+    kind = models.CharField(max_length=50, choices=Kind.choices)
+    params = models.JSONField(default=dict) # validated parameters of the kind
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    progress = models.BigIntegerField(default=0) # scenarios / offers done
+    total = models.BigIntegerField(null=True) # known once the job started
+    result_file = models.CharField(max_length=255, blank=True) # name within LOAN_JOBS['RESULT_DIR']
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+    # refreshed after every chunk, running jobs whose worker died stop refreshing it and are requeued
+    heartbeat_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            # workers claim the oldest queued job
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
 
     def __str__(self):
-        return f"Loan for {self.customer} - Amount: {self.loan_amount}"
\ No newline at end of file
+        return f"Job {self.pk} ({self.kind}) - {self.status}"
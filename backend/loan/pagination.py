@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key: every page is a ``WHERE id > <cursor> ORDER BY id LIMIT n`` query,
+    so deep pages cost the same as the first one (unlike OFFSET pagination).
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
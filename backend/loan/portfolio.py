@@ -0,0 +1,161 @@
+"""
+Portfolio aggregates of loan offers: exposure, rates, term buckets and expected interest.
+
+Per-customer figures are aggregated in SQL on request. Book-wide figures are read from ``PortfolioSummary``
+rows (one per term bucket) that every offer write adjusts by its delta, so the dashboard never rescans
+the offer table. ``rebuild_portfolio_summary`` recomputes them from scratch.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Case, Count, DecimalField, F, Sum, Value, When
+from .calculator import to_decimal
+
+RATE_PLACES = Decimal('0.0001')
+# sum(amount * rate) has the scale of the amount times the scale of the rate
+WEIGHTED_FIELD = DecimalField(max_digits=30, decimal_places=4)
+
+
+def term_buckets():
+    """
+    ``[(label, upper bound)]`` of the term buckets from ``LOAN_PORTFOLIO_TERM_BUCKETS``, the last one open ended.
+    """
+    buckets = []
+    lower = 1
+    for upper in settings.LOAN_PORTFOLIO_TERM_BUCKETS:
+        buckets.append((f'{lower}-{upper}', upper))
+        lower = upper + 1
+    buckets.append((f'{lower}+', None))
+    return buckets
+
+
+def term_bucket(loan_term):
+    for label, upper in term_buckets():
+        if upper is None or loan_term <= upper:
+            return label
+
+
+def term_bucket_expression(prefix=''):
+    # SQL CASE assigning every offer its term bucket label
+    buckets = term_buckets()
+    return Case(
+        *(When(**{f'{prefix}loan_term__lte': upper}, then=Value(label)) for label, upper in buckets[:-1]),
+        default=Value(buckets[-1][0]),
+    )
+
+
+def offer_aggregates(prefix=''):
+    """
+    Aggregate expressions over loan offers, ``prefix`` is the path to the offer (e.g. ``loanoffer__``).
+    """
+    return {
+        'offer_count': Count(f'{prefix}id'),
+        'total_exposure': Sum(f'{prefix}loan_amount'),
+        'average_rate': Avg(f'{prefix}interest_rate'),
+        'rate_weighted_exposure': Sum(F(f'{prefix}loan_amount') * F(f'{prefix}interest_rate'), output_field=WEIGHTED_FIELD),
+        'expected_total_interest': Sum(f'{prefix}total_interest'),
+    }
+
+
+def summarize(row):
+    """
+    Public figures of an aggregate row: the weighted average rate is sum(amount * rate) / sum(amount).
+    """
+    exposure = Decimal(row['total_exposure'] or 0)
+    weighted = Decimal(row['rate_weighted_exposure'] or 0)
+    summary = {
+        'offer_count': row['offer_count'],
+        'total_exposure': exposure,
+        'weighted_average_rate': (weighted / exposure).quantize(RATE_PLACES) if exposure else None,
+        'expected_total_interest': Decimal(row['expected_total_interest'] or 0),
+    }
+    if 'average_rate' in row:
+        summary['average_rate'] = Decimal(row['average_rate']).quantize(RATE_PLACES) if row['average_rate'] is not None else None
+    return summary
+
+
+def bucket_aggregates(offers, by_customer=False):
+    """
+    Aggregate rows of ``offers`` per term bucket (and per customer), computed in a single GROUP BY query.
+    """
+    keys = ['customer_id', 'term_bucket'] if by_customer else ['term_bucket']
+    return offers.order_by().annotate(term_bucket=term_bucket_expression()).values(*keys).annotate(**offer_aggregates())
+
+
+def ordered_buckets(rows):
+    # term bucket summaries in bucket order, empty buckets (including emptied summary rows) left out
+    by_label = {row['term_bucket']: row for row in rows if row['offer_count']}
+    return [{'term_bucket': label, **summarize(by_label[label])} for label, _ in term_buckets() if label in by_label]
+
+
+def book_totals(rows):
+    """
+    Book-wide totals and term buckets from per-bucket rows (summary rows or ``bucket_aggregates``).
+    """
+    totals = defaultdict(Decimal)
+    for row in rows:
+        for field in ('offer_count', 'total_exposure', 'rate_weighted_exposure', 'expected_total_interest'):
+            totals[field] += Decimal(row[field] or 0)
+    totals['offer_count'] = int(totals['offer_count'])
+    return {**summarize(totals), 'term_buckets': ordered_buckets(rows)}
+
+
+def offer_deltas(offers, sign=1):
+    """
+    ``{term bucket: {field: delta}}`` that adding (``sign=1``) or removing (``sign=-1``) ``offers``
+    makes to the summary rows. Offers are model instances or dicts with their loan fields.
+    """
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for offer in offers:
+        get = offer.get if isinstance(offer, dict) else offer.__dict__.get
+        amount = to_decimal(get('loan_amount'))
+        delta = deltas[term_bucket(int(get('loan_term')))]
+        delta['offer_count'] += sign
+        delta['total_exposure'] += sign * amount
+        delta['rate_weighted_exposure'] += sign * amount * to_decimal(get('interest_rate'))
+        delta['expected_total_interest'] += sign * to_decimal(get('total_interest') or 0)
+    return deltas
+
+
+def merge_deltas(*all_deltas):
+    merged = defaultdict(lambda: defaultdict(Decimal))
+    for deltas in all_deltas:
+        for bucket, delta in deltas.items():
+            for field, value in delta.items():
+                merged[bucket][field] += value
+    return merged
+
+
+def apply_summary_deltas(deltas):
+    """
+    Add ``deltas`` (see ``offer_deltas``) to the summary rows with one ``UPDATE ... SET x = x + delta`` per bucket,
+    so concurrent writers don't overwrite each other. Call it in the transaction that writes the offers.
+    """
+    from .models import PortfolioSummary
+
+    for bucket, delta in deltas.items():
+        changes = {field: F(field) + (int(value) if field == 'offer_count' else value) for field, value in delta.items() if value}
+        if not changes:
+            continue
+        if not PortfolioSummary.objects.filter(term_bucket=bucket).update(**changes):
+            # first offer of the bucket, a concurrent writer may create the row first
+            PortfolioSummary.objects.bulk_create([PortfolioSummary(term_bucket=bucket)], ignore_conflicts=True)
+            PortfolioSummary.objects.filter(term_bucket=bucket).update(**changes)
+
+
+def rebuild_portfolio_summary(offer_model, summary_model):
+    """
+    Recompute every summary row from the offer table, e.g. after changing ``LOAN_PORTFOLIO_TERM_BUCKETS``.
+    Takes the models as arguments so data migrations can pass their historical models.
+    Returns the number of buckets written.
+    """
+    fields = ('offer_count', 'total_exposure', 'rate_weighted_exposure', 'expected_total_interest')
+    rows = [
+        summary_model(term_bucket=row['term_bucket'], **{field: row[field] or 0 for field in fields})
+        for row in bucket_aggregates(offer_model.objects.all())
+    ]
+    with transaction.atomic():
+        summary_model.objects.all().delete()
+        summary_model.objects.bulk_create(rows)
+    return len(rows)
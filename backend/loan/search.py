@@ -0,0 +1,123 @@
+"""
+Customer search by partial name or email, backed by an index the database maintains itself.
+
+- **SQLite**: an FTS5 table over ``loan_customer`` (external content, so names and emails aren't stored twice),
+  kept in sync by insert/update/delete triggers. Every query term is matched as a word prefix and results are
+  ranked by bm25. Only the first ``MAX_CANDIDATES`` matches (in rowid order) are ranked, a deliberate trade-off:
+  selective queries are ranked exactly, while a broad prefix returns the best of the oldest matching customers.
+  Ranking every match with ``ORDER BY rank`` costs about 20x more for such prefixes.
+- **PostgreSQL**: a ``pg_trgm`` GIN index on the lowercased name and email, which serves ``LIKE '%term%'``.
+  Results are ranked by ``word_similarity``, so matches at the start of a word come first.
+- Other databases fall back to unindexed ``icontains`` filters, ordered by id.
+
+Because the triggers live in the database, ``bulk_create``, ``QuerySet.update()`` and raw SQL keep the index in
+sync as well. SQLite drops the triggers when a migration rebuilds ``loan_customer``; run
+``manage.py rebuild_customer_search`` (or ``install_search_index`` in the migration) after such a migration.
+"""
+import re
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from .models import Customer
+
+SEARCH_TABLE = 'loan_customer_search'
+# lowercased name and email, the PostgreSQL index and queries must use the very same expression
+SEARCH_TEXT = "lower(first_name || ' ' || last_name || ' ' || email)"
+
+SQLITE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        first_name, last_name, email, content='loan_customer', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON loan_customer BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON loan_customer BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF first_name, last_name, email ON loan_customer BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END""",
+    # index the customers that existed before the table
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+]
+POSTGRES_INDEX_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS customer_search_trgm_idx ON loan_customer USING gin (({SEARCH_TEXT}) gin_trgm_ops)',
+]
+POSTGRES_DROP_SQL = ['DROP INDEX IF EXISTS customer_search_trgm_idx']
+
+
+def execute_for_vendor(database, statements):
+    with database.cursor() as cursor:
+        for statement in statements.get(database.vendor, []):
+            cursor.execute(statement)
+
+
+def install_search_index(database):
+    # create (or repair) the search index of the ``database`` connection, a no-op on other databases
+    execute_for_vendor(database, {'sqlite': SQLITE_INDEX_SQL, 'postgresql': POSTGRES_INDEX_SQL})
+
+
+def drop_search_index(database):
+    execute_for_vendor(database, {'sqlite': SQLITE_DROP_SQL, 'postgresql': POSTGRES_DROP_SQL})
+
+
+def search_terms(query):
+    """
+    The lowercased words of ``query``, at most ``MAX_TERMS`` of them. Punctuation separates words, like the
+    FTS5 tokenizer does, so ``"jane.doe@ex"`` searches for ``jane``, ``doe`` and ``ex``.
+    """
+    return re.findall(r'\w+', query.lower())[:settings.LOAN_CUSTOMER_SEARCH['MAX_TERMS']]
+
+
+def sqlite_search(terms, limit):
+    # every term as a quoted prefix query. The candidates are capped, in rowid order, before they are ranked,
+    # so a query with more than MAX_CANDIDATES matches is only ranked among the oldest of them (see module docs)
+    match = ' AND '.join(f'"{term}"*' for term in terms)
+    return Customer.objects.raw(
+        f"""SELECT customer.* FROM loan_customer AS customer JOIN (
+                SELECT rowid, bm25({SEARCH_TABLE}, 2.0, 2.0, 1.0) AS score FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE} MATCH %s LIMIT %s
+            ) AS matches ON matches.rowid = customer.id
+            ORDER BY matches.score, customer.id LIMIT %s""",
+        [match, settings.LOAN_CUSTOMER_SEARCH['MAX_CANDIDATES'], limit],
+    )
+
+
+def postgres_search(terms, limit):
+    conditions = ' AND '.join(f'{SEARCH_TEXT} LIKE %s' for _ in terms)
+    return Customer.objects.raw(
+        f"""SELECT * FROM loan_customer WHERE {conditions}
+            ORDER BY word_similarity(%s, {SEARCH_TEXT}) DESC, id LIMIT %s""",
+        [*(f'%{term}%' for term in terms), ' '.join(terms), limit],
+    )
+
+
+def search_customers(query, limit):
+    """
+    Up to ``limit`` customers matching every word of ``query``, best matches first: SQLite matches the words
+    as prefixes of name and email words, other databases anywhere in them. An empty list when ``query`` has no words.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'sqlite':
+        return list(sqlite_search(terms, limit))
+    if connection.vendor == 'postgresql':
+        return list(postgres_search(terms, limit))
+    conditions = Q()
+    for term in terms:
+        conditions &= Q(first_name__icontains=term) | Q(last_name__icontains=term) | Q(email__icontains=term)
+    return list(Customer.objects.filter(conditions).order_by('id')[:limit])
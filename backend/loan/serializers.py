@@ -1,20 +1,59 @@
+import math
+import time
+from contextlib import nullcontext
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Customer, LoanOffer
+from rest_framework.settings import api_settings
+from .cache import invalidate_customer_details
+from .metrics import SERIALIZER_VALIDATION
+from .models import PAYMENT_INPUT_FIELDS, PAYMENT_OVERFLOW_ERROR, Customer, Job, LoanOffer, storable_payment
+from .portfolio import apply_summary_deltas, offer_deltas
+from .simulation import RATE_MODELS
+from .validation import parse_calculator_input
 
-class CustomerSerializer(serializers.ModelSerializer):
+class TimedValidationMixin:
+    # records the time spent in is_valid() in the serializer validation metric
+    def is_valid(self, *, raise_exception=False):
+        started = time.perf_counter()
+        try:
+            return super().is_valid(raise_exception=raise_exception)
+        finally:
+            SERIALIZER_VALIDATION.observe(time.perf_counter() - started, serializer=type(self).__name__)
+
+DUPLICATE_EMAIL_ERROR = 'customer with this email already exists.'
+
+class CustomerSerializer(TimedValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
+        # email uniqueness is left to the unique constraint, see create()
+        extra_kwargs = {'email': {'validators': []}}
 
-class LoanOfferSerializer(serializers.ModelSerializer):
+    # a single INSERT instead of a uniqueness SELECT before it, which concurrent creates could slip between.
+    # Inside a transaction a savepoint keeps it usable when the insert conflicts, in autocommit mode none is needed
+    def create(self, validated_data):
+        try:
+            with transaction.atomic() if transaction.get_connection().in_atomic_block else nullcontext():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Customer.objects.filter(email=validated_data['email']).exists():
+                raise
+            raise serializers.ValidationError({'email': [DUPLICATE_EMAIL_ERROR]}, code='unique')
+
+class LoanOfferSerializer(TimedValidationMixin, serializers.ModelSerializer):
+    # monthly_payment, total_interest and total_payable are read-only, they are computed when the offer is saved
     class Meta:
         model = LoanOffer
         fields = '__all__'
 
-    # custom validator to check if loan term is positive
+    # custom validator to check if loan term is positive, and short enough for the stored payment columns
     def validate_loan_term(self, value):
         if value <= 0:
             raise serializers.ValidationError("Loan term must be a positive value.")
+        if value > settings.LOAN_OFFER_MAX_TERM:
+            raise serializers.ValidationError(f"Loan term must be at most {settings.LOAN_OFFER_MAX_TERM} months.")
         return value
 
     # custom validator to check if interest rate is positive
@@ -27,4 +66,516 @@ class LoanOfferSerializer(serializers.ModelSerializer):
     def validate_loan_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError("Loan amount must be a positive value.")
-        return value
\ No newline at end of file
+        return value
+
+    # the field limits keep the stored payment columns in range, this catches whatever they would let through
+    def validate(self, attrs):
+        terms = [attrs.get(field, getattr(self.instance, field, None)) for field in PAYMENT_INPUT_FIELDS]
+        if None not in terms and storable_payment(LoanOffer, *terms) is None:
+            raise serializers.ValidationError(PAYMENT_OVERFLOW_ERROR, code='overflow')
+        return attrs
+
+class CustomerDetailSerializer(CustomerSerializer):
+    # the customer's offers with their computed monthly payments, for ?expand=offers
+    offers = LoanOfferSerializer(source='loanoffer_set', many=True, read_only=True)
+
+
+class LoanOfferTermsSerializer(LoanOfferSerializer):
+    """
+    Only the loan amount, interest rate and loan term of an offer, validated with the ``LoanOfferSerializer`` rules.
+    """
+    class Meta(LoanOfferSerializer.Meta):
+        fields = ('loan_amount', 'interest_rate', 'loan_term')
+
+
+class BulkListSerializer(TimedValidationMixin, serializers.ListSerializer):
+    """
+    ListSerializer for bulk ingestion.
+    Every record is validated on its own: invalid records are collected in ``record_errors`` (keyed by their
+    index in the payload) instead of failing the whole list, and valid records are written with ``bulk_create``
+    in chunks of ``LOAN_BULK_CHUNK_SIZE``, one transaction per chunk.
+    """
+
+    # hook for subclasses to resolve lookups for the whole payload at once,
+    # returns errors of records that can be rejected before field validation
+    def prefetch(self, data):
+        return {}
+
+    # indexes of records that update an existing row instead of creating one, set by prefetch
+    existing_indexes = frozenset()
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='not_a_list')
+
+        self.record_errors = self.prefetch(data)
+        self.valid_indexes = []
+        validated = []
+        for index, record in enumerate(data):
+            if index in self.record_errors:
+                continue
+            try:
+                validated.append(self.child.run_validation(record))
+            except serializers.ValidationError as exc:
+                self.record_errors[index] = exc.detail
+            else:
+                self.valid_indexes.append(index)
+        return validated
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        chunk_size = settings.LOAN_BULK_CHUNK_SIZE
+        records = list(zip(self.valid_indexes, (self.build(attrs) for attrs in validated_data)))
+        options = self.bulk_create_options()
+
+        self.created_ids = {}
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([instance for _, instance in chunk], **options)
+                    self.after_bulk_create([instance for _, instance in chunk])
+            except IntegrityError:
+                # a conflicting row was written concurrently, retry the chunk row by row so only it fails
+                for _, instance in chunk:
+                    instance.pk = None
+                self.create_one_by_one(chunk)
+                continue
+            self.created_ids.update((index, instance.pk) for index, instance in chunk)
+        return [instance for _, instance in records if instance.pk is not None]
+
+    # hook for subclasses to pass conflict handling options to bulk_create
+    def bulk_create_options(self):
+        return {}
+
+    # hook for subclasses to do what model signals would, runs in the transaction of each bulk_create chunk
+    def after_bulk_create(self, instances):
+        pass
+
+    # unsaved model instance for a validated record
+    def build(self, attrs):
+        return self.child.Meta.model(**attrs)
+
+    def create_one_by_one(self, chunk):
+        for index, instance in chunk:
+            try:
+                with transaction.atomic():
+                    instance.save(force_insert=True)
+            except IntegrityError as exc:
+                instance.pk = None
+                self.record_errors[index] = {api_settings.NON_FIELD_ERRORS_KEY: [str(exc)]}
+            else:
+                self.created_ids[index] = instance.pk
+
+    # number of written records that created a row and that updated one
+    def written_counts(self):
+        updated = len(self.existing_indexes & self.created_ids.keys())
+        return len(self.created_ids) - updated, updated
+
+    def results(self, size):
+        """
+        Per-record outcome in payload order: ``{"id": ...}`` or ``{"errors": {...}}``.
+        """
+        return [
+            {'id': self.created_ids[index]} if index in self.created_ids else {'errors': self.record_errors[index]}
+            for index in range(size)
+        ]
+
+
+class BulkCustomerListSerializer(BulkListSerializer):
+    """
+    With ``upsert`` in the context, customers whose email exists get the names of the payload instead of
+    an error: every chunk is a single ``INSERT ... ON CONFLICT (email) DO UPDATE`` statement.
+    """
+
+    @property
+    def upsert(self):
+        return self.context.get('upsert', False)
+
+    def bulk_create_options(self):
+        if not self.upsert:
+            return {}
+        return {'update_conflicts': True, 'unique_fields': ['email'], 'update_fields': ['first_name', 'last_name', 'updated_at']}
+
+    # upserted customers don't send post_save, drop their cached details
+    def after_bulk_create(self, instances):
+        if self.upsert:
+            invalidate_customer_details(instance.pk for instance in instances)
+
+    # reject emails that repeat within the payload, or already exist unless upserting, with a single query.
+    # When upserting, the same query tells which records update a customer rather than create one
+    def prefetch(self, data):
+        emails = {}
+        errors = {}
+        for index, record in enumerate(data):
+            if isinstance(record, dict) and isinstance(record.get('email'), str):
+                email = record['email'].strip()
+                if email in emails:
+                    errors[index] = {'email': ['Email appears more than once in this batch.']}
+                else:
+                    emails[email] = index
+
+        existing = Customer.objects.filter(email__in=list(emails)).values_list('email', flat=True)
+        if self.upsert:
+            self.existing_indexes = {emails[email] for email in existing}
+            return errors
+        for email in existing:
+            errors[emails[email]] = {'email': [DUPLICATE_EMAIL_ERROR]}
+        return errors
+
+
+class BulkCustomerSerializer(CustomerSerializer):
+    # uniqueness is checked for the whole payload by BulkCustomerListSerializer.prefetch
+    class Meta(CustomerSerializer.Meta):
+        list_serializer_class = BulkCustomerListSerializer
+
+
+class PrefetchedCustomerField(serializers.PrimaryKeyRelatedField):
+    """
+    Customer id field that checks ids against ``known_pks`` (set by the parent list serializer
+    from a single query) instead of running one SELECT per record.
+    """
+    known_pks = None
+
+    def to_internal_value(self, data):
+        if self.known_pks is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.known_pks:
+            self.fail('does_not_exist', pk_value=data)
+        return Customer(pk=pk)
+
+
+class BulkLoanOfferListSerializer(BulkListSerializer):
+
+    # bulk_create skips save(), so the stored payment columns are filled here
+    def build(self, attrs):
+        offer = super().build(attrs)
+        offer.compute_payments()
+        return offer
+
+    # bulk_create doesn't send post_save, the portfolio summary is adjusted here
+    # (offers retried one by one with save() go through the signals)
+    def after_bulk_create(self, instances):
+        apply_summary_deltas(offer_deltas(instances))
+
+    # bulk_create doesn't send post_save, drop the cached details of the customers that got offers
+    def create(self, validated_data):
+        offers = super().create(validated_data)
+        invalidate_customer_details(offer.customer_id for offer in offers)
+        return offers
+
+    # resolve every referenced customer with a single query
+    def prefetch(self, data):
+        pks = set()
+        for record in data:
+            if isinstance(record, dict):
+                try:
+                    pks.add(int(record.get('customer')))
+                except (TypeError, ValueError):
+                    pass
+        self.child.fields['customer'].known_pks = set(
+            Customer.objects.filter(pk__in=list(pks)).values_list('pk', flat=True)
+        )
+        return {}
+
+
+class BulkLoanOfferSerializer(LoanOfferSerializer):
+    customer = PrefetchedCustomerField(queryset=Customer.objects.all())
+
+    class Meta(LoanOfferSerializer.Meta):
+        list_serializer_class = BulkLoanOfferListSerializer
+
+class FiniteFloatField(serializers.FloatField):
+    # FloatField accepts "nan" and "inf", which no loan calculation can use
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        if not math.isfinite(value):
+            self.fail('invalid')
+        return value
+
+# the loan values the solve endpoint can solve for, given the other three
+SOLVABLE_FIELDS = ('loan_amount', 'interest_rate', 'loan_term', 'monthly_payment')
+
+class LoanSolveSerializer(TimedValidationMixin, serializers.Serializer):
+    # exactly three of the four fields, the missing one is solved for
+    loan_amount = FiniteFloatField(required=False)
+    interest_rate = FiniteFloatField(required=False)
+    loan_term = serializers.IntegerField(required=False)
+    monthly_payment = FiniteFloatField(required=False)
+
+    def validate_loan_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Loan amount must be a positive value.")
+        return value
+
+    def validate_interest_rate(self, value):
+        if value < 0:
+            raise serializers.ValidationError("Interest rate must be a non-negative value.")
+        return value
+
+    def validate_loan_term(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Loan term must be a positive value.")
+        return value
+
+    def validate_monthly_payment(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Monthly payment must be a positive value.")
+        return value
+
+    def validate(self, attrs):
+        missing = [field for field in SOLVABLE_FIELDS if field not in attrs]
+        if len(missing) != 1:
+            raise serializers.ValidationError(f'Provide exactly three of {", ".join(SOLVABLE_FIELDS)}.')
+        attrs['solve_for'] = missing[0]
+        return attrs
+
+class RangeField(serializers.Field):
+    """
+    A non-empty list of numbers, or a ``{"start", "stop", "step"}`` range whose stop is included.
+    Values are validated by ``child``.
+    """
+    default_error_messages = {
+        'invalid': 'Expected a list of values or an object with start, stop and step.',
+        'empty': 'This list may not be empty.',
+        'step': 'Step must be a positive value.',
+        'stop': 'Stop must not be smaller than start.',
+        'too_long': 'Expected at most {max_length} values.',
+    }
+
+    def __init__(self, child, **kwargs):
+        self.child = child
+        super().__init__(**kwargs)
+        self.child.bind(field_name='', parent=self)
+
+    def to_internal_value(self, data):
+        max_length = settings.LOAN_CALCULATOR_GRID_MAX_CELLS
+        if isinstance(data, dict):
+            if not {'start', 'stop', 'step'} <= set(data):
+                self.fail('invalid')
+            start, stop, step = (self.child.run_validation(data[key]) for key in ('start', 'stop', 'step'))
+            if step <= 0:
+                self.fail('step')
+            # tolerate floating point error in (stop - start) / step so the stop is kept
+            count = math.floor((stop - start) / step + 1e-9) + 1
+            if count < 1:
+                self.fail('stop')
+            if count > max_length:
+                self.fail('too_long', max_length=max_length)
+            values = [start + step * index for index in range(count)]
+            return [round(value, 10) for value in values] if isinstance(step, float) else values
+        if not isinstance(data, list):
+            self.fail('invalid')
+        if len(data) > max_length:
+            self.fail('too_long', max_length=max_length)
+        values = [self.child.run_validation(value) for value in data]
+        if not values:
+            self.fail('empty')
+        return values
+
+    def to_representation(self, value):
+        return value
+
+class PaymentGridSerializer(TimedValidationMixin, serializers.Serializer):
+    loan_amount = FiniteFloatField()
+    interest_rates = RangeField(child=FiniteFloatField(min_value=0))
+    loan_terms = RangeField(child=serializers.IntegerField(min_value=1))
+
+    def validate_loan_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Loan amount must be a positive value.")
+        return value
+
+    def validate(self, attrs):
+        max_cells = settings.LOAN_CALCULATOR_GRID_MAX_CELLS
+        if len(attrs['interest_rates']) * len(attrs['loan_terms']) > max_cells:
+            raise serializers.ValidationError(f'A grid may contain at most {max_cells} cells.')
+        return attrs
+
+
+class CustomerSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_limit(self, value):
+        max_limit = settings.LOAN_CUSTOMER_SEARCH['MAX_LIMIT']
+        if value > max_limit:
+            raise serializers.ValidationError(f'Ensure this value is less than or equal to {max_limit}.')
+        return value
+
+
+class RateSimulationSerializer(TimedValidationMixin, serializers.Serializer):
+    """
+    Rate model and size of a Monte Carlo simulation, see ``loan.simulation``. Rates are annual, in percent.
+    """
+    model = serializers.ChoiceField(choices=list(RATE_MODELS), default='random_walk')
+    volatility = FiniteFloatField(min_value=0, default=1.0)
+    drift = FiniteFloatField(default=0.0)
+    initial_rate = FiniteFloatField(required=False)
+    mean_rate = FiniteFloatField(required=False)
+    reversion = FiniteFloatField(min_value=0, default=0.1)
+    paths = serializers.IntegerField(min_value=1, default=10000)
+    seed = serializers.IntegerField(min_value=0, required=False)
+    reset_months = serializers.IntegerField(min_value=1, default=12)
+    percentiles = serializers.ListField(
+        child=FiniteFloatField(min_value=0, max_value=100), min_length=1, max_length=20, default=[5, 50, 95, 99],
+    )
+
+    def validate(self, attrs):
+        if attrs['model'] == 'vasicek':
+            missing = [name for name in ('initial_rate', 'mean_rate') if name not in attrs]
+            if missing:
+                raise serializers.ValidationError({
+                    name: ['This field is required for the vasicek model.'] for name in missing
+                })
+        return attrs
+
+
+class OfferSimulationSerializer(RateSimulationSerializer):
+    # a single offer, or the portfolio of a customer's offers, bounded by LOAN_SIMULATION
+    offer = serializers.PrimaryKeyRelatedField(queryset=LoanOffer.objects.all(), required=False)
+    customer = serializers.PrimaryKeyRelatedField(queryset=Customer.objects.all(), required=False)
+
+    def validate_paths(self, value):
+        max_paths = settings.LOAN_SIMULATION['MAX_PATHS']
+        if value > max_paths:
+            raise serializers.ValidationError(f'Ensure this value is less than or equal to {max_paths}.')
+        return value
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if ('offer' in attrs) == ('customer' in attrs):
+            raise serializers.ValidationError('Provide either an offer or a customer.')
+        if 'offer' in attrs:
+            offer = attrs['offer']
+            attrs['offers'] = [(offer.loan_amount, offer.interest_rate, offer.loan_term)]
+        else:
+            offers = attrs['customer'].loanoffer_set.values_list('loan_amount', 'interest_rate', 'loan_term')
+            attrs['offers'] = list(offers)
+            if not attrs['offers']:
+                raise serializers.ValidationError({'customer': ['Customer has no loan offers.']})
+
+        steps = len(attrs['offers']) * attrs['paths'] * max(term for _, _, term in attrs['offers'])
+        if steps > settings.LOAN_SIMULATION['MAX_REQUEST_STEPS']:
+            raise serializers.ValidationError(
+                'This simulation is too large for a request, run it with "manage.py simulate_rates".'
+            )
+        return attrs
+
+
+class PortfolioFiguresSerializer(serializers.Serializer):
+    offer_count = serializers.IntegerField()
+    total_exposure = serializers.DecimalField(max_digits=20, decimal_places=2)
+    weighted_average_rate = serializers.DecimalField(max_digits=10, decimal_places=4, allow_null=True)
+    expected_total_interest = serializers.DecimalField(max_digits=20, decimal_places=2)
+
+class TermBucketSerializer(PortfolioFiguresSerializer):
+    term_bucket = serializers.CharField()
+
+class PortfolioSerializer(PortfolioFiguresSerializer):
+    term_buckets = TermBucketSerializer(many=True)
+
+class PortfolioCustomerSerializer(PortfolioSerializer):
+    customer = serializers.IntegerField()
+    average_rate = serializers.DecimalField(max_digits=10, decimal_places=4, allow_null=True)
+
+class ScenarioListField(serializers.Field):
+    """
+    A non-empty list of ``{loan_amount, interest_rate, loan_term}`` scenarios, checked with the calculator's
+    ``parse_calculator_input`` and returned as ``[loan_amounts, interest_rates, loan_terms]`` columns.
+    """
+    default_error_messages = {
+        'invalid': 'Expected a list of scenarios.',
+        'empty': 'This list may not be empty.',
+        'too_long': 'Expected at most {max_length} scenarios.',
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            self.fail('invalid')
+        if not data:
+            self.fail('empty')
+        max_length = settings.LOAN_JOBS['MAX_SCENARIOS']
+        if len(data) > max_length:
+            self.fail('too_long', max_length=max_length)
+
+        columns = ([], [], [])
+        for index, scenario in enumerate(data):
+            values, errors = parse_calculator_input(scenario)
+            if errors:
+                # the calculator's error body has a single message
+                raise serializers.ValidationError(f'Scenario {index}: {next(iter(errors.values()))}')
+            for column, value in zip(columns, values):
+                column.append(value)
+        return list(columns)
+
+    def to_representation(self, value):
+        return value
+
+# formats of job result files
+JOB_RESULT_FORMATS = ('csv', 'ndjson')
+
+class PriceScenariosJobSerializer(serializers.Serializer):
+    # an explicit list of scenarios, or every loan amount x interest rate x loan term combination
+    scenarios = ScenarioListField(required=False)
+    loan_amounts = RangeField(child=FiniteFloatField(), required=False)
+    interest_rates = RangeField(child=FiniteFloatField(min_value=0), required=False)
+    loan_terms = RangeField(child=serializers.IntegerField(min_value=1), required=False)
+    format = serializers.ChoiceField(choices=JOB_RESULT_FORMATS, default='csv')
+
+    def validate_loan_amounts(self, value):
+        if any(amount <= 0 for amount in value):
+            raise serializers.ValidationError("Loan amount must be a positive value.")
+        return value
+
+    def validate(self, attrs):
+        axes = [attrs.get(field) for field in ('loan_amounts', 'interest_rates', 'loan_terms')]
+        if ('scenarios' in attrs) == any(axis is not None for axis in axes) or ('scenarios' not in attrs and None in axes):
+            raise serializers.ValidationError('Provide either scenarios or loan_amounts, interest_rates and loan_terms.')
+        max_scenarios = settings.LOAN_JOBS['MAX_SCENARIOS']
+        if 'scenarios' not in attrs and math.prod(len(axis) for axis in axes) > max_scenarios:
+            raise serializers.ValidationError(f'A job may price at most {max_scenarios} scenarios.')
+        return attrs
+
+class ExportOfferSchedulesJobSerializer(serializers.Serializer):
+    # the offers of one customer, every offer without it
+    customer = serializers.IntegerField(required=False)
+    format = serializers.ChoiceField(choices=JOB_RESULT_FORMATS, default='csv')
+
+    def validate_customer(self, value):
+        if not Customer.objects.filter(pk=value).exists():
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return value
+
+JOB_PARAMS_SERIALIZERS = {
+    Job.Kind.PRICE_SCENARIOS: PriceScenariosJobSerializer,
+    Job.Kind.EXPORT_OFFER_SCHEDULES: ExportOfferSchedulesJobSerializer,
+}
+
+class JobSerializer(serializers.ModelSerializer):
+    # download URL of the result file, once the job succeeded
+    result = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'params', 'status', 'progress', 'total', 'error', 'created_at', 'started_at', 'finished_at', 'result']
+        read_only_fields = ['status', 'progress', 'total', 'error', 'started_at', 'finished_at']
+        # the parameters may hold millions of scenarios, they are never sent back
+        extra_kwargs = {'params': {'write_only': True}}
+
+    def get_result(self, job):
+        return reverse('job-result', args=[job.pk]) if job.status == Job.Status.SUCCEEDED else None
+
+    def validate(self, attrs):
+        params = JOB_PARAMS_SERIALIZERS[attrs['kind']](data=attrs.get('params', {}))
+        if not params.is_valid():
+            raise serializers.ValidationError({'params': params.errors})
+        attrs['params'] = params.validated_data
+        return attrs
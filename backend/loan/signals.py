@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .cache import invalidate_customer_details
+from .models import Customer, LoanOffer
+from .portfolio import apply_summary_deltas, merge_deltas, offer_deltas
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Run the ``SQLITE_PRAGMAS`` setting (e.g. WAL journaling) on every new SQLite connection.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_detail(sender, instance, **kwargs):
+    invalidate_customer_details([instance.pk])
+
+
+@receiver(post_save, sender=LoanOffer)
+@receiver(post_delete, sender=LoanOffer)
+def invalidate_offer_customer_detail(sender, instance, **kwargs):
+    invalidate_customer_details([instance.customer_id])
+
+
+# loan fields an offer contributes to the portfolio summary with
+SUMMARY_FIELDS = ('loan_amount', 'interest_rate', 'loan_term', 'total_interest')
+
+
+@receiver(pre_save, sender=LoanOffer)
+def remember_offer_summary_state(sender, instance, raw=False, **kwargs):
+    # an update replaces the offer's previous contribution, which only the database still knows
+    instance._summary_state = None
+    if not raw and instance.pk is not None and not instance._state.adding:
+        instance._summary_state = LoanOffer.objects.filter(pk=instance.pk).values(*SUMMARY_FIELDS).first()
+
+
+@receiver(post_save, sender=LoanOffer)
+def add_offer_to_summary(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_summary_state', None)
+    apply_summary_deltas(merge_deltas(offer_deltas([instance]), offer_deltas([previous] if previous else [], sign=-1)))
+
+
+@receiver(post_delete, sender=LoanOffer)
+def remove_offer_from_summary(sender, instance, **kwargs):
+    apply_summary_deltas(offer_deltas([instance], sign=-1))
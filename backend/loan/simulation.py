@@ -0,0 +1,172 @@
+"""
+Monte Carlo simulation of loan offers under variable interest rates.
+
+A rate model simulates paths of a reference index (annual rate in percent), one step per month. Offers keep their
+spread over the index: in month ``m`` an offer's rate is ``interest_rate + index[m] - index[0]``, floored at 0.
+Every ``reset_months`` the payment is re-amortized over the remaining balance and term at the current rate, like
+an adjustable-rate loan. Each path reports the highest monthly payment and the total interest, summed over the
+offers, so a portfolio's figures reflect that all its offers follow the same rates.
+
+Paths are simulated in shards of ``PATHS_PER_SHARD``, each seeded from its own child of the seed's
+``SeedSequence``: results only depend on the seed, not on how many processes computed the shards. Within a shard
+the work is vectorized over offers and paths, with one NumPy step per month.
+"""
+import math
+from django.conf import settings
+from .calculator import monthly_payments
+
+MONTH = 1 / 12
+
+
+def random_walk_index(rng, paths, months, volatility, drift=0.0, initial_rate=0.0):
+    import numpy as np
+    # arithmetic random walk with normally distributed monthly changes, ``volatility`` and ``drift`` per year
+    steps = drift * MONTH + volatility * math.sqrt(MONTH) * rng.standard_normal((paths, months))
+    index = np.empty((paths, months + 1))
+    index[:, 0] = initial_rate
+    np.cumsum(steps, axis=1, out=index[:, 1:])
+    index[:, 1:] += initial_rate
+    return index
+
+
+def vasicek_index(rng, paths, months, volatility, initial_rate, mean_rate, reversion):
+    import numpy as np
+    # exact discretization of dr = reversion * (mean_rate - r) dt + volatility dW
+    decay = math.exp(-reversion * MONTH)
+    if reversion > 0:
+        deviation = volatility * math.sqrt((1 - decay ** 2) / (2 * reversion))
+    else:
+        deviation = volatility * math.sqrt(MONTH)
+    shocks = deviation * rng.standard_normal((paths, months))
+    index = np.empty((paths, months + 1))
+    index[:, 0] = initial_rate
+    for month in range(months):
+        index[:, month + 1] = mean_rate + (index[:, month] - mean_rate) * decay + shocks[:, month]
+    return index
+
+
+# model name -> (index function, its parameters)
+RATE_MODELS = {
+    'random_walk': (random_walk_index, ('volatility', 'drift', 'initial_rate')),
+    'vasicek': (vasicek_index, ('volatility', 'initial_rate', 'mean_rate', 'reversion')),
+}
+
+
+def simulate_offers(amounts, rates, terms, index, reset_months, monthly_paid):
+    """
+    Amortize the offers, sorted by descending term, over every index path. Adds what they pay each month to
+    ``monthly_paid`` (months x paths) and returns the per-path total interest.
+    ``index`` has one row of ``max(terms) + 1`` levels per path.
+    """
+    import numpy as np
+    paths = index.shape[0]
+    terms = terms.astype(np.int64)
+    balance = np.repeat(amounts[:, np.newaxis], paths, axis=1)
+    payment = np.zeros_like(balance)
+    monthly_rate = np.zeros_like(balance)
+    interest = np.empty_like(balance)
+    total_interest = np.zeros(paths)
+    shift = index - index[:, :1]
+
+    for month in range(int(terms[0])):
+        # offers whose term is over are at the end, only the first ``active`` rows are still paying
+        active = int(np.searchsorted(-terms, -month, side='left'))
+        rows = slice(0, active)
+        if month % reset_months == 0:
+            monthly_rate[rows] = np.maximum(rates[rows, np.newaxis] + shift[np.newaxis, :, month], 0) / 1200
+            remaining = (terms[rows] - month)[:, np.newaxis]
+            payment[rows] = monthly_payments(balance[rows], monthly_rate[rows] * 1200, remaining)
+        np.multiply(balance[rows], monthly_rate[rows], out=interest[rows])
+        # the last payment settles whatever rounding left of the balance
+        ending = slice(int(np.searchsorted(-terms, -(month + 1), side='left')), active)
+        payment[ending] = balance[ending] + interest[ending]
+        balance[rows] += interest[rows]
+        balance[rows] -= payment[rows]
+        total_interest += interest[rows].sum(axis=0)
+        monthly_paid[month] += payment[rows].sum(axis=0)
+    return total_interest
+
+
+def simulate_shard(amounts, rates, terms, model, parameters, seed, paths, reset_months, offer_chunk_size):
+    """
+    Simulate ``paths`` paths of the rate ``model`` seeded with ``seed`` (a ``SeedSequence``) for the offers,
+    ``offer_chunk_size`` offers at a time. Returns per-path arrays of the highest monthly payment and the total
+    interest of all offers together. Runs in a process pool worker and never touches the database.
+    """
+    import numpy as np
+    months = int(terms.max())
+    function, names = RATE_MODELS[model]
+    index = function(np.random.default_rng(seed), paths, months, **{
+        name: parameters[name] for name in names if name in parameters
+    })
+    monthly_paid = np.zeros((months, paths))
+    total_interest = np.zeros(paths)
+    for start in range(0, len(amounts), offer_chunk_size):
+        chunk = slice(start, start + offer_chunk_size)
+        total_interest += simulate_offers(amounts[chunk], rates[chunk], terms[chunk], index, reset_months, monthly_paid)
+    return monthly_paid.max(axis=0), total_interest
+
+
+def simulation_tasks(offers, model, parameters, paths, seed, reset_months, paths_per_shard, offer_chunk_size):
+    """
+    ``(function, args)`` of every shard. ``offers`` are ``(loan_amount, interest_rate, loan_term)`` triples.
+    """
+    import numpy as np
+    amounts, rates, terms = (np.asarray(column, dtype=np.float64) for column in zip(*offers))
+    # longest terms first, so each month only works on the leading rows of the offers still paying
+    order = np.argsort(-terms, kind='stable')
+    amounts, rates, terms = amounts[order], rates[order], terms[order]
+    sizes = [min(paths_per_shard, paths - start) for start in range(0, paths, paths_per_shard)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [
+        (simulate_shard, (amounts, rates, terms, model, parameters, shard_seed, size, reset_months, offer_chunk_size))
+        for shard_seed, size in zip(seeds, sizes)
+    ]
+
+
+def summarize_simulation(offers, shards, percentiles):
+    """
+    Percentiles of the per-path results of all shards, next to the figures at today's fixed rates.
+    """
+    import numpy as np
+    peak_payment = np.concatenate([shard[0] for shard in shards])
+    total_interest = np.concatenate([shard[1] for shard in shards])
+    amounts, rates, terms = (np.asarray(column, dtype=np.float64) for column in zip(*offers))
+    fixed_payments = monthly_payments(amounts, rates, terms)
+
+    def distribution(values):
+        return {f'p{percentile:g}': round(float(value), 2) for percentile, value in zip(percentiles, np.percentile(values, percentiles))}
+
+    return {
+        'offers': len(offers),
+        'paths': len(peak_payment),
+        'fixed_rate': {
+            'monthly_payment': round(float(fixed_payments.sum()), 2),
+            'total_interest': round(float((fixed_payments * terms - amounts).sum()), 2),
+        },
+        'peak_monthly_payment': distribution(peak_payment),
+        'total_interest': distribution(total_interest),
+    }
+
+
+def simulate(offers, options, executor=None):
+    """
+    Run the simulation described by the validated ``options`` of ``RateSimulationSerializer`` for ``offers``,
+    shard by shard, or on the ``executor`` process pool. Without a seed one is drawn and reported.
+    """
+    import numpy as np
+    config = settings.LOAN_SIMULATION
+    seed = options.get('seed')
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    _, names = RATE_MODELS[options['model']]
+    parameters = {name: options[name] for name in names if name in options}
+    tasks = simulation_tasks(
+        offers, options['model'], parameters, options['paths'], seed, options['reset_months'],
+        config['PATHS_PER_SHARD'], config['OFFER_CHUNK_SIZE'],
+    )
+    if executor is None:
+        shards = [function(*args) for function, args in tasks]
+    else:
+        shards = [future.result() for future in [executor.submit(function, *args) for function, args in tasks]]
+    return {'model': options['model'], 'seed': seed, **summarize_simulation(offers, shards, options['percentiles'])}
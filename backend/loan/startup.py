@@ -0,0 +1,82 @@
+"""
+Cold start measurements of ``python manage.py startup_time``.
+
+Every run starts a fresh interpreter, like a new worker, which imports a WSGI entry point (Django setup,
+settings, apps and middleware) and then serves requests straight through the WSGI callable, without a server
+or a network in between. The parent process only collects the timings, its own imports don't count.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+
+# runs in the fresh interpreter, only the standard library is imported before the clock starts
+STARTUP_SCRIPT = """
+import importlib, io, json, sys, time
+started = time.perf_counter()
+application = getattr(importlib.import_module(sys.argv[1]), 'application')
+imported = time.perf_counter()
+loaded = set(sys.modules)
+path, _, query = sys.argv[2].partition('?')
+timings, statuses = [], []
+for _ in range(2):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    request_started = time.perf_counter()
+    response = application(environ, lambda status, headers: statuses.append(int(status.split()[0])))
+    b''.join(response)
+    response.close()
+    timings.append(time.perf_counter() - request_started)
+print(json.dumps({
+    'import': imported - started, 'first_request': timings[0], 'second_request': timings[1], 'statuses': statuses,
+    'modules': len(loaded), 'loaded': sorted(loaded), 'loaded_by_request': sorted(set(sys.modules) - loaded),
+}))
+"""
+
+# the first request only touches the calculator, no database
+DEFAULT_PATH = '/api/v1/loan-calculator?loan_amount=10000&interest_rate=5.5&loan_term=24'
+
+
+def startup_run(entry_point, settings_module, path):
+    """
+    Import ``entry_point`` (a module with a WSGI ``application``) in a fresh interpreter using ``settings_module``
+    and send it two GET requests of ``path``. Returns the timings (in seconds) and the modules it loaded.
+    """
+    environment = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    # settings_production (and the API profile) only serve the hosts they are told to
+    environment.setdefault('DJANGO_ALLOWED_HOSTS', 'localhost')
+    completed = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT, entry_point, path],
+        cwd=settings.BASE_DIR, env=environment, capture_output=True, text=True,
+    )
+    if completed.returncode:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'startup failed')
+    return json.loads(completed.stdout)
+
+
+def measure_startup(entry_point, settings_module, path=DEFAULT_PATH, runs=5, watch=('numpy', 'loan.views')):
+    """
+    Median import time, first and second request latency, cold start (import and first request, the wait of the
+    first client) in seconds and module count of ``runs`` cold starts, plus when each of the ``watch`` modules got
+    imported: ``"startup"``, ``"first request"`` or ``None``.
+    """
+    results = [startup_run(entry_point, settings_module, path) for _ in range(runs)]
+    for result in results:
+        result['cold_start'] = result['import'] + result['first_request']
+    last = results[-1]
+    return {
+        **{
+            measure: statistics.median(result[measure] for result in results)
+            for measure in ('import', 'first_request', 'second_request', 'cold_start', 'modules')
+        },
+        'statuses': last['statuses'],
+        'watched': {
+            module: 'startup' if module in last['loaded'] else 'first request' if module in last['loaded_by_request'] else None
+            for module in watch
+        },
+    }
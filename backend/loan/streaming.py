@@ -0,0 +1,40 @@
+import csv
+import json
+
+
+class Echo:
+    """
+    File-like object that hands back whatever is written to it,
+    so ``csv.writer`` can format rows for a streaming response without buffering them.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_text(rows):
+    # CSV lines of an iterable of rows
+    writer = csv.writer(Echo())
+    return ''.join(writer.writerow(row) for row in rows)
+
+
+def ndjson_text(header, rows):
+    # newline delimited JSON objects, keyed by ``header``, of an iterable of rows
+    return ''.join(json.dumps(dict(zip(header, row))) + '\n' for row in rows)
+
+
+def csv_lines(header, row_chunks):
+    """
+    Yield a CSV header followed by one text chunk per iterable of rows in ``row_chunks``.
+    """
+    yield csv_text([header])
+    for rows in row_chunks:
+        yield csv_text(rows)
+
+
+def ndjson_lines(header, row_chunks):
+    """
+    Yield one text chunk of newline delimited JSON objects (keyed by ``header``) per iterable of rows.
+    """
+    for rows in row_chunks:
+        yield ndjson_text(header, rows)
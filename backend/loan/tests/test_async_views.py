@@ -0,0 +1,82 @@
+from django.test import TestCase
+from django.urls import reverse
+from loan.cache import customer_detail_cache
+from loan.models import Customer, LoanOffer
+
+# This class contains tests for the async calculator and read endpoints.
+class AsyncViewsTests(TestCase):
+
+    # The setUp method is called before each test. It creates a customer with two offers and empties the cache.
+    def setUp(self):
+        customer_detail_cache().clear()
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.offers = [
+            LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24),
+            LoanOffer.objects.create(customer=self.customer, loan_amount=1200.00, interest_rate=3.0, loan_term=12),
+        ]
+
+    # Test calculating a monthly payment through the async calculator
+    async def test_loan_calculator(self):
+        response = await self.async_client.post(reverse('async-loan-calculator'), {
+            'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24,
+        }, content_type='application/json')
+
+        # Assert that the response matches the sync calculator
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'monthly_payment': 440.96})
+
+    # Test that the async calculator returns the same validation errors as the sync one
+    async def test_loan_calculator_invalid(self):
+        url = reverse('async-loan-calculator')
+        response = await self.async_client.post(url, {
+            'loan_amount': 10000.00, 'interest_rate': -5.5, 'loan_term': 24,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'interest_rate': 'Interest rate must be a non-negative value.'})
+
+        response = await self.async_client.post(url, '{broken', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 405)
+
+    # Test pricing a batch through the async batch calculator
+    async def test_loan_calculator_batch(self):
+        response = await self.async_client.post(reverse('async-loan-calculator-batch'), {'scenarios': [
+            {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+            {'loan_amount': -1, 'interest_rate': 5.5, 'loan_term': 24},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0], {'monthly_payment': 440.96})
+        self.assertEqual(response.json()['error_count'], 1)
+
+    # Test retrieving a customer with its offers through the async detail endpoint
+    async def test_customer_detail(self):
+        url = reverse('async-customer-detail', args=[self.customer.id])
+        response = await self.async_client.get(url, {'expand': 'offers'})
+
+        # Assert that the offers are embedded with their payments
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'glenlohja@example.com')
+        self.assertEqual([offer['monthly_payment'] for offer in response.json()['offers']], ['440.96', '101.63'])
+
+        # Assert that a missing customer returns 404 NOT FOUND
+        response = await self.async_client.get(reverse('async-customer-detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    # Test listing offers page by page through the async list endpoint
+    async def test_loan_offer_list(self):
+        url = reverse('async-loanoffer-list')
+        response = await self.async_client.get(url, {'page_size': 1, 'customer': self.customer.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([offer['id'] for offer in response.json()['results']], [self.offers[0].id])
+
+        # Follow the next link to the second and last page
+        response = await self.async_client.get(response.json()['next'])
+        self.assertEqual([offer['id'] for offer in response.json()['results']], [self.offers[1].id])
+        self.assertIsNone(response.json()['next'])
+
+        # Assert that invalid filters are rejected
+        response = await self.async_client.get(url, {'min_amount': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('min_amount', response.json())
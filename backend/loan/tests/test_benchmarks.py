@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import get_resolver
+from loan import async_urls, urls
+from loan.benchmarks import compare_to_baseline, micro_benchmarks, request_benchmarks
+
+# This class contains tests for the benchmark suite and its regression gate.
+class BenchmarkTests(TestCase):
+
+    # Test that the request-level benchmarks cover every endpoint of loan/urls.py and loan/async_urls.py and that each one succeeds
+    def test_request_benchmarks_cover_every_endpoint(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with self.settings(LOAN_JOBS={**settings.LOAN_JOBS, 'RESULT_DIR': directory.name}):
+            cases = request_benchmarks()
+            covered = {url_name for url_name, _ in cases.values()}
+
+            # Assert that a new route can't be added without a benchmark
+            self.assertEqual(covered, {pattern.name for pattern in urls.urlpatterns + async_urls.urlpatterns})
+            self.assertTrue(covered <= set(get_resolver().reverse_dict))
+
+            # Run each case once, it raises on a non-2xx response
+            for _, operation in cases.values():
+                operation()
+
+    # Test that the micro-benchmarks run
+    def test_micro_benchmarks(self):
+        for operation in micro_benchmarks().values():
+            operation()
+
+    # Test that only slowdowns beyond the threshold are reported as regressions
+    def test_compare_to_baseline(self):
+        baseline = {'fast': 1.0, 'slow': 1.0}
+        regressions = compare_to_baseline({'fast': 1.2, 'slow': 1.5, 'new': 9.0}, baseline, 0.25)
+
+        # Assert that the 20% slowdown and the case missing from the baseline pass
+        self.assertEqual(regressions, {'slow': 1.5})
+
+    # Test that the command stores a baseline and fails when the results regress against it
+    def test_command_regression_gate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command('benchmark', suite='micro', filter='schedule', number=1, repeat=1,
+                         baseline=path, save_baseline=True, stdout=StringIO())
+            with open(path) as file:
+                self.assertIn('calculator.schedule[360]', json.load(file)['results'])
+
+            # Pretend the baseline was a thousand times faster
+            with open(path, 'w') as file:
+                json.dump({'results': {'calculator.schedule[360]': 1e-9}}, file)
+
+            # Assert that the comparison fails the command
+            with self.assertRaises(CommandError):
+                call_command('benchmark', suite='micro', filter='schedule', number=1, repeat=1,
+                             baseline=path, compare=True, stdout=StringIO())
@@ -0,0 +1,176 @@
+import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer, LoanOffer
+
+# This class contains tests for the bulk customer creation API endpoint.
+class CustomerBulkCreateTests(APITestCase):
+
+    # The setUp method is called before each test. It sets up common test data and URLs.
+    def setUp(self):
+        # URL for the bulk customer creation endpoint
+        self.url = reverse('customer-bulk-create')
+
+        # Create a customer instance directly in the database for the duplicate email test
+        Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+
+    # Test creating customers from a JSON array with per-record errors
+    def test_bulk_create_customers(self):
+        # Send a POST request mixing valid, duplicate and invalid customers
+        response = self.client.post(self.url, [
+            {'first_name': 'John', 'last_name': 'Smith', 'email': 'johnsmith@example.com'},
+            {'first_name': 'Jane', 'last_name': 'Doe', 'email': 'glenlohja@example.com'},
+            {'first_name': 'Jim', 'last_name': 'Beam', 'email': 'johnsmith@example.com'},
+            {'first_name': '', 'last_name': 'Doe', 'email': 'not-an-email'},
+            {'first_name': 'Ann', 'last_name': 'Lee', 'email': 'annlee@example.com'},
+        ], format='json')
+
+        # Assert that the response status code is 201 CREATED
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Parse the response data
+        response_data = response.json()
+        results = response_data['results']
+
+        # Assert that only the valid customers were created
+        self.assertEqual(response_data['created'], 2)
+        self.assertEqual(response_data['error_count'], 3)
+        self.assertEqual(Customer.objects.get(pk=results[0]['id']).email, 'johnsmith@example.com')
+        self.assertEqual(results[1]['errors']['email'][0], 'customer with this email already exists.')
+        self.assertEqual(results[2]['errors']['email'][0], 'Email appears more than once in this batch.')
+        self.assertEqual(results[3]['errors']['first_name'][0], 'This field may not be blank.')
+        self.assertEqual(results[3]['errors']['email'][0], 'Enter a valid email address.')
+        self.assertIn('id', results[4])
+
+    # Test creating customers from an NDJSON body
+    def test_bulk_create_customers_ndjson(self):
+        body = '\n'.join(json.dumps(record) for record in [
+            {'first_name': 'John', 'last_name': 'Smith', 'email': 'johnsmith@example.com'},
+            {'first_name': 'Ann', 'last_name': 'Lee', 'email': 'annlee@example.com'},
+        ]) + '\n'
+
+        # Send a POST request with an NDJSON body
+        response = self.client.generic('POST', self.url, body, content_type='application/x-ndjson')
+
+        # Assert that both customers were created
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(Customer.objects.count(), 3)
+
+    # Test that a malformed NDJSON line is rejected
+    def test_bulk_create_customers_ndjson_invalid(self):
+        # Send a POST request with a broken second line
+        response = self.client.generic('POST', self.url, '{"first_name": "John"}\n{broken\n', content_type='application/x-ndjson')
+
+        # Assert that the response status code is 400 BAD REQUEST
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', response.json()['detail'])
+
+    # Test that a payload that is not a list is rejected
+    def test_bulk_create_not_a_list(self):
+        response = self.client.post(self.url, {'first_name': 'John'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that PUT creates new customers and updates existing ones by email, with one lookup and a single statement
+    def test_bulk_upsert_customers(self):
+        existing = Customer.objects.get(email='glenlohja@example.com')
+        # cache the customer's details, which the upsert must invalidate
+        self.client.get(reverse('customer-detail', args=[existing.id]))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.url, [
+                {'first_name': 'Glenn', 'last_name': 'Updated', 'email': 'glenlohja@example.com'},
+                {'first_name': 'Ann', 'last_name': 'Lee', 'email': 'annlee@example.com'},
+                {'first_name': 'Ann', 'last_name': 'Again', 'email': 'annlee@example.com'},
+            ], format='json')
+
+        # Assert that the existing customer kept its id and got the new names, and the new one was created
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response_data = response.json()
+        results = response_data['results']
+        self.assertEqual((response_data['created'], response_data['updated'], response_data['error_count']), (1, 1, 1))
+        self.assertEqual(results[0], {'id': existing.id})
+        self.assertEqual(Customer.objects.get(pk=results[1]['id']).last_name, 'Lee')
+        self.assertEqual(results[2]['errors']['email'][0], 'Email appears more than once in this batch.')
+        self.assertEqual(Customer.objects.count(), 2)
+        # the email lookup and the upsert
+        self.assertEqual(len([query for query in queries.captured_queries if 'loan_customer' in query['sql']]), 2)
+
+        # Assert that reads and the search index see the new names
+        detail = self.client.get(reverse('customer-detail', args=[existing.id])).json()
+        self.assertEqual((detail['first_name'], detail['last_name']), ('Glenn', 'Updated'))
+        search = self.client.get(reverse('customer-search'), {'q': 'updated'}).json()
+        self.assertEqual([customer['id'] for customer in search['results']], [existing.id])
+
+# This class contains tests for the bulk loan offer creation API endpoint.
+class LoanOfferBulkCreateTests(APITestCase):
+
+    # The setUp method is called before each test. It sets up common test data and URLs.
+    def setUp(self):
+        # URL for the bulk loan offer creation endpoint
+        self.url = reverse('loanoffer-bulk-create')
+
+        # Create two test customers in the database
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.other_customer = Customer.objects.create(first_name='John', last_name='Smith', email='johnsmith@example.com')
+
+    # Test creating loan offers with per-record errors
+    def test_bulk_create_offers(self):
+        # Send a POST request mixing valid and invalid offers
+        response = self.client.post(self.url, [
+            {'customer': self.customer.id, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+            {'customer': 999, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+            {'customer': self.other_customer.id, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': -24},
+            {'customer': self.other_customer.id, 'loan_amount': 5000.00, 'interest_rate': 3.2, 'loan_term': 12},
+        ], format='json')
+
+        # Assert that the response status code is 201 CREATED
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Parse the response data
+        results = response.json()['results']
+
+        # Assert that only the valid offers were created, for the right customers
+        self.assertEqual(LoanOffer.objects.count(), 2)
+        self.assertEqual(LoanOffer.objects.get(pk=results[0]['id']).customer, self.customer)
+        self.assertEqual(results[1]['errors']['customer'][0], 'Invalid pk "999" - object does not exist.')
+        self.assertEqual(results[2]['errors']['loan_term'][0], 'Loan term must be a positive value.')
+        self.assertEqual(LoanOffer.objects.get(pk=results[3]['id']).customer, self.other_customer)
+
+    # Test that customers are resolved with one query and offers written in chunks
+    def test_bulk_create_offers_queries(self):
+        offers = [
+            {'customer': customer.id, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+            for customer in (self.customer, self.other_customer) * 5
+        ]
+
+        # 1 customer lookup + (savepoint, insert, portfolio summary update, release) for each of the 2 chunks of 5 offers
+        # + (insert, update) of the summary row of the first offer of a term bucket
+        with self.settings(LOAN_BULK_CHUNK_SIZE=5), self.assertNumQueries(11):
+            response = self.client.post(self.url, offers, format='json')
+
+        # Assert that every offer was created
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(LoanOffer.objects.count(), 10)
+
+    # Test that an offer whose payment columns would overflow only fails itself
+    def test_bulk_create_offers_too_large(self):
+        response = self.client.post(self.url, [
+            {'customer': self.customer.id, 'loan_amount': '99999999.99', 'interest_rate': '99.99', 'loan_term': 10000000},
+            {'customer': self.customer.id, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.json()['results']
+        self.assertEqual(results[0]['errors']['loan_term'][0], 'Loan term must be at most 1200 months.')
+        self.assertEqual(LoanOffer.objects.get().pk, results[1]['id'])
+
+    # Test that a batch with only invalid offers is rejected
+    def test_bulk_create_offers_all_invalid(self):
+        response = self.client.post(self.url, [
+            {'customer': 999, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['error_count'], 1)
@@ -0,0 +1,91 @@
+from decimal import Decimal
+from django.test import SimpleTestCase
+import numpy as np
+from loan.calculator import (
+    PaymentResult, calculate, calculate_exact, monthly_payment, monthly_payments, payment_grid, solve_interest_rates,
+    solve_loan_amounts, solve_loan_terms,
+)
+
+# This class contains tests for the loan calculator module.
+class CalculatorTests(SimpleTestCase):
+
+    # Test the scalar monthly payment formula
+    def test_monthly_payment(self):
+        self.assertAlmostEqual(monthly_payment(10000.00, 5.5, 24), 440.96, places=2)
+
+    # Test the zero interest rate branch of the scalar formula
+    def test_monthly_payment_zero_rate(self):
+        self.assertEqual(monthly_payment(1200.00, 0, 12), 100.00)
+
+    # Test that the vectorized formula matches the scalar one, including the zero rate branch
+    def test_monthly_payments_matches_scalar(self):
+        scenarios = [(10000.00, 5.5, 24), (1200.00, 0, 12), (250000.00, 3.75, 360), (500.00, 19.99, 6)]
+        payments = monthly_payments(*zip(*scenarios))
+
+        for scenario, payment in zip(scenarios, payments):
+            self.assertAlmostEqual(payment, monthly_payment(*scenario), places=9)
+
+    # Test the exact Decimal path with Decimal inputs, as stored on a LoanOffer
+    def test_calculate_exact(self):
+        result = calculate_exact(Decimal('10000.00'), Decimal('5.50'), 24)
+
+        # Assert that the payment and totals are exact Decimals
+        self.assertEqual(result.monthly_payment, Decimal('440.96'))
+        self.assertEqual(result.total_payable, Decimal('10583.04'))
+        self.assertEqual(result.total_interest, Decimal('583.04'))
+
+    # Test the exact Decimal path with a zero rate and a custom number of decimal places
+    def test_calculate_exact_options(self):
+        self.assertEqual(calculate_exact(1200, 0, 12).total_interest, Decimal('0.00'))
+        self.assertEqual(calculate_exact(250000, 3.75, 360, places=4).monthly_payment, Decimal('1157.7890'))
+
+    # Test that banker's rounding is applied to the payment
+    def test_calculate_exact_bank_rounding(self):
+        # 0.125 / month for 1 month at 0% rounds half to even
+        self.assertEqual(calculate_exact(Decimal('0.125'), 0, 1).monthly_payment, Decimal('0.12'))
+        self.assertEqual(calculate_exact(Decimal('0.135'), 0, 1).monthly_payment, Decimal('0.14'))
+
+    # Test that the fast float path agrees with the exact path
+    def test_calculate_matches_exact(self):
+        fast = calculate(10000.00, 5.5, 24)
+        exact = calculate_exact(10000.00, 5.5, 24)
+        self.assertAlmostEqual(fast.monthly_payment, float(exact.monthly_payment), places=2)
+
+    # Test that result objects use __slots__
+    def test_payment_result_slots(self):
+        result = calculate(10000.00, 5.5, 24)
+        self.assertFalse(hasattr(result, '__dict__'))
+        self.assertEqual(result, PaymentResult(**result.as_dict()))
+
+# This class contains tests for the solvers of the loan amount, term and interest rate.
+class SolverTests(SimpleTestCase):
+
+    # The setUp method is called before each test. It prices a few scenarios, including a zero rate one.
+    def setUp(self):
+        self.amounts = [10000.00, 1200.00, 250000.00, 500.00, 1000.00]
+        self.rates = [5.5, 0, 3.75, 19.99, 0.01]
+        self.terms = [24, 12, 360, 6, 12]
+        self.payments = monthly_payments(self.amounts, self.rates, self.terms)
+
+    # Test that each solver recovers the value the payments were computed from
+    def test_round_trip(self):
+        np.testing.assert_allclose(solve_loan_amounts(self.payments, self.rates, self.terms), self.amounts)
+        np.testing.assert_allclose(solve_loan_terms(self.amounts, self.rates, self.payments), self.terms)
+        np.testing.assert_allclose(solve_interest_rates(self.amounts, self.terms, self.payments), self.rates, atol=1e-6)
+
+    # Test that impossible combinations are NaN instead of a wrong answer
+    def test_infeasible(self):
+        # a payment below the first month's interest never repays the loan
+        self.assertTrue(np.isnan(solve_loan_terms(10000.00, 12, 100.00)))
+        # repaying less than the amount would need a negative rate
+        self.assertTrue(np.isnan(solve_interest_rates(10000.00, 12, 800.00)))
+        # repaying exactly the amount is a zero rate
+        self.assertEqual(solve_interest_rates(1200.00, 12, 100.00), 0)
+
+    # Test that the grid has one row per rate and one column per term, matching the scalar formula
+    def test_payment_grid(self):
+        grid = payment_grid(10000.00, [0, 5.5], [12, 24, 36])
+        self.assertEqual(grid.shape, (2, 3))
+        self.assertAlmostEqual(grid[1, 1], monthly_payment(10000.00, 5.5, 24), places=9)
+        self.assertAlmostEqual(grid[0, 2], 10000.00 / 36, places=9)
+
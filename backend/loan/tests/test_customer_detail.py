@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.cache import check_customer_detail_cache, customer_detail_cache
+from loan.models import Customer, LoanOffer
+
+# This class contains tests for the expanded and cached customer detail API endpoint.
+class CustomerDetailExpandTests(APITestCase):
+
+    # The setUp method is called before each test. It creates a customer with two offers and empties the cache.
+    def setUp(self):
+        customer_detail_cache().clear()
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.offer = LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+        LoanOffer.objects.create(customer=self.customer, loan_amount=1200.00, interest_rate=3.0, loan_term=12)
+
+        # URL for retrieving the customer
+        self.url = reverse('customer-detail', args=[self.customer.id])
+
+    # Test embedding the customer's offers with their monthly payments
+    def test_expand_offers(self):
+        # Send a GET request with ?expand=offers, customer and offers are loaded with two queries
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'expand': 'offers'})
+
+        # Assert that the response status code is 200 OK
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Parse the response data
+        response_data = response.json()
+
+        # Assert that both offers are embedded with their monthly payments
+        self.assertEqual(response_data['email'], 'glenlohja@example.com')
+        self.assertEqual(len(response_data['offers']), 2)
+        self.assertEqual(response_data['offers'][0]['id'], self.offer.id)
+        self.assertEqual(response_data['offers'][0]['monthly_payment'], '440.96')
+
+    # Test that the plain representation doesn't embed offers
+    def test_without_expand(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('offers', response.json())
+
+    # Test that repeated requests are served from the cache without touching the database
+    def test_cached(self):
+        self.client.get(self.url, {'expand': 'offers'})
+
+        # Assert that the second request runs no queries
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'expand': 'offers'})
+        self.assertEqual(len(response.json()['offers']), 2)
+
+    # Test that a disabled cache reads every request from the database
+    @override_settings(LOAN_CUSTOMER_DETAIL_CACHE={**settings.LOAN_CUSTOMER_DETAIL_CACHE, 'ENABLED': False})
+    def test_cache_disabled(self):
+        self.client.get(self.url, {'expand': 'offers'})
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'expand': 'offers'})
+        self.assertEqual(len(response.json()['offers']), 2)
+
+    # Test that changes to the customer or its offers invalidate the cached payload
+    def test_invalidation(self):
+        self.client.get(self.url, {'expand': 'offers'})
+
+        # Add an offer and assert that it shows up
+        LoanOffer.objects.create(customer=self.customer, loan_amount=500.00, interest_rate=4.0, loan_term=6)
+        self.assertEqual(len(self.client.get(self.url, {'expand': 'offers'}).json()['offers']), 3)
+
+        # Delete an offer and assert that it's gone
+        self.offer.delete()
+        self.assertEqual(len(self.client.get(self.url, {'expand': 'offers'}).json()['offers']), 2)
+
+        # Rename the customer and assert that the new name is returned
+        self.customer.first_name = 'John'
+        self.customer.save()
+        self.assertEqual(self.client.get(self.url, {'expand': 'offers'}).json()['first_name'], 'John')
+
+    # Test that offers created through the bulk endpoint invalidate the cached payload
+    def test_invalidation_bulk(self):
+        self.client.get(self.url, {'expand': 'offers'})
+        self.client.post(reverse('loanoffer-bulk-create'), [
+            {'customer': self.customer.id, 'loan_amount': 500.00, 'interest_rate': 4.0, 'loan_term': 6},
+        ], format='json')
+        self.assertEqual(len(self.client.get(self.url, {'expand': 'offers'}).json()['offers']), 3)
+
+
+# This class contains tests for the backend check of the customer detail cache.
+class CustomerDetailCacheCheckTests(SimpleTestCase):
+
+    # Test that a per-process cache is refused, a write in one worker couldn't invalidate the other workers' copies
+    @override_settings(CACHES={**settings.CACHES, 'customer-detail': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_cache_refused(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'needs a cache shared by all the workers'):
+            check_customer_detail_cache()
+
+        # Assert that it's accepted once the cache is disabled
+        with self.settings(LOAN_CUSTOMER_DETAIL_CACHE={**settings.LOAN_CUSTOMER_DETAIL_CACHE, 'ENABLED': False}):
+            check_customer_detail_cache()
+
+    # Test that the shared caches of the development and production settings pass
+    def test_shared_cache_accepted(self):
+        check_customer_detail_cache()
+        with self.settings(CACHES={**settings.CACHES, 'customer-detail': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'loan_customer_detail_cache',
+        }}):
+            check_customer_detail_cache()
@@ -0,0 +1,83 @@
+import io
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer
+
+
+# This class contains tests for the customer search endpoint and its full-text index.
+class CustomerSearchTests(APITestCase):
+
+    # The setUp method is called before each test. It creates customers to search for.
+    def setUp(self):
+        self.url = reverse('customer-search')
+        self.glen = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.jane = Customer.objects.create(first_name='Jane', last_name='Doe', email='jane.doe@mail.com')
+        self.glenn = Customer.objects.create(first_name='Glenn', last_name='Close', email='gc@example.com')
+
+    # Helper to search and return the ids of the results
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [customer['id'] for customer in response.json()['results']]
+
+    # Test that words match as prefixes of names and emails, and that every word must match
+    def test_prefix_match(self):
+        self.assertCountEqual(self.search(q='gle'), [self.glen.id, self.glenn.id])
+        self.assertEqual(self.search(q='glen clo'), [self.glenn.id])
+        self.assertEqual(self.search(q='jane.doe@mai'), [self.jane.id])
+        self.assertEqual(self.search(q='LOHJ'), [self.glen.id])
+        self.assertEqual(self.search(q='xyz'), [])
+
+    # Test that results carry the customer representation and respect the limit
+    def test_results_and_limit(self):
+        response = self.client.get(self.url, {'q': 'jane'})
+        self.assertEqual(response.json()['results'][0]['email'], 'jane.doe@mail.com')
+        self.assertEqual(len(self.search(q='gle', limit=1)), 1)
+
+    # Test that the index follows customers being created in bulk, updated and deleted
+    def test_index_kept_in_sync(self):
+        Customer.objects.bulk_create([Customer(first_name='Bulk', last_name='Added', email='bulk@example.com')])
+        self.assertEqual(len(self.search(q='bulk')), 1)
+
+        self.glenn.last_name = 'Open'
+        self.glenn.save()
+        self.assertEqual(self.search(q='close'), [])
+        self.assertEqual(self.search(q='open'), [self.glenn.id])
+
+        Customer.objects.filter(email='jane.doe@mail.com').update(first_name='Janet')
+        self.assertEqual(self.search(q='janet'), [self.jane.id])
+
+        self.glen.delete()
+        self.assertEqual(self.search(q='lohja'), [])
+
+    # Test that operators and quotes are searched as plain words instead of being passed to the index
+    def test_query_syntax_ignored(self):
+        self.assertEqual(self.search(q='"'), [])
+        self.assertEqual(self.search(q='glen OR jane'), [])
+        self.assertEqual(self.search(q='"lohja*'), [self.glen.id])
+
+    # Test that invalid parameters are rejected
+    @override_settings(LOAN_CUSTOMER_SEARCH={'DEFAULT_LIMIT': 20, 'MAX_LIMIT': 50, 'MAX_TERMS': 5, 'MAX_CANDIDATES': 1000})
+    def test_invalid_parameters(self):
+        self.assertIn('q', self.client.get(self.url).json())
+        self.assertIn('limit', self.client.get(self.url, {'q': 'glen', 'limit': 0}).json())
+        response = self.client.get(self.url, {'q': 'glen', 'limit': 51})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that the rebuild command restores dropped triggers and reindexes every customer
+    def test_rebuild_command(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('The FTS5 index only exists on SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER loan_customer_search_insert')
+        Customer.objects.create(first_name='Missed', last_name='Trigger', email='missed@example.com')
+        self.assertEqual(self.search(q='missed'), [])
+
+        call_command('rebuild_customer_search', stdout=io.StringIO())
+        self.assertEqual(len(self.search(q='missed')), 1)
+        Customer.objects.create(first_name='Missed', last_name='Again', email='again@example.com')
+        self.assertEqual(len(self.search(q='missed')), 2)
@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -112,6 +114,22 @@ class CustomerTests(APITestCase):
         self.assertIn('email', response_data)
         self.assertEqual(response_data['email'][0], "customer with this email already exists.")
 
+        # Assert that the failed insert left the enclosing transaction usable
+        self.assertEqual(Customer.objects.count(), 1)
+
+    # Test that creating a customer is a single INSERT, without a uniqueness SELECT before it
+    def test_create_customer_single_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.customer_create_url, {
+                'first_name': 'John', 'last_name': 'Smith', 'email': 'johnsmith@example.com'
+            }, format='json')
+
+        # Assert that the customer table was only written to
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query['sql'] for query in queries.captured_queries if 'loan_customer' in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT'))
+
     # Test retrieving details of an existing customer with a valid ID
     def test_get_customer_details_valid(self):
         # Create a customer instance directly in the database
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import FieldError
+from django.db import connection
+from django.test import TestCase, override_settings
+from loan.models import Customer, LoanOffer
+from loan.signals import apply_sqlite_pragmas
+
+# This class contains tests for the database indexes and connection settings of the loan models.
+class DatabaseTests(TestCase):
+
+    # Helper returning the names of the indexes of a model's table
+    def index_names(self, model):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+        return {name for name, constraint in constraints.items() if constraint['index']}
+
+    # Test that the composite and expression indexes exist
+    def test_indexes(self):
+        self.assertIn('customer_email_lower_idx', self.index_names(Customer))
+        self.assertTrue({'loanoffer_customer_created_idx', 'loanoffer_rate_term_idx'} <= self.index_names(LoanOffer))
+
+    # Test that case-insensitive email lookups use the expression index
+    def test_email_lower_lookup_uses_index(self):
+        Customer.objects.create(first_name='Glen', last_name='Lohja', email='GlenLohja@example.com')
+        queryset = Customer.objects.filter(email__lower='glenlohja@example.com')
+
+        # Assert that the customer is found regardless of case, through the index
+        self.assertEqual(queryset.count(), 1)
+        self.assertIn('customer_email_lower_idx', queryset.explain())
+
+        # Assert that the lookup isn't registered on the email fields of other models
+        with self.assertRaises(FieldError):
+            User.objects.filter(email__lower='glenlohja@example.com')
+
+    # Test that the configured PRAGMAs are run on new SQLite connections
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_sqlite_pragmas(self):
+        apply_sqlite_pragmas(sender=connection.__class__, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 1234)
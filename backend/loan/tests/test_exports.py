@@ -0,0 +1,100 @@
+import csv
+import io
+import os
+import tempfile
+from importlib.util import find_spec
+from unittest import skipIf, skipUnless
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer, LoanOffer
+
+PYARROW_INSTALLED = find_spec('pyarrow') is not None
+
+# This class contains tests for the customer and loan offer exports and the export_data command.
+class ExportTests(APITestCase):
+
+    # The setUp method is called before each test. It creates two customers with loan offers.
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.other = Customer.objects.create(first_name='Jane', last_name='Doe', email='jane@example.com')
+        for customer in (self.customer, self.other, self.customer):
+            LoanOffer.objects.create(customer=customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+
+    # Helper to read a CSV export
+    def read_csv(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    # Test that the customer export streams every customer as CSV
+    def test_export_customers(self):
+        response = self.client.get(reverse('export-customers'))
+
+        # Assert that the export is an attachment with one row per customer
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="customers.csv"')
+        rows = self.read_csv(response)
+        self.assertEqual([row['email'] for row in rows], ['glenlohja@example.com', 'jane@example.com'])
+        self.assertEqual(list(rows[0]), ['id', 'first_name', 'last_name', 'email', 'updated_at'])
+
+    # Test that offers are exported in chunks, filtered like the list, with optional payment columns
+    def test_export_loanoffers(self):
+        with self.settings(LOAN_EXPORT_CHUNK_SIZE=1):
+            rows = self.read_csv(self.client.get(reverse('export-loanoffers'), {'customer': self.customer.id}))
+        self.assertEqual(len(rows), 2)
+        self.assertNotIn('monthly_payment', rows[0])
+
+        # Assert that the payment columns are the stored ones
+        rows = self.read_csv(self.client.get(reverse('export-loanoffers'), {'payments': 'true'}))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual((rows[0]['monthly_payment'], rows[0]['total_interest'], rows[0]['total_payable']),
+                         ('440.96', '583.04', '10583.04'))
+
+    # Test that invalid formats and filters are rejected
+    def test_invalid_parameters(self):
+        response = self.client.get(reverse('export-loanoffers'), {'format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('export-loanoffers'), {'min_amount': 'many'})
+        self.assertIn('min_amount', response.json())
+        response = self.client.get(reverse('export-loanoffers'), {'payments': 'maybe'})
+        self.assertIn('payments', response.json())
+
+    # Test that Parquet is refused with a clear error when pyarrow isn't installed
+    @skipIf(PYARROW_INSTALLED, 'pyarrow is installed')
+    def test_parquet_unavailable(self):
+        response = self.client.get(reverse('export-loanoffers'), {'format': 'parquet'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pyarrow', response.json()['format'])
+
+    # Test that Parquet and Arrow exports round trip through pyarrow
+    @skipUnless(PYARROW_INSTALLED, 'pyarrow is not installed')
+    def test_parquet_and_arrow(self):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        with self.settings(LOAN_EXPORT_CHUNK_SIZE=2):
+            response = self.client.get(reverse('export-loanoffers'), {'format': 'parquet', 'payments': 'true'})
+            table = pyarrow.parquet.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(str(table.column('monthly_payment')[0]), '440.96')
+
+        response = self.client.get(reverse('export-customers'), {'format': 'arrow'})
+        table = pyarrow.ipc.open_stream(b''.join(response.streaming_content)).read_all()
+        self.assertEqual(table.column('email').to_pylist(), ['glenlohja@example.com', 'jane@example.com'])
+
+    # Test that the command writes the export to a file or stdout
+    def test_export_command(self):
+        stdout = io.StringIO()
+        call_command('export_data', 'loanoffers', payments=True, customer=self.other.id, stdout=stdout)
+        rows = list(csv.DictReader(io.StringIO(stdout.getvalue())))
+        self.assertEqual([int(row['customer_id']) for row in rows], [self.other.id])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'customers.csv')
+            call_command('export_data', 'customers', output=path, chunk_size=1, stderr=io.StringIO())
+            with open(path) as file:
+                self.assertEqual(len(list(csv.DictReader(file))), 2)
+
+        # Assert that binary formats need a file
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'customers', format='parquet', stdout=io.StringIO())
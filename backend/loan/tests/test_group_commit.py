@@ -0,0 +1,115 @@
+import threading
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.group_commit import GroupCommit
+from loan.metrics import GROUP_COMMIT_BATCH_SIZE
+from loan.models import Customer, LoanOffer, PortfolioSummary
+
+
+# This class contains tests for loan offer creates going through the group commit.
+@override_settings(LOAN_OFFER_GROUP_COMMIT={'ENABLED': True, 'WINDOW_MS': 1, 'MAX_BATCH_SIZE': 100})
+class GroupCommitEndpointTests(APITestCase):
+
+    # The setUp method is called before each test. It creates a customer and clears the batch size metric.
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        GROUP_COMMIT_BATCH_SIZE.clear()
+
+    # Test that a create is written by a batch and answered like a regular create
+    def test_create(self):
+        response = self.client.post(reverse('loanoffer-create'), {
+            'customer': self.customer.id, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24,
+        }, format='json')
+
+        # Assert that the offer was stored with its id and payment columns
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        offer = LoanOffer.objects.get(pk=response.json()['id'])
+        self.assertEqual(response.json()['monthly_payment'], '440.96')
+        self.assertEqual(str(offer.monthly_payment), '440.96')
+
+        # Assert that the portfolio summary and the batch size metric saw the offer
+        self.assertEqual(sum(PortfolioSummary.objects.values_list('offer_count', flat=True)), 1)
+        self.assertEqual(GROUP_COMMIT_BATCH_SIZE.value()['count'], 1)
+
+    # Test that invalid offers are rejected before they join a batch
+    def test_invalid_offer(self):
+        response = self.client.post(reverse('loanoffer-create'), {
+            'customer': 999, 'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('customer', response.json())
+        self.assertIsNone(GROUP_COMMIT_BATCH_SIZE.value())
+
+
+# This class contains tests for batching concurrent submissions, which needs committed data shared by threads.
+class GroupCommitConcurrencyTests(TransactionTestCase):
+
+    # The setUp method is called before each test. It creates a customer and clears the batch size metric.
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        GROUP_COMMIT_BATCH_SIZE.clear()
+
+    # Helper to submit the offers from one thread each and return what every submission returned or raised
+    def submit_concurrently(self, offers):
+        group_commit = GroupCommit()
+        outcomes = [None] * len(offers)
+
+        def submit(index):
+            try:
+                outcomes[index] = group_commit.submit(offers[index])
+            except (IntegrityError, ValidationError) as exc:
+                outcomes[index] = exc
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=[index]) for index in range(len(offers))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    # Helper to build an unsaved offer
+    def offer(self, **fields):
+        return LoanOffer(**{'customer': self.customer, 'loan_amount': 10000, 'interest_rate': 5.5, 'loan_term': 24, **fields})
+
+    # Test that concurrent creates are written as one batch and each gets its own row
+    @override_settings(LOAN_OFFER_GROUP_COMMIT={'ENABLED': True, 'WINDOW_MS': 10000, 'MAX_BATCH_SIZE': 8})
+    def test_one_batch(self):
+        offers = self.submit_concurrently([self.offer(loan_term=12 + index) for index in range(8)])
+
+        # Assert that the full batch was written at once, long before the window ran out
+        self.assertEqual(GROUP_COMMIT_BATCH_SIZE.value()['count'], 1)
+        self.assertEqual(GROUP_COMMIT_BATCH_SIZE.value()['sum'], 8)
+        self.assertEqual(len({offer.pk for offer in offers}), 8)
+        for offer in offers:
+            self.assertEqual(LoanOffer.objects.get(pk=offer.pk).loan_term, offer.loan_term)
+        self.assertEqual(sum(PortfolioSummary.objects.values_list('offer_count', flat=True)), 8)
+
+    # Test that a conflicting offer only fails itself
+    @override_settings(LOAN_OFFER_GROUP_COMMIT={'ENABLED': True, 'WINDOW_MS': 10000, 'MAX_BATCH_SIZE': 3})
+    def test_conflict_fails_alone(self):
+        outcomes = self.submit_concurrently([self.offer(external_id='A'), self.offer(external_id='A'), self.offer()])
+
+        # Assert that one of the duplicates and the other offer were written
+        self.assertEqual(len([outcome for outcome in outcomes if isinstance(outcome, IntegrityError)]), 1)
+        self.assertEqual(LoanOffer.objects.count(), 2)
+        self.assertEqual(sum(PortfolioSummary.objects.values_list('offer_count', flat=True)), 2)
+
+    # Test that an offer that can't be stored fails in its own thread and doesn't join a batch
+    @override_settings(LOAN_OFFER_GROUP_COMMIT={'ENABLED': True, 'WINDOW_MS': 10000, 'MAX_BATCH_SIZE': 2})
+    def test_failing_member(self):
+        too_large = self.offer(loan_amount=Decimal('99999999.99'), interest_rate=Decimal('99.99'), loan_term=10000000)
+        outcomes = self.submit_concurrently([self.offer(), too_large, self.offer(loan_term=12)])
+
+        # Assert that only the offer that overflows failed, and the other two were written as one batch
+        self.assertIsInstance(outcomes[1], ValidationError)
+        self.assertEqual(LoanOffer.objects.count(), 2)
+        self.assertEqual(GROUP_COMMIT_BATCH_SIZE.value()['sum'], 2)
+        self.assertEqual(sum(PortfolioSummary.objects.values_list('offer_count', flat=True)), 2)
+
@@ -0,0 +1,98 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.cache import customer_detail_cache
+from loan.models import Customer, LoanOffer
+
+# This class contains tests for the ETag / Last-Modified handling of the customer and loan offer reads.
+class ConditionalGetTests(APITestCase):
+
+    # The setUp method is called before each test. It creates a customer with a loan offer and empties the detail cache.
+    def setUp(self):
+        customer_detail_cache().clear()
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.offer = LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+        self.url = reverse('customer-detail', args=[self.customer.id])
+
+    # Test that a customer read carries validators and is revalidated from the cache without queries
+    def test_customer_detail_304(self):
+        response = self.client.get(self.url)
+
+        # Assert that the response has an ETag, a Last-Modified and must be revalidated
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        # Assert that a revalidation with either validator is a 304 served without touching the database
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    # Test that a changed customer gets a new ETag
+    def test_customer_detail_changed(self):
+        etag = self.client.get(self.url)['ETag']
+        self.customer.first_name = 'Glenn'
+        self.customer.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    # Test that the expanded detail changes its ETag when an offer is deleted, and has no Last-Modified
+    def test_expanded_detail(self):
+        response = self.client.get(self.url, {'expand': 'offers'})
+        self.assertNotIn('Last-Modified', response)
+
+        self.offer.delete()
+        changed = self.client.get(self.url, {'expand': 'offers'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.json()['offers'], [])
+
+    # Test that an offer schedule is revalidated until the offer changes
+    def test_offer_schedule_304(self):
+        url = reverse('loanoffer-schedule', args=[self.offer.id])
+        etag = self.client.get(url)['ETag']
+
+        # Assert that the same format is not modified, while another format has its own ETag
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(url, {'format': 'csv'}, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        self.offer.loan_term = 12
+        self.offer.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    # Test that list responses get an ETag from the conditional GET middleware
+    def test_offer_list_304(self):
+        url = reverse('loanoffer-create')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+# This class contains tests for the cacheable GET variant of the loan calculator.
+class CalculatorHttpCacheTests(APITestCase):
+
+    # Test that GET calculations are publicly cacheable and match the POST result
+    def test_get_calculation(self):
+        params = {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+        for url in (reverse('loan-calculator'), reverse('loan-calculator-fast')):
+            with self.subTest(url=url):
+                response = self.client.get(url, params)
+
+                # Assert that the result is the POST one, with a shared cache lifetime
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json(), self.client.post(url, params, format='json').json())
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('max-age=86400', response['Cache-Control'])
+
+    # Test that errors and POST responses are not marked cacheable
+    def test_not_cacheable(self):
+        url = reverse('loan-calculator')
+        response = self.client.get(url, {'loan_amount': -1, 'interest_rate': 5.5, 'loan_term': 24})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('Cache-Control', response)
+
+        response = self.client.post(url, {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}, format='json')
+        self.assertNotIn('Cache-Control', response)
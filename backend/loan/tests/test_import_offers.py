@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from loan.models import Customer, LoanOffer
+
+# This class contains tests for the import_offers management command.
+class ImportOffersCommandTests(TestCase):
+
+    # The setUp method is called before each test. It creates a customer and a temporary directory for import files.
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    # Helper to write an import file and return its path
+    def write_file(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    # Helper to run the command and return its stdout and stderr
+    def run_import(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_offers', path, stdout=stdout, stderr=stderr, **{'workers': 0, **options})
+        return stdout.getvalue(), stderr.getvalue()
+
+    # Test importing a CSV file with valid and invalid rows
+    def test_import_csv(self):
+        path = self.write_file('offers.csv', (
+            'external_id,customer_email,loan_amount,interest_rate,loan_term\n'
+            'A1,glenlohja@example.com,10000.00,5.5,24\n'
+            'A2,nobody@example.com,5000,3,12\n'
+            'A3,glenlohja@example.com,-5,3,12\n'
+            'A4,glenlohja@example.com,5000,3,12\n'
+        ))
+        stdout, stderr = self.run_import(path, batch_size=2)
+
+        # Assert that only the valid rows were imported and the invalid ones reported
+        self.assertEqual(LoanOffer.objects.count(), 2)
+        self.assertEqual(LoanOffer.objects.get(external_id='A1').customer, self.customer)
+        self.assertIn('Row 2: {"customer_email": ["No customer with this email."]}', stderr)
+        self.assertIn('Row 3: {"loan_amount": ["Loan amount must be a positive value."]}', stderr)
+        self.assertIn('Imported 4 rows: 2 created, 0 updated, 2 errors', stdout)
+        self.assertIn('rows/sec', stdout)
+
+        # Assert that the checkpoint is removed after a complete import
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    # Test that re-running an import updates offers instead of duplicating them
+    def test_import_idempotent(self):
+        path = self.write_file('offers.ndjson', '\n'.join(json.dumps(record) for record in [
+            {'external_id': 'A1', 'customer_email': 'glenlohja@example.com', 'loan_amount': '10000.00', 'interest_rate': '5.5', 'loan_term': 24},
+            {'external_id': 'A2', 'customer_email': 'glenlohja@example.com', 'loan_amount': '5000.00', 'interest_rate': '3.0', 'loan_term': 12},
+        ]) + '\n')
+        self.run_import(path)
+        LoanOffer.objects.filter(external_id='A1').update(loan_amount=1)
+        stdout, _ = self.run_import(path)
+
+        # Assert that the second run updated both offers
+        self.assertEqual(LoanOffer.objects.count(), 2)
+        self.assertEqual(str(LoanOffer.objects.get(external_id='A1').loan_amount), '10000.00')
+        self.assertIn('0 created, 2 updated', stdout)
+
+    # Test that records without a string email are reported without looking their email up
+    def test_import_missing_email(self):
+        path = self.write_file('offers.ndjson', '\n'.join(json.dumps(record) for record in [
+            {'external_id': 'A1', 'loan_amount': '10000.00', 'interest_rate': '5.5', 'loan_term': 24},
+            {'external_id': 'A2', 'customer_email': 42, 'loan_amount': '5000.00', 'interest_rate': '3.0', 'loan_term': 12},
+        ]) + '\n')
+        with CaptureQueriesContext(connection) as queries:
+            _, stderr = self.run_import(path)
+
+        # Assert that both rows failed and no customer was looked up by "None" or "42"
+        self.assertIn('Row 1: {"customer_email": ["No customer with this email."]}', stderr)
+        self.assertIn('Row 2: {"customer_email": ["No customer with this email."]}', stderr)
+        self.assertFalse([query for query in queries.captured_queries if 'loan_customer' in query['sql']])
+
+    # Test resuming an import from a checkpoint
+    def test_import_resume(self):
+        header = 'external_id,customer_email,loan_amount,interest_rate,loan_term\n'
+        first = 'A1,glenlohja@example.com,10000.00,5.5,24\n'
+        path = self.write_file('offers.csv', header + first + 'A2,glenlohja@example.com,5000,3,12\n')
+
+        # Write a checkpoint as if the first row had already been imported
+        with open(f'{path}.checkpoint', 'w') as file:
+            json.dump({'offset': len(header) + len(first), 'stats': {'rows': 1, 'created': 1, 'updated': 0, 'errors': 0}}, file)
+        stdout, _ = self.run_import(path, resume=True)
+
+        # Assert that only the second row was imported
+        self.assertEqual(list(LoanOffer.objects.values_list('external_id', flat=True)), ['A2'])
+        self.assertIn('Imported 2 rows: 2 created', stdout)
+
+    # Test validating rows in a process pool
+    def test_import_with_workers(self):
+        path = self.write_file('offers.csv', 'external_id,customer_email,loan_amount,interest_rate,loan_term\n' + ''.join(
+            f'A{number},glenlohja@example.com,1000,5.5,{number}\n' for number in range(1, 21)
+        ))
+        self.run_import(path, workers=2, batch_size=5)
+
+        # Assert that every row was imported
+        self.assertEqual(LoanOffer.objects.count(), 20)
+
+    # Test that a missing file is rejected
+    def test_import_missing_file(self):
+        with self.assertRaises(CommandError):
+            self.run_import(os.path.join(self.directory.name, 'missing.csv'))
@@ -0,0 +1,158 @@
+import csv
+import io
+import json
+import tempfile
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.calculator import monthly_payments
+from loan.models import Customer, Job, LoanOffer
+
+JOB_SETTINGS = {
+    'SCENARIO_CHUNK_SIZE': 7,
+    'OFFER_CHUNK_SIZE': 2,
+    'MAX_SCENARIOS': 1000,
+    'STALE_SECONDS': 600,
+}
+
+# This class contains tests for the background job endpoints and the run_jobs worker.
+class JobTests(APITestCase):
+
+    # The setUp method is called before each test. It writes results to a temporary directory and creates a customer with loan offers.
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        job_settings = self.settings(LOAN_JOBS={**JOB_SETTINGS, 'RESULT_DIR': directory.name})
+        job_settings.enable()
+        self.addCleanup(job_settings.disable)
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.offers = [
+            LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.5, loan_term=term)
+            for term in (12, 24, 36)
+        ]
+
+    # Helper to submit a job and return the response
+    def submit(self, kind, params):
+        return self.client.post(reverse('job-create'), {'kind': kind, 'params': params}, format='json')
+
+    # Helper to run the queued jobs and return the job's status body
+    def run_jobs(self, job_id, workers=0):
+        call_command('run_jobs', once=True, workers=workers, stdout=io.StringIO(), stderr=io.StringIO())
+        return self.client.get(reverse('job-detail', args=[job_id])).json()
+
+    # Helper to download a result file
+    def download(self, job):
+        response = self.client.get(job['result'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    # Test pricing the product of loan amounts, interest rates and loan terms
+    def test_price_grid(self):
+        response = self.submit('price_scenarios', {
+            'loan_amounts': [1000, 5000], 'interest_rates': {'start': 0, 'stop': 10, 'step': 2.5}, 'loan_terms': [12, 24, 36],
+        })
+
+        # Assert that the job is accepted and queued, with its location
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = response.json()
+        self.assertEqual(job['status'], 'queued')
+        self.assertIsNone(job['result'])
+        self.assertNotIn('params', job)
+        self.assertEqual(response['Location'], reverse('job-detail', args=[job['id']]))
+
+        # Assert that the finished job reports its progress and links its result
+        job = self.run_jobs(job['id'])
+        self.assertEqual((job['status'], job['progress'], job['total']), ('succeeded', 30, 30))
+        rows = list(csv.DictReader(io.StringIO(self.download(job))))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0], {
+            'loan_amount': '1000.0', 'interest_rate': '0.0', 'loan_term': '12',
+            'monthly_payment': '83.33', 'total_payable': '1000.0', 'total_interest': '0.0',
+        })
+        self.assertEqual(float(rows[-1]['monthly_payment']), round(float(monthly_payments([5000], [10], [36])[0]), 2))
+
+    # Test pricing an explicit list of scenarios in a process pool, as NDJSON
+    def test_price_scenarios_with_workers(self):
+        scenarios = [{'loan_amount': 1000 + index, 'interest_rate': 5.5, 'loan_term': 24} for index in range(20)]
+        job = self.run_jobs(self.submit('price_scenarios', {'scenarios': scenarios, 'format': 'ndjson'}).json()['id'], workers=2)
+
+        # Assert that every scenario is in the result, in order
+        self.assertEqual(job['status'], 'succeeded')
+        lines = [json.loads(line) for line in self.download(job).splitlines()]
+        self.assertEqual([line['loan_amount'] for line in lines], [scenario['loan_amount'] for scenario in scenarios])
+
+    # Test exporting the schedules of a customer's offers
+    def test_export_offer_schedules(self):
+        other = Customer.objects.create(first_name='Jane', last_name='Doe', email='jane@example.com')
+        LoanOffer.objects.create(customer=other, loan_amount=500.00, interest_rate=1, loan_term=6)
+        job = self.run_jobs(self.submit('export_offer_schedules', {'customer': self.customer.id}).json()['id'])
+
+        # Assert that only the customer's offers were exported, one row per period
+        self.assertEqual((job['status'], job['progress'], job['total']), ('succeeded', 3, 3))
+        rows = list(csv.DictReader(io.StringIO(self.download(job))))
+        self.assertEqual(len(rows), 12 + 24 + 36)
+        self.assertEqual({int(row['offer']) for row in rows}, {offer.id for offer in self.offers})
+
+    # Test that invalid jobs are rejected with errors per parameter
+    def test_invalid_jobs(self):
+        response = self.submit('unknown', {})
+        self.assertIn('kind', response.json())
+
+        response = self.submit('price_scenarios', {'scenarios': [{'loan_amount': -1, 'interest_rate': 5, 'loan_term': 12}]})
+        self.assertEqual(response.json()['params']['scenarios'], ['Scenario 0: Loan amount must be a positive value.'])
+
+        # Assert that scenarios get the calculator's own messages, including its term limit
+        response = self.submit('price_scenarios', {'scenarios': [{'loan_amount': 'abc', 'interest_rate': 5, 'loan_term': 12}]})
+        self.assertEqual(response.json()['params']['scenarios'], ['Scenario 0: Invalid input values'])
+        response = self.submit('price_scenarios', {'scenarios': [{'loan_amount': 1000, 'interest_rate': 5, 'loan_term': 100000}]})
+        self.assertEqual(response.json()['params']['scenarios'], ['Scenario 0: Loan term must be at most 1200 months.'])
+
+        response = self.submit('price_scenarios', {'loan_amounts': [1000], 'interest_rates': [5]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # a range running backwards would queue a job without scenarios
+        response = self.submit('price_scenarios', {
+            'loan_amounts': [1000], 'interest_rates': {'start': 5, 'stop': 1, 'step': 1}, 'loan_terms': [12],
+        })
+        self.assertEqual(response.json()['params']['interest_rates'], ['Stop must not be smaller than start.'])
+
+        response = self.submit('price_scenarios', {
+            'loan_amounts': list(range(1, 101)), 'interest_rates': list(range(11)), 'loan_terms': [12],
+        })
+        self.assertEqual(response.json()['params']['non_field_errors'], ['A job may price at most 1000 scenarios.'])
+
+        response = self.submit('export_offer_schedules', {'customer': 999})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that a result can't be downloaded before the job succeeded
+    def test_result_not_ready(self):
+        job = self.submit('export_offer_schedules', {}).json()
+        response = self.client.get(reverse('job-result', args=[job['id']]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    # Test that a failing job is recorded as failed with its error
+    def test_failed_job(self):
+        job = Job.objects.create(kind='price_scenarios', params={'format': 'csv'})
+        with self.assertLogs('loan.jobs', level='ERROR'):
+            job = self.run_jobs(job.id)
+        self.assertEqual(job['status'], 'failed')
+        self.assertTrue(job['error'])
+        self.assertIsNone(job['result'])
+
+    # Test that running jobs without a heartbeat are queued again and completed
+    def test_stale_job_requeued(self):
+        job = Job.objects.create(
+            kind='export_offer_schedules', params={'format': 'csv'}, status=Job.Status.RUNNING,
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(self.run_jobs(job.id)['status'], 'succeeded')
+
+    # Test that jobs can be listed by status
+    def test_list_by_status(self):
+        queued = self.submit('export_offer_schedules', {}).json()
+        Job.objects.create(kind='export_offer_schedules', status=Job.Status.SUCCEEDED)
+        response = self.client.get(reverse('job-create'), {'status': 'queued'})
+        self.assertEqual([job['id'] for job in response.json()['results']], [queued['id']])
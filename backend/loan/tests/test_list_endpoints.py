@@ -0,0 +1,93 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer, LoanOffer
+
+# This class contains tests for the Customer list API endpoint.
+class CustomerListTests(APITestCase):
+
+    # The setUp method is called before each test. It creates a few customers.
+    def setUp(self):
+        # URL for listing customers
+        self.url = reverse('customer-create')
+
+        # Create five test customers in the database
+        self.customers = [
+            Customer.objects.create(first_name=f'Name{number}', last_name='Doe', email=f'customer{number}@example.com')
+            for number in range(5)
+        ]
+
+    # Test walking through every page with the cursor
+    def test_list_customers_keyset_pages(self):
+        # Send a GET request for the first page of two customers
+        response = self.client.get(self.url, {'page_size': 2})
+
+        # Assert that the response status code is 200 OK
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Follow the next links until the last page
+        ids = []
+        while True:
+            response_data = response.json()
+            ids.extend(customer['id'] for customer in response_data['results'])
+            if not response_data['next']:
+                break
+            response = self.client.get(response_data['next'])
+
+        # Assert that every customer was returned once, in id order
+        self.assertEqual(ids, [customer.id for customer in self.customers])
+
+    # Test filtering customers by email
+    def test_list_customers_filter_email(self):
+        response = self.client.get(self.url, {'email': 'customer3@example.com'})
+
+        # Assert that only the matching customer is returned
+        self.assertEqual([customer['id'] for customer in response.json()['results']], [self.customers[3].id])
+
+        # Assert that an invalid email filter is rejected
+        response = self.client.get(self.url, {'email': 'not-an-email'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['email'][0], 'Enter a valid email address.')
+
+# This class contains tests for the LoanOffer list API endpoint.
+class LoanOfferListTests(APITestCase):
+
+    # The setUp method is called before each test. It creates customers with a few loan offers.
+    def setUp(self):
+        # URL for listing loan offers
+        self.url = reverse('loanoffer-create')
+
+        # Create two test customers with loan offers
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.other_customer = Customer.objects.create(first_name='John', last_name='Smith', email='johnsmith@example.com')
+        self.small = LoanOffer.objects.create(customer=self.customer, loan_amount=1000.00, interest_rate=3.5, loan_term=12)
+        self.large = LoanOffer.objects.create(customer=self.customer, loan_amount=50000.00, interest_rate=7.25, loan_term=120)
+        self.other = LoanOffer.objects.create(customer=self.other_customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+
+    # Helper returning the ids of the offers listed for the given query parameters
+    def listed_ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [offer['id'] for offer in response.json()['results']]
+
+    # Test filtering loan offers by customer and by amount, rate and term ranges
+    def test_list_offers_filters(self):
+        self.assertEqual(self.listed_ids({}), [self.small.id, self.large.id, self.other.id])
+        self.assertEqual(self.listed_ids({'customer': self.customer.id}), [self.small.id, self.large.id])
+        self.assertEqual(self.listed_ids({'min_amount': 5000, 'max_amount': 20000}), [self.other.id])
+        self.assertEqual(self.listed_ids({'min_rate': '5.5'}), [self.large.id, self.other.id])
+        self.assertEqual(self.listed_ids({'max_term': 24, 'customer': self.customer.id}), [self.small.id])
+
+    # Test that invalid filter values are rejected
+    def test_list_offers_invalid_filter(self):
+        response = self.client.get(self.url, {'min_amount': 'abc', 'max_term': '1.5'})
+
+        # Assert that the response status code is 400 BAD REQUEST with an error per parameter
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.json()), {'min_amount', 'max_term'})
+
+    # Test that a page of offers is loaded with a single query
+    def test_list_offers_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['results']), 3)
@@ -1,3 +1,5 @@
+import json
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -99,3 +101,175 @@ class LoanCalculatorTests(APITestCase):
         # Assert that the response contains the correct error message for 'loan_term'
         self.assertIn('loan_term', response_data)
         self.assertEqual(response_data['loan_term'], 'Loan term must be a positive value.')
+
+    # Test that a payment beyond the float range is a 400 rather than a server error or NaN
+    def test_calculate_monthly_payment_overflow(self):
+        response = self.client.post(self.url, {'loan_amount': 10000.00, 'interest_rate': 1e6, 'loan_term': 1200}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'error': 'The monthly payment of these values is too large to compute.'})
+
+        response = self.client.post(self.url, {'loan_amount': 10000.00, 'interest_rate': 50, 'loan_term': 100000}, format='json')
+        self.assertEqual(response.json(), {'loan_term': 'Loan term must be at most 1200 months.'})
+
+# This class contains tests for the batch Loan Calculator API endpoint.
+class LoanCalculatorBatchTests(APITestCase):
+
+    # The setUp method is called before each test. It sets up the URL for the batch endpoint.
+    def setUp(self):
+        # URL for the batch loan calculator endpoint
+        self.url = reverse('loan-calculator-batch')
+
+    # Test calculating several valid scenarios, including a zero interest rate
+    def test_batch_valid_scenarios(self):
+        # Send a POST request with two valid scenarios
+        response = self.client.post(self.url, {'scenarios': [
+            {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+            {'loan_amount': 1200.00, 'interest_rate': 0, 'loan_term': 12},
+        ]}, format='json')
+
+        # Assert that the response status code is 200 OK
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Parse the response data
+        response_data = response.json()
+
+        # Assert that every scenario was calculated
+        self.assertEqual(response_data['count'], 2)
+        self.assertEqual(response_data['error_count'], 0)
+        self.assertAlmostEqual(response_data['results'][0]['monthly_payment'], 440.96, places=2)
+        self.assertAlmostEqual(response_data['results'][1]['monthly_payment'], 100.00, places=2)
+
+    # Test that invalid scenarios get their own errors without failing the whole batch
+    def test_batch_per_item_errors(self):
+        # Send a POST request (as a bare list) mixing valid and invalid scenarios
+        response = self.client.post(self.url, [
+            {'loan_amount': -10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+            {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+            {'loan_amount': 'abc', 'interest_rate': 5.5, 'loan_term': 24},
+            'not-a-scenario',
+        ], format='json')
+
+        # Assert that the response status code is 200 OK
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Parse the response data
+        results = response.json()['results']
+
+        # Assert that each result lines up with its scenario
+        self.assertEqual(results[0], {'errors': {'loan_amount': 'Loan amount must be a positive value.'}})
+        self.assertAlmostEqual(results[1]['monthly_payment'], 440.96, places=2)
+        self.assertEqual(results[2], {'errors': {'error': 'Invalid input values'}})
+        self.assertEqual(results[3], {'errors': {'error': 'Invalid input values'}})
+
+    # Test that scenarios whose payment overflows a float get errors instead of NaN, which isn't valid JSON
+    def test_batch_non_finite_payments(self):
+        response = self.client.post(self.url, [
+            {'loan_amount': 1000, 'interest_rate': 50, 'loan_term': 100000},
+            {'loan_amount': 1e308, 'interest_rate': 500, 'loan_term': 1200},
+            {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24},
+        ], format='json')
+
+        # Assert that the body is valid JSON and the valid scenario is still priced
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response_data = json.loads(response.content, parse_constant=self.fail)
+        self.assertEqual(response_data['error_count'], 2)
+        self.assertEqual(response_data['results'][0], {'errors': {'loan_term': 'Loan term must be at most 1200 months.'}})
+        self.assertEqual(response_data['results'][1], {'errors': {'error': 'The monthly payment of these values is too large to compute.'}})
+        self.assertEqual(response_data['results'][2], {'monthly_payment': 440.96})
+
+    # Test that a payload without a list of scenarios is rejected
+    def test_batch_invalid_payload(self):
+        # Send a POST request without scenarios
+        response = self.client.post(self.url, {'loan_amount': 10000.00}, format='json')
+
+        # Assert that the response status code is 400 BAD REQUEST
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that batches above the configured size are rejected
+    def test_batch_too_large(self):
+        scenario = {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+        with self.settings(LOAN_CALCULATOR_BATCH_MAX_SIZE=2):
+            # Send a POST request with more scenarios than allowed
+            response = self.client.post(self.url, {'scenarios': [scenario] * 3}, format='json')
+
+        # Assert that the response status code is 400 BAD REQUEST
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+# This class contains tests for the lean fast path of the Loan Calculator API endpoint.
+class LoanCalculatorFastPathTests(APITestCase):
+
+    # The setUp method is called before each test. It sets up the URLs of both calculator routes.
+    def setUp(self):
+        self.url = reverse('loan-calculator')
+        self.fast_url = reverse('loan-calculator-fast')
+
+    # Helper posting the same body to both routes and returning (status, JSON body) of each
+    def post_both(self, body, content_type='application/json'):
+        responses = [self.client.generic('POST', url, body, content_type=content_type) for url in (self.url, self.fast_url)]
+        return [(response.status_code, response.json()) for response in responses]
+
+    # Test that both routes return the same status codes and bodies for valid and invalid payloads
+    def test_same_responses(self):
+        bodies = [
+            '{"loan_amount": 10000.00, "interest_rate": 5.5, "loan_term": 24}',
+            '{"loan_amount": 10000.00, "interest_rate": 0, "loan_term": 24}',
+            '{"loan_amount": -10000.00, "interest_rate": 5.5, "loan_term": 24}',
+            '{"loan_amount": 10000.00, "interest_rate": -5.5, "loan_term": 24}',
+            '{"loan_amount": 10000.00, "interest_rate": 5.5, "loan_term": -24}',
+            '{"loan_amount": "abc", "interest_rate": 5.5, "loan_term": 24}',
+            '{"loan_amount": 10000.00}',
+            '[1, 2, 3]',
+            '',
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                drf, fast = self.post_both(body)
+                self.assertEqual(drf, fast)
+
+    # Test that form-encoded payloads are accepted like DRF's form parser does
+    def test_form_payload(self):
+        drf, fast = self.post_both('loan_amount=10000&interest_rate=5.5&loan_term=24', 'application/x-www-form-urlencoded')
+        self.assertEqual(drf, fast)
+        self.assertEqual(fast, (status.HTTP_200_OK, {'monthly_payment': 440.96}))
+
+    # Test that malformed JSON, unsupported media types and other methods get DRF's status codes
+    def test_request_errors(self):
+        # Assert that malformed JSON gets DRF's exact error body, and that what only orjson rejects is accepted
+        for body in ('{"loan_amount": ', '{"loan_amount": NaN}', '{"loan_amount": 1e99999}', b'{"\xff": 1}',
+                     '{"loan_amount": 100000000000000000000, "interest_rate": 5.5, "loan_term": 24}'):
+            with self.subTest(body=body):
+                drf, fast = self.post_both(body)
+                self.assertEqual(drf, fast)
+        self.assertEqual(self.post_both('{"loan_amount": ')[1][0], status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(self.post_both('amount', 'text/plain')[0], self.post_both('amount', 'text/plain')[1])
+
+        response = self.client.put(self.fast_url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(response.json(), self.client.put(self.url).json())
+
+    # Test that the fast path still rejects unknown hosts and answers CORS requests with CORS headers
+    def test_host_and_cors(self):
+        body = {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+        response = self.client.post(self.fast_url, body, format='json', HTTP_HOST='evil.example.com')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Assert that a preflight gets the CORS headers instead of a 405
+        response = self.client.options(
+            self.fast_url, HTTP_ORIGIN='http://localhost:3000', HTTP_ACCESS_CONTROL_REQUEST_METHOD='POST',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'http://localhost:3000')
+
+        # Assert that the cross-origin request itself carries them too
+        response = self.client.post(self.fast_url, body, format='json', HTTP_ORIGIN='http://localhost:3000')
+        self.assertEqual(response.json(), {'monthly_payment': 440.96})
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'http://localhost:3000')
+
+    # Test that the route is served without the fast path middleware too
+    @override_settings(LOAN_CALCULATOR_FAST_PATH=False)
+    def test_without_fast_path_middleware(self):
+        response = self.client.post(self.fast_url, {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'monthly_payment': 440.96})
+
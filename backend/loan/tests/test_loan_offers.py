@@ -80,6 +80,9 @@ class LoanOfferTests(APITestCase):
         self.assertEqual(response_data['interest_rate'], '5.50')
         self.assertEqual(response_data['loan_term'], 24)
 
+        # Assert that the response contains the exact monthly payment
+        self.assertEqual(response_data['monthly_payment'], '440.96')
+
     # Test creating a loan offer with invalid data (non-existent customer ID)
     def test_create_loan_offer_invalid(self):
         # Send a POST request to create a new loan offer with invalid data
@@ -132,3 +135,19 @@ class LoanOfferTests(APITestCase):
         # Assert that the response contains the correct error message for 'loan_amount'
         self.assertIn('loan_amount', response_data)
         self.assertEqual(response_data['loan_amount'][0], "Loan amount must be a positive value.")
+
+    # Test that terms whose payment columns would overflow are rejected instead of failing the insert
+    def test_create_loan_offer_too_large(self):
+        payload = {'customer': self.customer.id, 'loan_amount': '99999999.99', 'interest_rate': '99.99', 'loan_term': 10000000}
+        response = self.client.post(self.loan_offer_url, payload, format='json')
+
+        # Assert that the response is a 400 with the limit of the loan term
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['loan_term'][0], 'Loan term must be at most 1200 months.')
+
+        # Assert that the largest accepted terms are stored
+        payload.update(interest_rate='999.99', loan_term=1200)
+        self.assertEqual(self.client.post(self.loan_offer_url, payload, format='json').status_code, status.HTTP_201_CREATED)
+        payload['loan_amount'] = '100000000.00'
+        self.assertIn('loan_amount', self.client.post(self.loan_offer_url, payload, format='json').json())
+
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer, LoanOffer
+
+# This class contains tests for the amortization schedule API endpoints.
+class LoanScheduleTests(APITestCase):
+
+    # The setUp method is called before each test. It sets up common test data and URLs.
+    def setUp(self):
+        # URL for the ad-hoc schedule endpoint
+        self.url = reverse('loan-calculator-schedule')
+
+        # Query parameters with valid loan data
+        self.valid_params = {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+
+        # Create a test customer with two loan offers
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.offer = LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+        LoanOffer.objects.create(customer=self.customer, loan_amount=250000.00, interest_rate=3.75, loan_term=360)
+
+    # Helper to read an NDJSON streaming response into a list of dicts
+    def read_ndjson(self, response):
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    # Test streaming an ad-hoc schedule as NDJSON
+    def test_schedule_ndjson(self):
+        # Send a GET request for the schedule
+        response = self.client.get(self.url, self.valid_params)
+
+        # Assert that the response is a 200 OK NDJSON stream
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = self.read_ndjson(response)
+
+        # Assert that there is one row per period and the loan is fully paid off
+        self.assertEqual(len(rows), 24)
+        self.assertEqual(rows[0]['period'], 1)
+        self.assertAlmostEqual(rows[0]['payment'], 440.96, places=2)
+        self.assertAlmostEqual(rows[0]['interest'], 45.83, places=2)
+        self.assertAlmostEqual(rows[0]['principal'], 395.12, places=2)
+        self.assertEqual(rows[-1]['balance'], 0.0)
+
+        # Assert that the principal repaid adds up to the loan amount
+        self.assertAlmostEqual(sum(row['principal'] for row in rows), 10000.00, delta=0.05)
+
+    # Test streaming an ad-hoc schedule as CSV
+    def test_schedule_csv(self):
+        # Send a GET request for the schedule in CSV format
+        response = self.client.get(self.url, {**self.valid_params, 'format': 'csv'})
+
+        # Assert that the response is a 200 OK CSV stream
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        # Assert that the CSV has a header and one row per period
+        self.assertEqual(rows[0], ['period', 'payment', 'principal', 'interest', 'balance'])
+        self.assertEqual(len(rows), 25)
+
+    # Test that invalid loan data and formats are rejected
+    def test_schedule_invalid(self):
+        # Send GET requests with an invalid loan term, an unknown format and a too long term
+        response = self.client.get(self.url, {**self.valid_params, 'loan_term': -24})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['loan_term'], 'Loan term must be a positive value.')
+
+        response = self.client.get(self.url, {**self.valid_params, 'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(LOAN_SCHEDULE_MAX_TERM=12):
+            response = self.client.get(self.url, self.valid_params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test streaming the schedule of a stored loan offer
+    def test_offer_schedule(self):
+        # Send a GET request for the offer's schedule
+        response = self.client.get(reverse('loanoffer-schedule', args=[self.offer.id]))
+
+        # Assert that the response status code is 200 OK
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = self.read_ndjson(response)
+
+        # Assert that every row belongs to the offer
+        self.assertEqual(len(rows), 24)
+        self.assertTrue(all(row['offer'] == self.offer.id for row in rows))
+
+        # Assert that a missing offer returns 404 NOT FOUND
+        response = self.client.get(reverse('loanoffer-schedule', args=[999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # Test streaming the schedules of all of a customer's offers
+    def test_offers_schedules(self):
+        # Send a GET request for the customer's schedules
+        response = self.client.get(reverse('loanoffer-schedules'), {'customer': self.customer.id})
+
+        # Assert that the response status code is 200 OK
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = self.read_ndjson(response)
+
+        # Assert that both schedules were streamed
+        self.assertEqual(len(rows), 24 + 360)
+        self.assertEqual(rows[-1]['balance'], 0.0)
@@ -0,0 +1,109 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+# This class contains tests for the loan solve API endpoint.
+class LoanSolveTests(APITestCase):
+
+    # The setUp method is called before each test. It sets up the URL of the solve endpoint.
+    def setUp(self):
+        self.url = reverse('loan-calculator-solve')
+
+    # Test solving for the loan amount
+    def test_solve_amount(self):
+        # Send a POST request asking what can be borrowed at 400/month over 60 months
+        response = self.client.post(self.url, {'interest_rate': 5.5, 'loan_term': 60, 'monthly_payment': 400}, format='json')
+
+        # Assert that the amount is solved and the inputs are echoed back
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'solved_for': 'loan_amount', 'loan_amount': 20941.13, 'interest_rate': 5.5, 'loan_term': 60, 'monthly_payment': 400.0,
+        })
+
+    # Test solving for the interest rate
+    def test_solve_rate(self):
+        response = self.client.post(self.url, {'loan_amount': 1200, 'loan_term': 12, 'monthly_payment': 102.73}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['interest_rate'], 5.0019)
+
+    # Test solving for the loan term, rounded up to whole months
+    def test_solve_term(self):
+        response = self.client.post(self.url, {'loan_amount': 1000, 'interest_rate': 0, 'monthly_payment': 300}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['loan_term'], 4)
+
+    # Test solving for the monthly payment, like the calculator
+    def test_solve_payment(self):
+        response = self.client.post(self.url, {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}, format='json')
+        self.assertEqual(response.json()['monthly_payment'], 440.96)
+
+    # Test that a payment that can't repay the loan is reported
+    def test_infeasible(self):
+        response = self.client.post(self.url, {'loan_amount': 10000, 'interest_rate': 12, 'monthly_payment': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'non_field_errors': ["The monthly payment doesn't cover the monthly interest of the loan."]})
+
+    # Test that exactly three values must be given and that each is validated
+    def test_invalid_input(self):
+        response = self.client.post(self.url, {'loan_amount': 10000}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.json())
+
+        response = self.client.post(self.url, {'loan_amount': -5, 'loan_term': 12, 'monthly_payment': 'nan'}, format='json')
+        self.assertEqual(response.json(), {
+            'loan_amount': ['Loan amount must be a positive value.'],
+            'monthly_payment': ['A valid number is required.'],
+        })
+
+# This class contains tests for the payment grid API endpoint.
+class PaymentGridTests(APITestCase):
+
+    # The setUp method is called before each test. It sets up the URL of the grid endpoint.
+    def setUp(self):
+        self.url = reverse('loan-calculator-grid')
+
+    # Test a grid built from a list of rates and a range of terms
+    def test_grid(self):
+        response = self.client.post(self.url, {
+            'loan_amount': 10000,
+            'interest_rates': [0, 5.5],
+            'loan_terms': {'start': 12, 'stop': 36, 'step': 12},
+        }, format='json')
+
+        # Assert that there is a row per rate and a column per term
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'loan_amount': 10000.0,
+            'interest_rates': [0.0, 5.5],
+            'loan_terms': [12, 24, 36],
+            'monthly_payments': [[833.33, 416.67, 277.78], [858.37, 440.96, 301.96]],
+        })
+
+    # Test that a float range keeps its stop despite floating point error
+    def test_float_range(self):
+        response = self.client.post(self.url, {
+            'loan_amount': 10000, 'interest_rates': {'start': 0.1, 'stop': 0.3, 'step': 0.1}, 'loan_terms': [12],
+        }, format='json')
+        self.assertEqual(response.json()['interest_rates'], [0.1, 0.2, 0.3])
+
+    # Test that invalid ranges and oversized grids are rejected
+    @override_settings(LOAN_CALCULATOR_GRID_MAX_CELLS=4)
+    def test_invalid_grid(self):
+        response = self.client.post(self.url, {
+            'loan_amount': 10000, 'interest_rates': {'start': 0, 'stop': 1, 'step': 0}, 'loan_terms': [],
+        }, format='json')
+        self.assertEqual(response.json(), {
+            'interest_rates': ['Step must be a positive value.'],
+            'loan_terms': ['This list may not be empty.'],
+        })
+
+        # Assert that a range running backwards is rejected rather than making an empty grid
+        response = self.client.post(self.url, {
+            'loan_amount': 10000, 'interest_rates': {'start': 5, 'stop': 1, 'step': 1}, 'loan_terms': [12],
+        }, format='json')
+        self.assertEqual(response.json(), {'interest_rates': ['Stop must not be smaller than start.']})
+
+        response = self.client.post(self.url, {'loan_amount': 10000, 'interest_rates': [1, 2, 3], 'loan_terms': [12, 24]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'non_field_errors': ['A grid may contain at most 4 cells.']})
@@ -0,0 +1,110 @@
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.metrics import DB_QUERIES, REQUEST_DURATION, REQUESTS, SERIALIZER_VALIDATION, Counter, Histogram
+from loan.models import Customer, LoanOffer
+
+CUSTOMER_DETAIL_ROUTE = 'api/v1/customers/<int:pk>'
+
+# This class contains tests for the metric types and their text exposition.
+class MetricTypesTests(TestCase):
+
+    # Test that a histogram fills cumulative buckets and exposes sum and count
+    def test_histogram(self):
+        histogram = Histogram('test_seconds', 'Test histogram.', ['route'], buckets=(0.1, 1))
+        histogram.observe(0.05, route='a')
+        histogram.observe(0.5, route='a')
+        lines = histogram.exposition()
+
+        # Assert that each bucket counts the observations at or below its bound
+        self.assertIn('# TYPE test_seconds histogram', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="+Inf"} 2', lines)
+        self.assertIn('test_seconds_count{route="a"} 2', lines)
+
+    # Test that label values are escaped and that the label names are enforced
+    def test_counter_labels(self):
+        counter = Counter('test_total', 'Test counter.', ['path'])
+        counter.inc(path='say "hi"')
+        self.assertIn('test_total{path="say \\"hi\\""} 1', counter.exposition())
+        with self.assertRaises(ValueError):
+            counter.inc(other='x')
+
+# This class contains tests for the metrics middleware and the /metrics endpoint.
+class MetricsMiddlewareTests(APITestCase):
+
+    # The setUp method is called before each test. It creates a customer with an offer and clears the metrics.
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+        for metric in (REQUEST_DURATION, REQUESTS, DB_QUERIES, SERIALIZER_VALIDATION):
+            metric.clear()
+
+    # Test that latency, status and query count are recorded per route pattern
+    def test_request_recorded_per_route(self):
+        self.client.get(reverse('customer-detail', args=[self.customer.id]))
+        self.client.get(reverse('customer-detail', args=[self.customer.id + 100]))
+
+        # Assert that both customers share one series per route, split by status
+        self.assertEqual(REQUEST_DURATION.value(route=CUSTOMER_DETAIL_ROUTE, method='GET')['count'], 2)
+        self.assertEqual(REQUESTS.value(route=CUSTOMER_DETAIL_ROUTE, method='GET', status=200), 1)
+        self.assertEqual(REQUESTS.value(route=CUSTOMER_DETAIL_ROUTE, method='GET', status=404), 1)
+        # Assert that the detail queries were counted through the execute wrapper
+        self.assertGreaterEqual(DB_QUERIES.value(route=CUSTOMER_DETAIL_ROUTE)['sum'], 1)
+
+    # Test that streaming responses are recorded once they have been consumed, with the queries issued while streaming
+    def test_streaming_response(self):
+        response = self.client.get(reverse('loanoffer-schedules'), {'customer': self.customer.id})
+        self.assertIsNone(REQUEST_DURATION.value(route='api/v1/loanoffers/schedules', method='GET'))
+
+        b''.join(response.streaming_content)
+        self.assertEqual(REQUEST_DURATION.value(route='api/v1/loanoffers/schedules', method='GET')['count'], 1)
+        self.assertGreaterEqual(DB_QUERIES.value(route='api/v1/loanoffers/schedules')['sum'], 1)
+
+    # Test that requests to async views are recorded too, with the queries they ran in sync_to_async threads
+    async def test_async_request_recorded(self):
+        await self.async_client.get(reverse('async-customer-detail', args=[self.customer.id]))
+        self.assertEqual(REQUESTS.value(route='api/v1/async/customers/<int:pk>', method='GET', status=200), 1)
+        self.assertGreaterEqual(DB_QUERIES.value(route='api/v1/async/customers/<int:pk>')['sum'], 1)
+
+    # Test that the loan middleware runs natively under ASGI, so Django doesn't adapt it with a thread hop
+    @override_settings(DEBUG=True)
+    def test_asgi_middleware_not_adapted(self):
+        with self.assertNoLogs('django.request', level='DEBUG'):
+            ASGIHandler()
+
+    # Test that serializer validation time is recorded per serializer
+    def test_serializer_validation(self):
+        self.client.post(reverse('customer-create'), {'first_name': 'Jane', 'last_name': 'Doe', 'email': 'jane@example.com'}, format='json')
+        self.assertEqual(SERIALIZER_VALIDATION.value(serializer='CustomerSerializer')['count'], 1)
+
+    # Test that the /metrics endpoint serves the text exposition format
+    def test_metrics_endpoint(self):
+        self.client.post(reverse('loan-calculator'), {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}, format='json')
+        response = self.client.get(reverse('metrics'))
+
+        # Assert that the calculator request and the payment cache counters are exposed
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('loan_http_request_duration_seconds_count{route="api/v1/loan-calculator",method="POST"} 1', body)
+        self.assertIn('loan_calculator_cache{counter="misses"}', body)
+
+    # Test that the opt-in slow-request log includes the SQL of the request
+    @override_settings(LOAN_METRICS={'ENABLED': True, 'SLOW_REQUEST_SECONDS': 0})
+    def test_slow_request_log(self):
+        with self.assertLogs('loan.slow_requests', level='WARNING') as logs:
+            self.client.get(reverse('customer-detail', args=[self.customer.id]), {'expand': 'offers'})
+
+        # Assert that the log names the request and lists its queries
+        self.assertIn(f'GET /api/v1/customers/{self.customer.id}?expand=offers -> 200', logs.output[0])
+        self.assertIn('FROM "loan_customer"', logs.output[0])
+
+    # Test that nothing is recorded when the metrics are turned off
+    @override_settings(LOAN_METRICS={'ENABLED': False, 'SLOW_REQUEST_SECONDS': None})
+    def test_disabled(self):
+        self.client.get(reverse('customer-detail', args=[self.customer.id]))
+        self.assertIsNone(REQUEST_DURATION.value(route=CUSTOMER_DETAIL_ROUTE, method='GET'))
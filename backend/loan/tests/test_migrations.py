@@ -0,0 +1,66 @@
+from decimal import Decimal
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+
+# This class contains tests for the data migrations, run against the historical models they were written for.
+class DataMigrationTests(TransactionTestCase):
+
+    # Helper to migrate the loan app to a migration and return the historical apps of that state
+    def migrate(self, name):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('loan', name)])
+        return executor.loader.project_state([('loan', name)]).apps
+
+    # The setUp method is called before each test. It brings the schema back to the latest migration afterwards.
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.addCleanup(lambda: MigrationExecutor(connection).migrate(executor.loader.graph.leaf_nodes()))
+
+    # Test that migration 0005 fills the payment columns, leaving offers too large for them empty
+    def test_backfill_loanoffer_payments(self):
+        apps = self.migrate('0004_loanoffer_payment_columns')
+        customer = apps.get_model('loan', 'Customer').objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        offers = apps.get_model('loan', 'LoanOffer').objects
+        offer = offers.create(customer=customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+        overflow = offers.create(customer=customer, loan_amount=Decimal('99999999.99'), interest_rate=Decimal('99.99'), loan_term=10000000)
+
+        offers = self.migrate('0005_backfill_loanoffer_payments').get_model('loan', 'LoanOffer').objects
+        self.assertEqual(
+            offers.values('monthly_payment', 'total_payable', 'total_interest').get(pk=offer.pk),
+            {'monthly_payment': Decimal('440.96'), 'total_payable': Decimal('10583.04'), 'total_interest': Decimal('583.04')},
+        )
+        self.assertIsNone(offers.get(pk=overflow.pk).monthly_payment)
+
+    # Test that migration 0007 summarizes the offers into the term buckets of its time, whatever the settings say now
+    @override_settings(LOAN_PORTFOLIO_TERM_BUCKETS=[100])
+    def test_portfolio_summary(self):
+        apps = self.migrate('0006_updated_at')
+        customer = apps.get_model('loan', 'Customer').objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        offers = apps.get_model('loan', 'LoanOffer').objects
+        for loan_amount, loan_term in ((10000, 24), (20000, 30), (5000, 400)):
+            offers.create(customer=customer, loan_amount=loan_amount, interest_rate=5, loan_term=loan_term, total_interest=100)
+
+        summaries = self.migrate('0007_portfolio_summary').get_model('loan', 'PortfolioSummary').objects
+        self.assertEqual(
+            {row['term_bucket']: row for row in summaries.values('term_bucket', 'offer_count', 'total_exposure', 'expected_total_interest')},
+            {
+                '13-36': {'term_bucket': '13-36', 'offer_count': 2, 'total_exposure': Decimal('30000'), 'expected_total_interest': Decimal('200')},
+                '361+': {'term_bucket': '361+', 'offer_count': 1, 'total_exposure': Decimal('5000'), 'expected_total_interest': Decimal('100')},
+            },
+        )
+
+    # Test that migration 0009 indexes the existing customers for search and drops the index when reversed
+    def test_customer_search(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('The full text index is SQLite only.')
+        apps = self.migrate('0008_job')
+        apps.get_model('loan', 'Customer').objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+
+        self.migrate('0009_customer_search')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT rowid FROM loan_customer_search WHERE loan_customer_search MATCH 'lohja'")
+            self.assertEqual(len(cursor.fetchall()), 1)
+
+        self.migrate('0008_job')
+        self.assertNotIn('loan_customer_search', connection.introspection.table_names())
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from django.test import TestCase
 from loan.models import Customer, LoanOffer
 
@@ -42,3 +43,12 @@ class LoanOfferModelTests(TestCase):
     def test_loan_offer_str(self):
         # Assert that the string representation of the loan offer is correct
         self.assertEqual(str(self.loan_offer), f'Loan for {self.customer} - Amount: 10000.0')
+
+
+    # Test the payment method of the LoanOffer model
+    def test_loan_offer_payment(self):
+        # Reload the offer so its fields are the stored Decimals
+        self.loan_offer.refresh_from_db()
+
+        # Assert that the payment is computed exactly from the stored values
+        self.assertEqual(self.loan_offer.payment().monthly_payment, Decimal('440.96'))
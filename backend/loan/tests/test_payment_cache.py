@@ -0,0 +1,81 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.cache import cached_monthly_payment, payment_cache, payment_cache_key
+
+# This class contains tests for the payment cache in front of the loan calculator.
+class PaymentCacheTests(TestCase):
+
+    # The setUp method is called before each test. It empties the cache and resets its counters.
+    def setUp(self):
+        self.cache, self.stats = payment_cache()
+        self.cache.clear()
+        self.stats.reset()
+
+    # Test that equivalent inputs share the same normalized cache key
+    def test_cache_key_normalized(self):
+        self.assertEqual(payment_cache_key(10000, 5.5, 24), payment_cache_key('10000.00', '5.50', 24))
+        self.assertNotEqual(payment_cache_key(10000, 5.5, 24), payment_cache_key(10000, 5.5, 36))
+
+    # Test that repeated lookups are served from the cache and counted
+    def test_hits_and_misses(self):
+        first = cached_monthly_payment(10000.00, 5.5, 24)
+        second = cached_monthly_payment(10000, 5.50, 24)
+
+        # Assert that both calls return the same payment with one miss and one hit
+        self.assertEqual(first, second)
+        self.assertEqual(self.stats.snapshot()['misses'], 1)
+        self.assertEqual(self.stats.snapshot()['hits'], 1)
+        self.assertEqual(self.stats.snapshot()['hit_ratio'], 0.5)
+
+    # Test that the cache can be bypassed
+    @override_settings(LOAN_CALCULATOR_CACHE={'ENABLED': False, 'ALIAS': 'loan-calculator'})
+    def test_bypass(self):
+        cached_monthly_payment(10000.00, 5.5, 24)
+        cached_monthly_payment(10000.00, 5.5, 24)
+
+        # Assert that the cache was not used at all
+        self.assertEqual(self.stats.snapshot()['hits'], 0)
+        self.assertEqual(self.stats.snapshot()['misses'], 0)
+
+    # Test that entries culled from a full cache are counted as evictions
+    def test_evictions(self):
+        with self.settings(CACHES={'loan-calculator': {
+            'BACKEND': 'loan.cache.CountingLocMemCache',
+            'LOCATION': 'loan-calculator-evictions',
+            'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 2},
+        }}):
+            for term in (12, 24, 36):
+                cached_monthly_payment(10000.00, 5.5, term)
+            _, stats = payment_cache()
+
+            # Assert that the third entry forced one eviction
+            self.assertEqual(stats.snapshot()['evictions'], 1)
+        caches['loan-calculator'].clear()
+
+# This class contains tests for the payment cache statistics API endpoint.
+class PaymentCacheStatsTests(APITestCase):
+
+    # Test that the counters are exposed after calling the calculator
+    def test_cache_stats(self):
+        cache, stats = payment_cache()
+        cache.clear()
+        stats.reset()
+
+        # Send the same calculation twice
+        payload = {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+        self.client.post(reverse('loan-calculator'), payload, format='json')
+        self.client.post(reverse('loan-calculator'), payload, format='json')
+
+        # Send a GET request for the cache statistics
+        response = self.client.get(reverse('loan-calculator-cache-stats'))
+
+        # Assert that the response status code is 200 OK and the counters are reported
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response_data = response.json()
+        self.assertTrue(response_data['enabled'])
+        self.assertEqual(response_data['hits'], 1)
+        self.assertEqual(response_data['misses'], 1)
+        self.assertEqual(response_data['evictions'], 0)
@@ -0,0 +1,101 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer, LoanOffer, PortfolioSummary
+from loan.portfolio import rebuild_portfolio_summary
+
+# This class contains tests for the stored payment columns of the LoanOffer model.
+class PaymentColumnsTests(TestCase):
+
+    # The setUp method is called before each test. It creates a customer with a loan offer.
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.offer = LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+
+    # Test that the payment columns are filled when an offer is saved
+    def test_filled_on_save(self):
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.monthly_payment, Decimal('440.96'))
+        self.assertEqual(self.offer.total_payable, Decimal('10583.04'))
+        self.assertEqual(self.offer.total_interest, Decimal('583.04'))
+
+    # Test that the payment columns follow changes saved with update_fields
+    def test_recomputed_with_update_fields(self):
+        self.offer.loan_term = 12
+        self.offer.save(update_fields=['loan_term'])
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.monthly_payment, Decimal('858.37'))
+
+    # Test that the backfill command fills missing payments in batches
+    def test_backfill_command(self):
+        LoanOffer.objects.create(customer=self.customer, loan_amount=1200.00, interest_rate=3.0, loan_term=12)
+        LoanOffer.objects.update(monthly_payment=None, total_interest=None, total_payable=None)
+
+        stdout = StringIO()
+        call_command('backfill_payments', batch_size=1, stdout=stdout)
+
+        # Assert that every offer was backfilled, one batch at a time
+        self.assertFalse(LoanOffer.objects.filter(monthly_payment__isnull=True).exists())
+        self.assertEqual(LoanOffer.objects.get(pk=self.offer.pk).monthly_payment, Decimal('440.96'))
+        self.assertIn('1 offers updated', stdout.getvalue())
+        self.assertIn('Backfilled payments of 2 offers.', stdout.getvalue())
+
+    # Test that the backfill command only touches offers without a payment unless --all is given
+    def test_backfill_command_all(self):
+        LoanOffer.objects.update(monthly_payment=1)
+
+        call_command('backfill_payments', stdout=StringIO())
+        self.assertEqual(LoanOffer.objects.get(pk=self.offer.pk).monthly_payment, Decimal('1.00'))
+
+        call_command('backfill_payments', all=True, stdout=StringIO())
+        self.assertEqual(LoanOffer.objects.get(pk=self.offer.pk).monthly_payment, Decimal('440.96'))
+
+    # Test that recomputed payments move the portfolio summary along, like the offer writes do
+    def test_backfill_adjusts_summary(self):
+        LoanOffer.objects.update(total_interest=1)
+        rebuild_portfolio_summary(LoanOffer, PortfolioSummary)
+
+        call_command('backfill_payments', all=True, stdout=StringIO())
+        summary = PortfolioSummary.objects.get()
+        self.assertEqual(summary.expected_total_interest, Decimal('583.04'))
+        self.assertEqual(summary.offer_count, 1)
+
+    # Test that payments too large for the columns raise a validation error, and are left empty by the backfill
+    def test_payment_overflow(self):
+        offer = LoanOffer(customer=self.customer, loan_amount=Decimal('99999999.99'), interest_rate=Decimal('99.99'), loan_term=10000000)
+        with self.assertRaises(ValidationError):
+            offer.compute_payments()
+
+        # an offer stored before the loan term was bounded
+        LoanOffer.objects.filter(pk=self.offer.pk).update(loan_amount=Decimal('99999999.99'), interest_rate=Decimal('99.99'), loan_term=10000000)
+        call_command('backfill_payments', all=True, stdout=StringIO())
+        self.assertIsNone(LoanOffer.objects.get(pk=self.offer.pk).monthly_payment)
+
+# This class contains tests for filtering and sorting loan offers by monthly payment.
+class PaymentFilterTests(APITestCase):
+
+    # The setUp method is called before each test. It creates offers with different monthly payments.
+    def setUp(self):
+        customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.expensive = LoanOffer.objects.create(customer=customer, loan_amount=10000.00, interest_rate=5.5, loan_term=24)
+        self.cheap = LoanOffer.objects.create(customer=customer, loan_amount=1200.00, interest_rate=3.0, loan_term=12)
+        self.bulk = self.client.post(reverse('loanoffer-bulk-create'), [
+            {'customer': customer.id, 'loan_amount': 5000.00, 'interest_rate': 4.0, 'loan_term': 24},
+        ], format='json').json()['results'][0]['id']
+
+    # Test filtering offers under a monthly payment, including bulk created ones
+    def test_filter_max_payment(self):
+        response = self.client.get(reverse('loanoffer-create'), {'max_payment': 300})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([offer['id'] for offer in response.json()['results']], [self.cheap.id, self.bulk])
+
+    # Test sorting offers by monthly payment
+    def test_order_by_payment(self):
+        response = self.client.get(reverse('loanoffer-create'), {'ordering': '-monthly_payment'})
+        payments = [offer['monthly_payment'] for offer in response.json()['results']]
+        self.assertEqual(payments, ['440.96', '217.12', '101.63'])
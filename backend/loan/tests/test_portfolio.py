@@ -0,0 +1,106 @@
+from decimal import Decimal
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer, LoanOffer, PortfolioSummary
+from loan.portfolio import term_bucket
+
+# This class contains tests for the portfolio aggregation endpoints and the incrementally maintained summary rows.
+@override_settings(LOAN_PORTFOLIO_TERM_BUCKETS=[12, 36])
+class PortfolioTests(APITestCase):
+
+    # The setUp method is called before each test. It creates two customers with loan offers.
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.other = Customer.objects.create(first_name='Jane', last_name='Doe', email='jane@example.com')
+        LoanOffer.objects.create(customer=self.customer, loan_amount=10000.00, interest_rate=5.0, loan_term=12)
+        LoanOffer.objects.create(customer=self.customer, loan_amount=30000.00, interest_rate=3.0, loan_term=36)
+        self.offer = LoanOffer.objects.create(customer=self.other, loan_amount=5000.00, interest_rate=8.0, loan_term=48)
+
+    def portfolio(self, **params):
+        response = self.client.get(reverse('portfolio'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    # Test that the summary rows match the figures aggregated from the offer table
+    def test_summary_matches_live(self):
+        summary = self.portfolio()
+
+        # Assert that the totals are exposure weighted and bucketed by term
+        self.assertEqual(summary['offer_count'], 3)
+        self.assertEqual(Decimal(summary['total_exposure']), Decimal('45000.00'))
+        self.assertEqual(Decimal(summary['weighted_average_rate']), Decimal('4.0000'))
+        self.assertEqual([bucket['term_bucket'] for bucket in summary['term_buckets']], ['1-12', '13-36', '37+'])
+        self.assertEqual(summary, self.portfolio(source='live'))
+
+    # Test that the summary is read without scanning the offer table
+    def test_summary_queries(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('portfolio'))
+
+    # Test that updates, deletes, bulk creates and imports keep the summary rows in sync
+    def test_incremental_updates(self):
+        self.offer.loan_term = 6
+        self.offer.save()
+        LoanOffer.objects.filter(pk=self.customer.loanoffer_set.first().pk).first().delete()
+        self.client.post(reverse('loanoffer-bulk-create'), [
+            {'customer': self.other.id, 'loan_amount': 2000.00, 'interest_rate': 4.0, 'loan_term': 24},
+            {'customer': self.other.id, 'loan_amount': 3000.00, 'interest_rate': 0, 'loan_term': 60},
+        ], format='json')
+        self.assertEqual(self.portfolio(), self.portfolio(source='live'))
+
+        # Assert that deleting a customer removes its offers from the summary as well
+        self.other.delete()
+        summary = self.portfolio()
+        self.assertEqual(summary['offer_count'], 1)
+        self.assertEqual(summary, self.portfolio(source='live'))
+
+    # Test that imports adjust the summary by the difference of the updated offers
+    def test_import_updates(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'offers.csv')
+        for term in (12, 48):
+            with open(path, 'w') as file:
+                file.write('external_id,customer_email,loan_amount,interest_rate,loan_term\n'
+                           f'A1,glenlohja@example.com,10000.00,5.5,{term}\nA2,jane@example.com,2000,3,24\n')
+            call_command('import_offers', path, workers=0, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(self.portfolio()['offer_count'], 5)
+        self.assertEqual(self.portfolio(), self.portfolio(source='live'))
+
+    # Test that the rebuild command recomputes the rows, e.g. after the term buckets changed
+    def test_rebuild_command(self):
+        with self.settings(LOAN_PORTFOLIO_TERM_BUCKETS=[24]):
+            call_command('rebuild_portfolio_summary', stdout=StringIO())
+            self.assertEqual(set(PortfolioSummary.objects.values_list('term_bucket', flat=True)), {'1-24', '25+'})
+            self.assertEqual(term_bucket(36), '25+')
+            self.assertEqual(self.portfolio(), self.portfolio(source='live'))
+
+    # Test that an unknown source is rejected
+    def test_invalid_source(self):
+        response = self.client.get(reverse('portfolio'), {'source': 'cache'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that the per-customer figures are aggregated in SQL with a fixed number of queries
+    def test_customer_aggregates(self):
+        Customer.objects.create(first_name='No', last_name='Offers', email='none@example.com')
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('portfolio-customers'))
+
+        # Assert that customers without offers are left out and the figures are per customer
+        results = response.json()['results']
+        self.assertEqual([row['customer'] for row in results], [self.customer.id, self.other.id])
+        self.assertEqual(results[0]['offer_count'], 2)
+        self.assertEqual(Decimal(results[0]['total_exposure']), Decimal('40000.00'))
+        self.assertEqual(Decimal(results[0]['average_rate']), Decimal('4.0000'))
+        self.assertEqual(Decimal(results[0]['weighted_average_rate']), Decimal('3.5000'))
+        self.assertEqual([bucket['term_bucket'] for bucket in results[0]['term_buckets']], ['1-12', '13-36'])
+
+        # Assert that a single customer can be selected
+        response = self.client.get(reverse('portfolio-customers'), {'customer': self.other.id})
+        self.assertEqual([row['customer'] for row in response.json()['results']], [self.other.id])
@@ -0,0 +1,98 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.models import Customer, LoanOffer
+from loan.simulation import simulate
+
+OPTIONS = {'model': 'random_walk', 'volatility': 1.5, 'drift': 0.0, 'paths': 5000, 'seed': 7, 'reset_months': 12, 'percentiles': [5, 50, 95]}
+SHARDS = {'PATHS_PER_SHARD': 1000, 'OFFER_CHUNK_SIZE': 2, 'MAX_PATHS': 10000, 'MAX_REQUEST_STEPS': 10 ** 8}
+
+
+# This class contains tests for the Monte Carlo rate simulation.
+@override_settings(LOAN_SIMULATION=SHARDS)
+class SimulationTests(SimpleTestCase):
+
+    # Test that without volatility every path pays the fixed-rate schedule
+    def test_no_volatility(self):
+        offers = [(10000, 5.5, 24), (5000, 3, 12), (20000, 0, 36)]
+        result = simulate(offers, {**OPTIONS, 'volatility': 0})
+        self.assertEqual(result['peak_monthly_payment'], {'p5': 1419.98, 'p50': 1419.98, 'p95': 1419.98})
+        self.assertEqual(set(result['total_interest'].values()), {result['fixed_rate']['total_interest']})
+        self.assertEqual(result['fixed_rate']['monthly_payment'], 1419.98)
+
+    # Test that a seed reproduces the paths, however the shards are computed
+    def test_seeded_and_sharded(self):
+        offers = [(10000, 5.5, 24), (250000, 3.75, 360), (5000, 9, 60)]
+        result = simulate(offers, OPTIONS)
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(simulate(offers, OPTIONS, executor), result)
+        self.assertNotEqual(simulate(offers, {**OPTIONS, 'seed': 8}), result)
+        self.assertEqual((result['seed'], result['paths'], result['offers']), (7, 5000, 3))
+
+    # Test that rate uncertainty spreads the outcomes around the fixed-rate figures
+    def test_distribution(self):
+        result = simulate([(250000, 3.75, 360)], {
+            **OPTIONS, 'model': 'vasicek', 'initial_rate': 4.0, 'mean_rate': 4.0, 'reversion': 0.5,
+        })
+        interest = result['total_interest']
+        self.assertLess(interest['p5'], result['fixed_rate']['total_interest'])
+        self.assertGreater(interest['p95'], result['fixed_rate']['total_interest'])
+        # payments only change at resets, so the peak payment is never below today's payment
+        self.assertGreaterEqual(result['peak_monthly_payment']['p5'], result['fixed_rate']['monthly_payment'])
+
+
+# This class contains tests for the simulation endpoint and the simulate_rates command.
+@override_settings(LOAN_SIMULATION=SHARDS)
+class SimulationEndpointTests(APITestCase):
+
+    # The setUp method is called before each test. It creates a customer with two offers.
+    def setUp(self):
+        self.url = reverse('loanoffer-simulate')
+        self.customer = Customer.objects.create(first_name='Glen', last_name='Lohja', email='glenlohja@example.com')
+        self.offers = [
+            LoanOffer.objects.create(customer=self.customer, loan_amount=10000, interest_rate=5.5, loan_term=24),
+            LoanOffer.objects.create(customer=self.customer, loan_amount=5000, interest_rate=3, loan_term=12),
+        ]
+
+    # Test simulating a single offer and a customer's portfolio
+    def test_simulate(self):
+        response = self.client.post(self.url, {'offer': self.offers[0].id, 'paths': 2000, 'seed': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual((body['offers'], body['paths'], body['seed']), (1, 2000, 1))
+        self.assertEqual(body['fixed_rate']['monthly_payment'], 440.96)
+        self.assertEqual(list(body['total_interest']), ['p5', 'p50', 'p95', 'p99'])
+
+        response = self.client.post(self.url, {'customer': self.customer.id, 'paths': 2000}, format='json')
+        self.assertEqual(response.json()['offers'], 2)
+
+    # Test that invalid simulations are rejected
+    def test_invalid(self):
+        response = self.client.post(self.url, {'paths': 10}, format='json')
+        self.assertEqual(response.json()['non_field_errors'], ['Provide either an offer or a customer.'])
+
+        response = self.client.post(self.url, {'offer': self.offers[0].id, 'model': 'vasicek', 'initial_rate': 4}, format='json')
+        self.assertEqual(response.json(), {'mean_rate': ['This field is required for the vasicek model.']})
+
+        response = self.client.post(self.url, {'offer': self.offers[0].id, 'paths': 10001}, format='json')
+        self.assertIn('paths', response.json())
+
+        with self.settings(LOAN_SIMULATION={**SHARDS, 'MAX_REQUEST_STEPS': 1000}):
+            response = self.client.post(self.url, {'customer': self.customer.id, 'paths': 100}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('simulate_rates', response.json()['non_field_errors'][0])
+
+    # Test that the command simulates the whole book in a process pool, like the endpoint does
+    def test_command(self):
+        output = io.StringIO()
+        call_command('simulate_rates', paths=3000, seed=5, workers=1, stdout=output)
+        result = json.loads(output.getvalue())
+        self.assertEqual((result['offers'], result['paths']), (2, 3000))
+
+        response = self.client.post(self.url, {'customer': self.customer.id, 'paths': 3000, 'seed': 5}, format='json')
+        self.assertEqual(response.json(), result)
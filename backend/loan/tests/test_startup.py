@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import NoReverseMatch, reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from assessment_project import settings_api
+from loan.models import Customer
+
+
+# This class contains tests for the loan API served with the API-only settings profile.
+@override_settings(
+    ROOT_URLCONF=settings_api.ROOT_URLCONF, MIDDLEWARE=settings_api.MIDDLEWARE, REST_FRAMEWORK=settings_api.REST_FRAMEWORK,
+)
+class ApiProfileTests(APITestCase):
+
+    # Test that the API works without sessions, auth and messages, as anonymous JSON requests
+    def test_api_without_admin_stack(self):
+        response = self.client.post(reverse('customer-create'), {
+            'first_name': 'Glen', 'last_name': 'Lohja', 'email': 'glenlohja@example.com',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Customer.objects.count(), 1)
+
+        # Assert that reads are rendered as JSON, even for a browser asking for HTML
+        response = self.client.get(reverse('customer-create'), HTTP_ACCEPT='text/html,application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    # Test that the admin isn't routed
+    def test_no_admin(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse('admin:index')
+        self.assertEqual(self.client.get('/admin/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+# This class contains tests for the startup_time command, which starts fresh interpreters.
+class StartupTimeCommandTests(SimpleTestCase):
+
+    # Test that the API profile starts, serves the first request and leaves NumPy unimported
+    def test_api_profile(self):
+        output = StringIO()
+        call_command('startup_time', profile=['api'], runs=1, stdout=output)
+        self.assertIn('first_request', output.getvalue())
+        self.assertIn('cold_start', output.getvalue())
+        lines = [line.split() for line in output.getvalue().splitlines()]
+        self.assertIn(['numpy', 'not', 'imported'], lines)
+
+        # Assert that the views are left to the first request instead of adding to the import of the entry point
+        self.assertIn(['loan.views', 'imported', 'at', 'first', 'request'], lines)
+
+    # Test that the command stores its measurements in the baseline and fails when they regress
+    def test_regression_gate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command('startup_time', profile=['api'], runs=1, baseline=path, save_baseline=True, stdout=StringIO())
+            with open(path) as file:
+                self.assertIn('startup.first-request[api]', json.load(file)['results'])
+
+            # Pretend the baseline was a thousand times faster
+            with open(path, 'w') as file:
+                json.dump({'results': {'startup.import[api]': 1e-6}}, file)
+
+            # Assert that the comparison fails the command
+            with self.assertRaises(CommandError):
+                call_command('startup_time', profile=['api'], runs=1, baseline=path, compare=True, stdout=StringIO())
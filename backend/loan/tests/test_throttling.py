@@ -0,0 +1,152 @@
+import copy
+from unittest import mock
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from loan.metrics import IN_FLIGHT, REQUESTS, THROTTLE_DECISIONS
+from loan.models import Customer
+from loan.serializers import CustomerSerializer
+from loan.throttling import take_token
+
+CALCULATOR_INPUT = {'loan_amount': 10000.00, 'interest_rate': 5.5, 'loan_term': 24}
+
+
+# Helper to build LOAN_THROTTLING with some scope settings replaced
+def throttling(**scopes):
+    config = copy.deepcopy(settings.LOAN_THROTTLING)
+    for name, overrides in scopes.items():
+        config['SCOPES'][name].update(overrides)
+    return config
+
+
+# This class contains tests for the GCRA token bucket.
+class TakeTokenTests(SimpleTestCase):
+
+    # The setUp method is called before each test. It clears the throttle cache.
+    def setUp(self):
+        self.cache = caches['throttle']
+        self.cache.clear()
+
+    # Test that a full bucket admits a burst of its capacity, then rejects with the wait for the next token
+    def test_burst_then_reject(self):
+        waits = [take_token(self.cache, 'bucket', capacity=3, rate=2, now=100) for _ in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 0.5)
+
+        # Assert that the rejected request didn't use up a token
+        self.assertAlmostEqual(take_token(self.cache, 'bucket', capacity=3, rate=2, now=100.25), 0.25)
+        self.assertEqual(take_token(self.cache, 'bucket', capacity=3, rate=2, now=100.5), 0)
+
+    # Test that an idle bucket refills to its capacity, but not beyond
+    def test_refill(self):
+        for _ in range(3):
+            take_token(self.cache, 'bucket', capacity=3, rate=2, now=100)
+        waits = [take_token(self.cache, 'bucket', capacity=3, rate=2, now=200) for _ in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertGreater(waits[3], 0)
+
+
+# This class contains tests for the admission control middleware.
+class AdmissionControlTests(APITestCase):
+
+    # The setUp method is called before each test. It clears the throttle cache and the throttling and request metrics.
+    def setUp(self):
+        caches['throttle'].clear()
+        for metric in (THROTTLE_DECISIONS, IN_FLIGHT, REQUESTS):
+            metric.clear()
+
+    # Helper to create a customer and return the response
+    def create_customer(self, index, **extra):
+        data = {'first_name': 'Jane', 'last_name': 'Doe', 'email': f'jane{index}@example.com'}
+        return self.client.post(reverse('customer-create'), data, format='json', **extra)
+
+    # Test that a client exceeding the write rate gets a 429 with Retry-After
+    @override_settings(LOAN_THROTTLING=throttling(writes={'CAPACITY': 2, 'RATE': 0.1}))
+    def test_rate_limited(self):
+        responses = [self.create_customer(index) for index in range(3)]
+        self.assertEqual([response.status_code for response in responses[:2]], [status.HTTP_201_CREATED] * 2)
+
+        # Assert that the third create is rejected before the view ran, with the wait in whole seconds
+        self.assertEqual(responses[2].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(responses[2]['Retry-After'], '10')
+        self.assertEqual(responses[2].json()['detail'], 'Request was throttled. Expected available in 10 seconds.')
+        self.assertEqual(Customer.objects.count(), 2)
+        self.assertEqual(THROTTLE_DECISIONS.value(scope='writes', decision='admitted'), 2)
+        self.assertEqual(THROTTLE_DECISIONS.value(scope='writes', decision='rate_limited'), 1)
+
+        # Assert that reads of the same route aren't throttled
+        self.assertEqual(self.client.get(reverse('customer-create')).status_code, status.HTTP_200_OK)
+
+    # Test that every client has a bucket of its own, by remote address or by the configured header
+    @override_settings(LOAN_THROTTLING={**throttling(writes={'CAPACITY': 1, 'RATE': 0.1}), 'CLIENT_HEADER': 'X-Api-Key'})
+    def test_per_client(self):
+        self.assertEqual(self.create_customer(0, HTTP_X_API_KEY='a').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create_customer(1, HTTP_X_API_KEY='a').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.create_customer(2, HTTP_X_API_KEY='b').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create_customer(3, REMOTE_ADDR='10.0.0.1').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create_customer(4, REMOTE_ADDR='10.0.0.2').status_code, status.HTTP_201_CREATED)
+
+    # Test that the calculator fast path is throttled too, and recorded under its route
+    @override_settings(LOAN_THROTTLING=throttling(calculator={'CAPACITY': 1, 'RATE': 0.1}))
+    def test_calculator_fast_path(self):
+        url = reverse('loan-calculator-fast')
+        self.assertEqual(self.client.post(url, CALCULATOR_INPUT, format='json').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url, CALCULATOR_INPUT, format='json').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Assert that the rejection is exposed on /metrics
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('loan_throttle_decisions_total{scope="calculator",decision="rate_limited"} 1', body)
+        self.assertIn('loan_http_requests_total{route="api/v1/loan-calculator/fast",method="POST",status="429"} 1', body)
+
+    # Test that requests served under ASGI are admitted and rejected like under WSGI
+    @override_settings(LOAN_THROTTLING=throttling(calculator={'CAPACITY': 1, 'RATE': 0.1}))
+    async def test_async_stack(self):
+        url = reverse('loan-calculator-fast')
+        responses = [await self.async_client.post(url, CALCULATOR_INPUT, content_type='application/json') for _ in range(2)]
+        self.assertEqual(responses[0].json(), {'monthly_payment': 440.96})
+        self.assertEqual(responses[1].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    # Test that a rejection carries CORS headers, so a browser on another origin can read the status and Retry-After
+    @override_settings(LOAN_THROTTLING=throttling(calculator={'CAPACITY': 1, 'RATE': 0.1}))
+    def test_rejection_has_cors_headers(self):
+        url = reverse('loan-calculator')
+        for _ in range(2):
+            response = self.client.post(url, CALCULATOR_INPUT, format='json', HTTP_ORIGIN='http://localhost:3000')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'http://localhost:3000')
+
+    # Test that writes beyond the concurrency limit are shed instead of queued
+    @override_settings(LOAN_THROTTLING=throttling(writes={'CONCURRENCY': 1}))
+    def test_shed_over_concurrency(self):
+        nested = []
+        create = CustomerSerializer.create
+
+        # Another create arrives while the first one is still in the view
+        def create_while_in_flight(serializer, validated_data):
+            if not nested:
+                nested.append(self.create_customer(1))
+                self.assertEqual(IN_FLIGHT.value(scope='writes'), 1)
+            return create(serializer, validated_data)
+
+        with mock.patch.object(CustomerSerializer, 'create', create_while_in_flight):
+            response = self.create_customer(0)
+
+        # Assert that the first create succeeded and the concurrent one was shed with Retry-After
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(nested[0].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(nested[0]['Retry-After'], '1')
+        self.assertEqual(THROTTLE_DECISIONS.value(scope='writes', decision='shed'), 1)
+        self.assertEqual(IN_FLIGHT.value(scope='writes'), 0)
+
+        # Assert that the slot is free again once the first create finished
+        self.assertEqual(self.create_customer(2).status_code, status.HTTP_201_CREATED)
+
+    # Test that nothing is throttled when admission control is disabled
+    @override_settings(LOAN_THROTTLING={**throttling(writes={'CAPACITY': 1, 'RATE': 0.1}), 'ENABLED': False})
+    def test_disabled(self):
+        for index in range(3):
+            self.assertEqual(self.create_customer(index).status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(THROTTLE_DECISIONS.value(scope='writes', decision='admitted'))
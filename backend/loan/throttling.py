@@ -0,0 +1,82 @@
+"""
+Admission control for the write and calculator endpoints, applied by ``loan.middleware.AdmissionControlMiddleware``.
+
+Every client gets a token bucket per route, kept in a shared cache so all worker processes draw from the same
+bucket. Write endpoints additionally admit a bounded number of concurrent requests per process. Whatever doesn't
+fit is shed right away with a 429 and a ``Retry-After`` instead of queuing behind SQLite's write lock.
+"""
+import functools
+import math
+import time
+from django.http import JsonResponse
+from django.urls import Resolver404
+
+MICROSECONDS = 1_000_000
+
+
+def take_token(cache, key, capacity, rate, now=None):
+    """
+    Take a token from the bucket at ``key``, holding ``capacity`` tokens and refilled with ``rate`` tokens per second.
+    Returns 0 when a token was taken, otherwise the seconds until one is available.
+
+    The bucket is stored in its GCRA form, the theoretical arrival time (TAT) of the next request in microseconds:
+    a request advances the TAT by one interval (``1 / rate``) and is admitted while the TAT stays within
+    ``capacity`` intervals of now. Advancing it is a single atomic ``incr``, so concurrent processes can't
+    both spend the last token. A rejected request gives its interval back with ``decr``.
+    """
+    now = int((time.time() if now is None else now) * MICROSECONDS)
+    interval = max(1, round(MICROSECONDS / rate))
+    burst = capacity * interval
+    timeout = max(3600, math.ceil(2 * burst / MICROSECONDS))
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        # first request of the client, or its bucket expired
+        if cache.add(key, now + interval, timeout):
+            return 0
+        tat = cache.incr(key, interval)
+
+    if tat <= now + interval:
+        # the previous TAT had passed, i.e. the bucket is full again: restart it from now
+        cache.set(key, now + interval, timeout)
+        return 0
+    if tat - now > burst:
+        cache.decr(key, interval)
+        return (tat - now - burst) / MICROSECONDS
+    return 0
+
+
+@functools.lru_cache(maxsize=4096)
+def cached_resolve(resolver, path):
+    """
+    ``resolver.resolve(path)``, ``None`` for unknown paths. Resolving takes tens of microseconds and Django
+    resolves the path again for the view, so admission checks keep the matches of recent paths.
+    A changed URLconf comes with a new resolver, so it never sees stale matches.
+    """
+    try:
+        return resolver.resolve(path)
+    except Resolver404:
+        return None
+
+
+def client_ident(request, config):
+    # the configured client header (e.g. an API key set by the gateway), else the remote address
+    header = config.get('CLIENT_HEADER')
+    if header:
+        value = request.headers.get(header)
+        if value:
+            return value
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_scope(match, method, config):
+    # name and settings of the first scope listing the route and method, (None, None) when it isn't throttled
+    for name, scope in config['SCOPES'].items():
+        if match.url_name in scope['ROUTES'] and (scope['METHODS'] is None or method in scope['METHODS']):
+            return name, scope
+    return None, None
+
+
+def too_many_requests(detail, retry_after):
+    retry_after = max(1, math.ceil(retry_after))
+    return JsonResponse({'detail': detail.format(wait=retry_after)}, status=429, headers={'Retry-After': str(retry_after)})
@@ -1,9 +1,34 @@
 from django.urls import path
-from .views import CustomerCreateView, CustomerDetailView, LoanOfferCreateView, loan_calculator
+from .views import (
+    CustomerBulkCreateView, CustomerDetailView, CustomerListCreateView, JobDetailView, JobListCreateView,
+    LoanOfferBulkCreateView, LoanOfferListCreateView, PortfolioCustomerListView, customer_search, export_rows, job_result,
+    loan_calculator, loan_calculator_batch, loan_calculator_cache_stats, loan_calculator_fast, loan_calculator_grid,
+    loan_calculator_solve, loan_schedule, loan_offer_schedule, loan_offer_simulation, loan_offers_schedules,
+    portfolio_summary,
+)
 
 urlpatterns = [
-    path('customers', CustomerCreateView.as_view(), name='customer-create'),
+    path('customers', CustomerListCreateView.as_view(), name='customer-create'),
+    path('customers/bulk', CustomerBulkCreateView.as_view(), name='customer-bulk-create'),
+    path('customers/search', customer_search, name='customer-search'),
     path('customers/<int:pk>', CustomerDetailView.as_view(), name='customer-detail'),
-    path('loanoffers', LoanOfferCreateView.as_view(), name='loanoffer-create'),
+    path('loanoffers', LoanOfferListCreateView.as_view(), name='loanoffer-create'),
+    path('loanoffers/bulk', LoanOfferBulkCreateView.as_view(), name='loanoffer-bulk-create'),
+    path('loanoffers/schedules', loan_offers_schedules, name='loanoffer-schedules'),
+    path('loanoffers/simulate', loan_offer_simulation, name='loanoffer-simulate'),
+    path('loanoffers/<int:pk>/schedule', loan_offer_schedule, name='loanoffer-schedule'),
+    path('portfolio', portfolio_summary, name='portfolio'),
+    path('portfolio/customers', PortfolioCustomerListView.as_view(), name='portfolio-customers'),
     path('loan-calculator', loan_calculator, name='loan-calculator'),
-]
\ No newline at end of file
+    path('loan-calculator/fast', loan_calculator_fast, name='loan-calculator-fast'),
+    path('loan-calculator/batch', loan_calculator_batch, name='loan-calculator-batch'),
+    path('loan-calculator/solve', loan_calculator_solve, name='loan-calculator-solve'),
+    path('loan-calculator/grid', loan_calculator_grid, name='loan-calculator-grid'),
+    path('loan-calculator/cache-stats', loan_calculator_cache_stats, name='loan-calculator-cache-stats'),
+    path('loan-calculator/schedule', loan_schedule, name='loan-calculator-schedule'),
+    path('exports/customers', export_rows, {'name': 'customers'}, name='export-customers'),
+    path('exports/loanoffers', export_rows, {'name': 'loanoffers'}, name='export-loanoffers'),
+    path('jobs', JobListCreateView.as_view(), name='job-create'),
+    path('jobs/<int:pk>', JobDetailView.as_view(), name='job-detail'),
+    path('jobs/<int:pk>/result', job_result, name='job-result'),
+]
@@ -0,0 +1,45 @@
+"""
+Validation of calculator inputs, shared by the calculator endpoints (regular, fast path, async and batch), the
+ad-hoc schedule and the scenarios of background jobs, so they all accept the same values with the same messages.
+"""
+import math
+from django.conf import settings
+
+# error body of a payload whose values aren't numbers
+INVALID_INPUT_ERRORS = {'error': 'Invalid input values'}
+
+# error body of valid inputs whose payment is beyond the float range, which only extreme rates and amounts reach
+PAYMENT_OVERFLOW_ERRORS = {'error': 'The monthly payment of these values is too large to compute.'}
+
+
+def parse_calculator_input(data):
+    """
+    Validate a single ``{loan_amount, interest_rate, loan_term}`` payload.
+    Returns ``((loan_amount, interest_rate, loan_term), None)`` on success
+    or ``(None, errors)`` where ``errors`` is the JSON error body of the calculator endpoint.
+    """
+    try:
+        loan_amount = float(data.get('loan_amount'))
+        interest_rate = float(data.get('interest_rate'))
+        loan_term = int(data.get('loan_term'))
+        if not (math.isfinite(loan_amount) and math.isfinite(interest_rate)):
+            raise ValueError
+    except (ValueError, TypeError, AttributeError):
+        return None, INVALID_INPUT_ERRORS
+
+    # Validate input values
+    if loan_amount <= 0:
+        return None, {'loan_amount': 'Loan amount must be a positive value.'}
+    if interest_rate < 0:
+        return None, {'interest_rate': 'Interest rate must be a non-negative value.'}
+    if loan_term <= 0:
+        return None, {'loan_term': 'Loan term must be a positive value.'}
+    if loan_term > settings.LOAN_CALCULATOR_MAX_TERM:
+        return None, {'loan_term': f'Loan term must be at most {settings.LOAN_CALCULATOR_MAX_TERM} months.'}
+
+    return (loan_amount, interest_rate, loan_term), None
+
+
+def rounded_payment(payment):
+    # the payment rounded to cents, None when it isn't finite (JSON has no NaN or Infinity)
+    return round(payment, 2) if math.isfinite(payment) else None
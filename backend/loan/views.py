@@ -1,24 +1,273 @@
-from rest_framework import generics
-from .models import Customer, LoanOffer
-from django.http import JsonResponse
+from rest_framework import generics, serializers, status
+from rest_framework.exceptions import ParseError
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .models import Customer, Job, LoanOffer, PortfolioSummary
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Prefetch
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from rest_framework.decorators import api_view
+from collections import defaultdict
+import io
 import math
-from .serializers import CustomerSerializer, LoanOfferSerializer
+import orjson
+from .cache import (
+    cached_monthly_payment, customer_detail_cache, customer_detail_cache_key, customer_detail_entry, payment_cache,
+)
+from .calculator import (
+    SCHEDULE_COLUMNS, monthly_payment, monthly_payments, payment_grid, schedule_rows, solve_interest_rates,
+    solve_loan_amounts, solve_loan_terms,
+)
+from .jobs import RESULT_FORMATS, result_path
+from .exports import EXPORT_FORMATS, EXPORTS, ExportUnavailable, export_stream
+from .filters import (
+    LowercaseEmailField, QueryParameterFilterBackend, decimal_filter, filter_by_query_params, integer_filter,
+)
+from .group_commit import offer_group_commit
+from .metrics import REGISTRY
+from .pagination import IdCursorPagination
+from .parsers import NDJSONParser
+from .portfolio import book_totals, bucket_aggregates, offer_aggregates, ordered_buckets, summarize
+from .search import search_customers
+from .simulation import simulate
+from .streaming import csv_lines, ndjson_lines
+from .validation import PAYMENT_OVERFLOW_ERRORS, parse_calculator_input, rounded_payment
+from .serializers import (
+    BulkCustomerSerializer, BulkLoanOfferSerializer, CustomerDetailSerializer, CustomerSearchSerializer, CustomerSerializer,
+    JobSerializer, LoanOfferSerializer, LoanSolveSerializer, OfferSimulationSerializer, PaymentGridSerializer,
+    PortfolioCustomerSerializer, PortfolioSerializer,
+)
 
-class CustomerCreateView(generics.CreateAPIView):
+def conditional_response(request, response, etag, last_modified=None):
+    """
+    Set the ETag (and Last-Modified timestamp) of a private read and return a 304 instead of ``response``
+    when the request's If-None-Match / If-Modified-Since still match. Clients may store the response
+    but have to revalidate it on every use.
+    """
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+def cacheable_calculation(response):
+    # calculator results only depend on the query string, shared caches (CDNs) may keep them
+    patch_cache_control(response, public=True, max_age=settings.LOAN_CALCULATOR_HTTP_MAX_AGE)
+    return response
+
+
+class CustomerListCreateView(generics.ListCreateAPIView):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    pagination_class = IdCursorPagination
+    filter_backends = [QueryParameterFilterBackend]
+    query_filters = {
+        'email': ('email__lower', LowercaseEmailField()),
+    }
+
+@api_view(['GET'])
+def customer_search(request):
+    """
+    Customers matching every word of ``?q=`` as a prefix of their first name, last name or email, best matches
+    first, served from the full-text index of ``loan.search``. ``?limit=`` caps the results. On SQLite, queries with
+    more than ``MAX_CANDIDATES`` matches are ranked among the first of them only, see ``loan.search``.
+    """
+    serializer = CustomerSearchSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    limit = serializer.validated_data.get('limit', settings.LOAN_CUSTOMER_SEARCH['DEFAULT_LIMIT'])
+    customers = search_customers(serializer.validated_data['q'], limit)
+    return Response({'results': CustomerSerializer(customers, many=True).data})
 
 class CustomerDetailView(generics.RetrieveAPIView):
+    """
+    Retrieve a customer. With ``?expand=offers`` the customer's loan offers (and their monthly payments)
+    are embedded, loaded with a single prefetch query.
+    Payloads are cached per customer (when ``LOAN_CUSTOMER_DETAIL_CACHE`` is enabled) and dropped by the model
+    signals in ``loan.signals`` and the bulk writers. Writes that bypass both show after the cache TIMEOUT.
+    Responses carry an ETag (and a Last-Modified without ``expand``), so revalidations get a 304 straight
+    from the cache.
+    """
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
 
-class LoanOfferCreateView(generics.CreateAPIView):
-    queryset = LoanOffer.objects.all()
+    def expand_offers(self):
+        return 'offers' in self.request.query_params.get('expand', '').split(',')
+
+    def get_queryset(self):
+        if self.expand_offers():
+            return Customer.objects.prefetch_related(Prefetch('loanoffer_set', queryset=LoanOffer.objects.order_by('id')))
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        return CustomerDetailSerializer if self.expand_offers() else CustomerSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        cache = customer_detail_cache()
+        key = customer_detail_cache_key(self.kwargs['pk'], self.expand_offers())
+        entry = cache.get(key) if cache is not None else None
+        if entry is None:
+            customer = self.get_object()
+            # deleting an offer changes no timestamp, so the expanded payload is validated by its ETag alone
+            last_modified = None if self.expand_offers() else customer.updated_at.timestamp()
+            entry = customer_detail_entry(self.get_serializer(customer).data, last_modified)
+            if cache is not None:
+                cache.set(key, entry, settings.LOAN_CUSTOMER_DETAIL_CACHE['TIMEOUT'])
+        return conditional_response(request, Response(entry['data']), entry['etag'], entry['last_modified'])
+
+class LoanOfferListCreateView(generics.ListCreateAPIView):
+    # customer is loaded in the same query so representations that touch it don't cause N+1 queries
+    queryset = LoanOffer.objects.select_related('customer')
     serializer_class = LoanOfferSerializer
-    
+    pagination_class = IdCursorPagination
+    filter_backends = [QueryParameterFilterBackend, OrderingFilter]
+    # ?ordering=monthly_payment (or -monthly_payment) sorts on the indexed payment column
+    ordering_fields = ['id', 'monthly_payment']
+    query_filters = {
+        'customer': ('customer_id', integer_filter()),
+        'min_amount': ('loan_amount__gte', decimal_filter()),
+        'max_amount': ('loan_amount__lte', decimal_filter()),
+        'min_rate': ('interest_rate__gte', decimal_filter()),
+        'max_rate': ('interest_rate__lte', decimal_filter()),
+        'min_term': ('loan_term__gte', integer_filter()),
+        'max_term': ('loan_term__lte', integer_filter()),
+        'min_payment': ('monthly_payment__gte', decimal_filter()),
+        'max_payment': ('monthly_payment__lte', decimal_filter()),
+    }
+
+    # with LOAN_OFFER_GROUP_COMMIT enabled the offer is written in one transaction with concurrent creates
+    def perform_create(self, serializer):
+        if not settings.LOAN_OFFER_GROUP_COMMIT['ENABLED']:
+            return super().perform_create(serializer)
+        try:
+            serializer.instance = offer_group_commit.submit(LoanOffer(**serializer.validated_data))
+        except IntegrityError as exc:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [str(exc)]})
+
 
 @api_view(['POST'])
+def loan_offer_simulation(request):
+    """
+    Monte Carlo simulation of an offer, or of a customer's offers together, under a variable-rate model.
+    Expected JSON payload:
+    {
+        "offer": 1,
+        "model": "vasicek",
+        "initial_rate": 4.0,
+        "mean_rate": 5.0,
+        "reversion": 0.2,
+        "volatility": 1.0,
+        "paths": 10000,
+        "seed": 42
+    }
+    Returns percentiles of the highest monthly payment and of the total interest over the paths.
+    """
+    serializer = OfferSimulationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(simulate(serializer.validated_data['offers'], serializer.validated_data))
+
+
+class BulkCreateView(generics.GenericAPIView):
+    """
+    Create many records from a JSON array or an NDJSON body in one request.
+    Invalid records are reported by index without aborting the rest of the batch.
+    """
+    parser_classes = [JSONParser, NDJSONParser]
+
+    # PUT asks the serializer to update existing records instead of rejecting them
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'upsert': self.request.method == 'PUT'}
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        written = serializer.save()
+
+        results = serializer.results(len(request.data))
+        created, updated = serializer.written_counts()
+        failed = written == [] and serializer.record_errors
+        written_status = status.HTTP_200_OK if request.method == 'PUT' else status.HTTP_201_CREATED
+        response_status = status.HTTP_400_BAD_REQUEST if failed else written_status
+        body = {'created': created}
+        # only PUT can update existing records
+        if request.method == 'PUT':
+            body['updated'] = updated
+        return Response({
+            **body,
+            'error_count': len(results) - len(written),
+            'results': results,
+        }, status=response_status)
+
+class CustomerBulkCreateView(BulkCreateView):
+    queryset = Customer.objects.all()
+    serializer_class = BulkCustomerSerializer
+
+    # create or update by email, for partner syncs
+    def put(self, request, *args, **kwargs):
+        return self.post(request, *args, **kwargs)
+
+class LoanOfferBulkCreateView(BulkCreateView):
+    queryset = LoanOffer.objects.all()
+    serializer_class = BulkLoanOfferSerializer
+
+
+@api_view(['GET'])
+def portfolio_summary(request):
+    """
+    Book-wide exposure, rates and expected interest, in total and per term bucket.
+    Read from the incrementally maintained summary rows (one per bucket), ``?source=live`` aggregates
+    the offer table instead.
+    """
+    source = request.query_params.get('source', 'summary')
+    if source == 'summary':
+        rows = PortfolioSummary.objects.values()
+    elif source == 'live':
+        rows = bucket_aggregates(LoanOffer.objects.all())
+    else:
+        return Response({'source': ['Source must be "summary" or "live".']}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(PortfolioSerializer(book_totals(rows)).data)
+
+class PortfolioCustomerListView(generics.ListAPIView):
+    """
+    Portfolio figures per customer with offers, aggregated in SQL: one GROUP BY query for the page
+    and one for the term buckets of its customers.
+    """
+    serializer_class = PortfolioCustomerSerializer
+    pagination_class = IdCursorPagination
+    filter_backends = [QueryParameterFilterBackend]
+    query_filters = {
+        'customer': ('id', integer_filter()),
+    }
+
+    def get_queryset(self):
+        return Customer.objects.annotate(**offer_aggregates('loanoffer__')).filter(offer_count__gt=0)
+
+    def list(self, request, *args, **kwargs):
+        customers = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        buckets = defaultdict(list)
+        offers = LoanOffer.objects.filter(customer_id__in=[customer.id for customer in customers])
+        for row in bucket_aggregates(offers, by_customer=True):
+            buckets[row['customer_id']].append(row)
+
+        data = [
+            {'customer': customer.id, **summarize(vars(customer)), 'term_buckets': ordered_buckets(buckets[customer.id])}
+            for customer in customers
+        ]
+        return self.get_paginated_response(self.get_serializer(data, many=True).data)
+
+
+@api_view(['GET', 'POST'])
 def loan_calculator(request):
     """
     Calculate monthly loan payments using the standard loan amortization formula.
@@ -28,30 +277,354 @@ def loan_calculator(request):
         "interest_rate": 5.5,
         "loan_term": 24
     }
+    The same values can be sent as query parameters of a GET, whose response is cacheable by browsers and CDNs.
     """
-    try:
-        loan_amount = float(request.data.get('loan_amount'))
-        interest_rate = float(request.data.get('interest_rate'))
-        loan_term = int(request.data.get('loan_term'))
-
-        # Validate input values
-        if loan_amount <= 0:
-            return JsonResponse({'loan_amount': 'Loan amount must be a positive value.'}, status=400)
-        if interest_rate < 0:
-            return JsonResponse({'interest_rate': 'Interest rate must be a non-negative value.'}, status=400)
-        if loan_term <= 0:
-            return JsonResponse({'loan_term': 'Loan term must be a positive value.'}, status=400)
-
-        # Convert annual interest rate to a monthly rate
-        monthly_rate = interest_rate / 100 / 12
-        # Calculate monthly payment using the loan amortization formula
-        if monthly_rate == 0:  # handle the case of zero interest rate
-            monthly_payment = loan_amount / loan_term
+    values, errors = parse_calculator_input(request.query_params if request.method == 'GET' else request.data)
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    payment = rounded_payment(cached_monthly_payment(*values))
+    if payment is None:
+        return JsonResponse(PAYMENT_OVERFLOW_ERRORS, status=400)
+    response = JsonResponse({'monthly_payment': payment}, status=200)
+    return cacheable_calculation(response) if request.method == 'GET' else response
+
+
+# content types DRF parses into request.data besides JSON
+FORM_MEDIA_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+
+def parse_calculator_body(request):
+    """
+    Parse the body of a calculator request the way DRF's default parsers fill ``request.data``, JSON with orjson.
+    Returns ``(data, None)`` or ``(None, error response)``.
+    """
+    if not request.body:
+        return {}, None
+    if request.content_type == 'application/json':
+        try:
+            return orjson.loads(request.body), None
+        except orjson.JSONDecodeError:
+            # rare, so hand the body to DRF's own parser: it reports the same error as the regular route,
+            # and it accepts what only orjson rejects (e.g. integers beyond 64 bits)
+            try:
+                context = {'encoding': request.encoding or settings.DEFAULT_CHARSET}
+                return JSONParser().parse(io.BytesIO(request.body), parser_context=context), None
+            except ParseError as exc:
+                return None, JsonResponse({'detail': exc.detail}, status=400)
+    if request.content_type in FORM_MEDIA_TYPES:
+        return request.POST, None
+    return None, JsonResponse({'detail': f'Unsupported media type "{request.META.get("CONTENT_TYPE")}" in request.'}, status=415)
+
+
+@csrf_exempt
+def loan_calculator_fast(request):
+    """
+    Lean version of ``GET|POST /api/v1/loan-calculator`` without DRF's request wrapping, content negotiation,
+    authentication and throttling, with the same validation messages and status codes.
+    With ``LOAN_CALCULATOR_FAST_PATH`` enabled ``CalculatorFastPathMiddleware`` also skips the rest of the middleware.
+    """
+    if request.method == 'GET':
+        data = request.GET
+    elif request.method == 'POST':
+        data, error_response = parse_calculator_body(request)
+        if error_response:
+            return error_response
+    else:
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405, headers={'Allow': 'GET, POST'})
+
+    values, errors = parse_calculator_input(data)
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    payment = rounded_payment(cached_monthly_payment(*values))
+    if payment is None:
+        return JsonResponse(PAYMENT_OVERFLOW_ERRORS, status=400)
+    response = JsonResponse({'monthly_payment': payment}, status=200)
+    return cacheable_calculation(response) if request.method == 'GET' else response
+
+
+@api_view(['GET'])
+def loan_calculator_cache_stats(request):
+    """
+    Report the hit/miss/eviction counters of the loan calculator's payment cache for this process.
+    """
+    _, stats = payment_cache()
+    return JsonResponse({'enabled': settings.LOAN_CALCULATOR_CACHE['ENABLED'], **stats.snapshot()}, status=200)
+
+
+@api_view(['POST'])
+def loan_calculator_batch(request):
+    """
+    Calculate monthly loan payments for many scenarios in one request.
+    Expected JSON payload (a bare list of scenarios is accepted too):
+    {
+        "scenarios": [
+            {"loan_amount": 10000.00, "interest_rate": 5.5, "loan_term": 24},
+            {"loan_amount": 5000.00, "interest_rate": 0, "loan_term": 12}
+        ]
+    }
+    Every scenario gets an entry in ``results`` at the same index, either
+    ``{"monthly_payment": ...}`` or ``{"errors": {...}}`` with the single calculator's error body.
+    """
+    body, status_code = calculate_batch(request.data)
+    return JsonResponse(body, status=status_code)
+
+
+def calculate_batch(data):
+    """
+    Validate and price a batch calculator payload, returns ``(body, status)`` of the response.
+    """
+    scenarios = data.get('scenarios') if isinstance(data, dict) else data
+    if not isinstance(scenarios, list):
+        return {'error': 'Expected a list of scenarios.'}, 400
+
+    max_size = settings.LOAN_CALCULATOR_BATCH_MAX_SIZE
+    if len(scenarios) > max_size:
+        return {'error': f'A batch may contain at most {max_size} scenarios.'}, 400
+
+    results = [None] * len(scenarios)
+    valid_indexes = []
+    columns = ([], [], [])
+    for index, scenario in enumerate(scenarios):
+        values, errors = parse_calculator_input(scenario)
+        if errors:
+            results[index] = {'errors': errors}
+            continue
+        valid_indexes.append(index)
+        for column, value in zip(columns, values):
+            column.append(value)
+
+    # one vectorized pass over every valid scenario
+    import numpy as np
+    payments = np.round(monthly_payments(*columns), 2).tolist()
+    priced = 0
+    for index, payment in zip(valid_indexes, payments):
+        if math.isfinite(payment):
+            results[index] = {'monthly_payment': payment}
+            priced += 1
         else:
-            monthly_payment = loan_amount * (monthly_rate * math.pow(1 + monthly_rate, loan_term)) / (math.pow(1 + monthly_rate, loan_term) - 1)
+            results[index] = {'errors': PAYMENT_OVERFLOW_ERRORS}
+
+    return {
+        'count': len(scenarios),
+        'error_count': len(scenarios) - priced,
+        'results': results,
+    }, 200
+
+
+# unknown -> (solver, its arguments in order, decimal places of the answer, error when there is no answer)
+SOLVERS = {
+    'loan_amount': (solve_loan_amounts, ('monthly_payment', 'interest_rate', 'loan_term'), 2, None),
+    'interest_rate': (solve_interest_rates, ('loan_amount', 'loan_term', 'monthly_payment'), 4,
+                      'The monthly payment is too low to repay the loan amount within the loan term.'),
+    'loan_term': (solve_loan_terms, ('loan_amount', 'interest_rate', 'monthly_payment'), None,
+                  "The monthly payment doesn't cover the monthly interest of the loan."),
+}
+
+
+@api_view(['POST'])
+def loan_calculator_solve(request):
+    """
+    Solve for whichever of loan_amount, interest_rate, loan_term and monthly_payment is left out.
+    Amount and term are solved in closed form, the rate with a vectorized Newton/bisection iteration.
+    A solved term is rounded up to whole months, the last payment being the smaller one.
+    Expected JSON payload, e.g. "what can I borrow at 400/month over 60 months":
+    {
+        "interest_rate": 5.5,
+        "loan_term": 60,
+        "monthly_payment": 400
+    }
+    """
+    serializer = LoanSolveSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    values = dict(serializer.validated_data)
+    unknown = values.pop('solve_for')
 
-        monthly_payment = round(monthly_payment, 2)
-        return JsonResponse({'monthly_payment': monthly_payment}, status=200)
+    if unknown == 'monthly_payment':
+        values['monthly_payment'] = round(monthly_payment(values['loan_amount'], values['interest_rate'], values['loan_term']), 2)
+    else:
+        solver, arguments, places, infeasible_error = SOLVERS[unknown]
+        answer = solver(*(values[name] for name in arguments)).item()
+        if math.isnan(answer):
+            return JsonResponse({'non_field_errors': [infeasible_error]}, status=400)
+        # a term a hair above a whole month is floating point residue, not an extra month
+        values[unknown] = math.ceil(round(answer, 6)) if places is None else round(answer, places)
+
+    return JsonResponse({'solved_for': unknown, **values}, status=200)
+
+
+@api_view(['POST'])
+def loan_calculator_grid(request):
+    """
+    Monthly payments of a loan amount over every interest rate x loan term combination, in one vectorized pass.
+    ``interest_rates`` and ``loan_terms`` are lists or ``{"start", "stop", "step"}`` ranges (stop included);
+    ``monthly_payments`` has one row per interest rate and one column per loan term.
+    """
+    import numpy as np
+    serializer = PaymentGridSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    data = serializer.validated_data
+
+    payments = np.round(payment_grid(data['loan_amount'], data['interest_rates'], data['loan_terms']), 2)
+    return JsonResponse({
+        'loan_amount': data['loan_amount'],
+        'interest_rates': data['interest_rates'],
+        'loan_terms': data['loan_terms'],
+        'monthly_payments': payments.tolist(),
+    }, status=200)
+
+
+SCHEDULE_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+
+def streaming_schedule_response(request, header, row_chunks):
+    """
+    Stream ``row_chunks`` (one iterable of rows per schedule) in the format requested by ``?format=``.
+    """
+    output_format = request.GET.get('format', 'ndjson')
+    if output_format not in SCHEDULE_FORMATS:
+        return JsonResponse({'format': f"Format must be one of: {', '.join(SCHEDULE_FORMATS)}."}, status=400)
+
+    lines, content_type = SCHEDULE_FORMATS[output_format]
+    return StreamingHttpResponse(lines(header, row_chunks), content_type=content_type)
+
+
+@require_GET
+def loan_schedule(request):
+    """
+    Stream the amortization schedule of an ad-hoc loan as NDJSON (default) or CSV.
+    Query parameters: loan_amount, interest_rate, loan_term and optionally format=ndjson|csv.
+    """
+    values, errors = parse_calculator_input(request.GET)
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    max_term = settings.LOAN_SCHEDULE_MAX_TERM
+    if values[2] > max_term:
+        return JsonResponse({'loan_term': f'Loan term must be at most {max_term} months.'}, status=400)
+    if rounded_payment(monthly_payment(*values)) is None:
+        return JsonResponse(PAYMENT_OVERFLOW_ERRORS, status=400)
+
+    response = streaming_schedule_response(request, SCHEDULE_COLUMNS, [schedule_rows(*values)])
+    return cacheable_calculation(response) if response.status_code == 200 else response
+
+
+def offer_schedule_chunks(offers):
+    # one chunk per offer, so only a single schedule is held in memory at a time
+    for offer_id, loan_amount, interest_rate, loan_term in offers:
+        yield schedule_rows(float(loan_amount), float(interest_rate), loan_term, offer_id)
+
+
+@require_GET
+def loan_offer_schedule(request, pk):
+    """
+    Stream the amortization schedule of a stored loan offer as NDJSON (default) or CSV.
+    """
+    offer = get_object_or_404(LoanOffer.objects.values_list('id', 'loan_amount', 'interest_rate', 'loan_term', 'updated_at'), pk=pk)
+    response = streaming_schedule_response(request, ('offer',) + SCHEDULE_COLUMNS, offer_schedule_chunks([offer[:4]]))
+    # the schedule only changes with the offer, a 304 skips generating it
+    last_modified = offer[4].timestamp()
+    etag = quote_etag(f'offer-schedule-{pk}-{last_modified}-{request.GET.get("format", "ndjson")}')
+    return conditional_response(request, response, etag, last_modified)
+
+
+@require_GET
+def loan_offers_schedules(request):
+    """
+    Stream the amortization schedules of every loan offer, optionally only those of ``?customer=<id>``.
+    Offers are read from the database in chunks while the response is being sent.
+    """
+    offers = LoanOffer.objects.order_by('id')
+    customer = request.GET.get('customer')
+    if customer is not None:
+        if not customer.isdigit():
+            return JsonResponse({'customer': 'Customer must be a customer id.'}, status=400)
+        offers = offers.filter(customer_id=customer)
+
+    rows = offers.values_list('id', 'loan_amount', 'interest_rate', 'loan_term').iterator(chunk_size=500)
+    return streaming_schedule_response(request, ('offer',) + SCHEDULE_COLUMNS, offer_schedule_chunks(rows))
+
+
+@require_GET
+def metrics(request):
+    """
+    Request, database, serializer and cache metrics of this process, in the Prometheus text exposition format.
+    """
+    return HttpResponse(REGISTRY.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class JobListCreateView(generics.ListCreateAPIView):
+    """
+    Submit a background job (answered with 202 and the job to poll) or list jobs, optionally by ``?status=``.
+    Jobs are executed by ``manage.py run_jobs``.
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    pagination_class = IdCursorPagination
+    filter_backends = [QueryParameterFilterBackend]
+    query_filters = {
+        'status': ('status', serializers.ChoiceField(choices=Job.Status.choices)),
+    }
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        response['Location'] = reverse('job-detail', args=[response.data['id']])
+        return response
+
+class JobDetailView(generics.RetrieveAPIView):
+    # status and progress of a job, polled until it succeeded or failed
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+
+
+@require_GET
+def job_result(request, pk):
+    """
+    Download the result file of a succeeded job, 409 while it is still queued or running (or failed).
+    """
+    job = get_object_or_404(Job, pk=pk)
+    if job.status != Job.Status.SUCCEEDED:
+        return JsonResponse({'detail': f'Job is {job.status}, it has no result.'}, status=409)
+    _, content_type = RESULT_FORMATS[job.params.get('format', 'csv')]
+    return FileResponse(open(result_path(job), 'rb'), as_attachment=True, filename=job.result_file, content_type=content_type)
+
+
+# export name -> query filters it accepts, those of the matching list endpoint
+EXPORT_FILTERS = {
+    'customers': CustomerListCreateView.query_filters,
+    'loanoffers': LoanOfferListCreateView.query_filters,
+}
+
+
+@require_GET
+def export_rows(request, name):
+    """
+    Stream every customer or loan offer (narrowed by the list endpoint's filters) as ``?format=csv`` (the default),
+    ``parquet`` or ``arrow``. ``?payments=true`` adds the stored payment columns of offers.
+    Rows are read in chunks while the response is sent, so memory stays flat.
+    """
+    output_format = request.GET.get('format', 'csv')
+    if output_format not in EXPORT_FORMATS:
+        return JsonResponse({'format': f"Format must be one of: {', '.join(EXPORT_FORMATS)}."}, status=400)
+    try:
+        queryset = filter_by_query_params(EXPORTS[name][0].objects.all(), request.GET, EXPORT_FILTERS[name])
+        payments = serializers.BooleanField().run_validation(request.GET.get('payments', False))
+    except serializers.ValidationError as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'payments': exc.detail}
+        return JsonResponse(detail, status=400)
+    try:
+        stream = export_stream(name, queryset, output_format, payments)
+    except ExportUnavailable as exc:
+        return JsonResponse({'format': str(exc)}, status=400)
 
-    except (ValueError, TypeError):
-        return JsonResponse({'error': 'Invalid input values'}, status=400)
\ No newline at end of file
+    extension, content_type = EXPORT_FORMATS[output_format]
+    return StreamingHttpResponse(stream, content_type=content_type, headers={
+        'Content-Disposition': f'attachment; filename="{name}.{extension}"',
+    })